@@ -0,0 +1,38 @@
+"""Add notification outbox
+
+Revision ID: 004_add_notification_outbox
+Revises: 003_add_notifications_system
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision = '004_add_notification_outbox'
+down_revision = '003_add_notifications_system'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('notification_outbox',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('template_code', sa.String(length=50), nullable=False),
+        sa.Column('notification_type', postgresql.ENUM('TRANSACTION', 'KYC_UPDATE', 'LOAN_UPDATE', 'ACCOUNT_UPDATE', 'SYSTEM_ALERT', name='notificationtype', create_type=False), nullable=False),
+        sa.Column('channel', postgresql.ENUM('EMAIL', 'SMS', 'IN_APP', name='notificationchannel', create_type=False), nullable=False),
+        sa.Column('account_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', postgresql.ENUM('PENDING', 'SENT', 'FAILED', name='notificationstatus', create_type=False), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('dispatched_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_notification_outbox_status_created', 'notification_outbox', ['status', 'created_at'])
+
+def downgrade():
+    op.drop_index('idx_notification_outbox_status_created')
+    op.drop_table('notification_outbox')
@@ -0,0 +1,23 @@
+"""Add account history indexes for keyset pagination
+
+Revision ID: 005_add_transaction_history_indexes
+Revises: 004_add_notification_outbox
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '005_add_transaction_history_indexes'
+down_revision = '004_add_notification_outbox'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('idx_transactions_from_account_created', 'transactions', ['from_account_id', 'created_at', 'id'])
+    op.create_index('idx_transactions_to_account_created', 'transactions', ['to_account_id', 'created_at', 'id'])
+
+def downgrade():
+    op.drop_index('idx_transactions_to_account_created')
+    op.drop_index('idx_transactions_from_account_created')
@@ -0,0 +1,21 @@
+"""Add account time-order index on entries
+
+Revision ID: 006_add_entries_account_index
+Revises: 005_add_transaction_history_indexes
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '006_add_entries_account_index'
+down_revision = '005_add_transaction_history_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('idx_entries_account_created', 'entries', ['account_id', 'created_at', 'id'])
+
+def downgrade():
+    op.drop_index('idx_entries_account_created')
@@ -0,0 +1,29 @@
+"""Add daily balance snapshots
+
+Revision ID: 007_add_balance_snapshots
+Revises: 006_add_entries_account_index
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision = '007_add_balance_snapshots'
+down_revision = '006_add_entries_account_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('balance_snapshots',
+        sa.Column('account_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('closing_balance', sa.DECIMAL(precision=15, scale=2), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+        sa.PrimaryKeyConstraint('account_id', 'snapshot_date')
+    )
+
+def downgrade():
+    op.drop_table('balance_snapshots')
@@ -0,0 +1,33 @@
+"""Add daily interest accruals
+
+Revision ID: 008_add_interest_accruals
+Revises: 007_add_balance_snapshots
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision = '008_add_interest_accruals'
+down_revision = '007_add_balance_snapshots'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('interest_accruals',
+        sa.Column('account_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('accrual_date', sa.Date(), nullable=False),
+        sa.Column('rate_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('closing_balance', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('interest_rate', sa.Numeric(precision=5, scale=4), nullable=False),
+        sa.Column('accrued_amount', sa.Numeric(precision=15, scale=8), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+        sa.ForeignKeyConstraint(['rate_id'], ['interest_rates.id'], ),
+        sa.PrimaryKeyConstraint('account_id', 'accrual_date')
+    )
+
+def downgrade():
+    op.drop_table('interest_accruals')
\ No newline at end of file
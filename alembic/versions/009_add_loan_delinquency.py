@@ -0,0 +1,53 @@
+"""Add loan delinquency and aging summary
+
+Revision ID: 009_add_loan_delinquency
+Revises: 008_add_interest_accruals
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision = '009_add_loan_delinquency'
+down_revision = '008_add_interest_accruals'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('loan_delinquency',
+        sa.Column('loan_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('as_of_date', sa.Date(), nullable=False),
+        sa.Column('installments_due', sa.Integer(), nullable=False),
+        sa.Column('amount_due', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('amount_paid', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('arrears_amount', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('days_past_due', sa.Integer(), nullable=False),
+        sa.Column('aging_bucket', sa.Enum('CURRENT', 'DPD_1_30', 'DPD_31_60', 'DPD_61_90', 'DPD_90_PLUS', name='agingbucket'), nullable=False),
+        sa.Column('outstanding_balance', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['loan_id'], ['loans.id'], ),
+        sa.PrimaryKeyConstraint('loan_id')
+    )
+    op.create_index('idx_loan_delinquency_bucket', 'loan_delinquency', ['aging_bucket'])
+    
+    op.create_table('loan_aging_summary',
+        sa.Column('as_of_date', sa.Date(), nullable=False),
+        sa.Column('aging_bucket', postgresql.ENUM('CURRENT', 'DPD_1_30', 'DPD_31_60', 'DPD_61_90', 'DPD_90_PLUS', name='agingbucket', create_type=False), nullable=False),
+        sa.Column('loan_count', sa.Integer(), nullable=False),
+        sa.Column('outstanding_balance', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('arrears_amount', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('as_of_date', 'aging_bucket')
+    )
+    
+    # Lets the aging job and payment history read a loan's payments without a full scan
+    op.create_index('idx_loan_payments_loan_id', 'loan_payments', ['loan_id'])
+
+def downgrade():
+    op.drop_index('idx_loan_payments_loan_id')
+    op.drop_table('loan_aging_summary')
+    op.drop_index('idx_loan_delinquency_bucket')
+    op.drop_table('loan_delinquency')
+    sa.Enum(name='agingbucket').drop(op.get_bind(), checkfirst=True)
\ No newline at end of file
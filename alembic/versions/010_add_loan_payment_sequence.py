@@ -0,0 +1,32 @@
+"""Add loan payment sequence counter
+
+Revision ID: 010_add_loan_payment_sequence
+Revises: 009_add_loan_delinquency
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '010_add_loan_payment_sequence'
+down_revision = '009_add_loan_delinquency'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('loans', sa.Column('payment_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE loans SET payment_count = counts.total
+        FROM (SELECT loan_id, COUNT(*) AS total FROM loan_payments GROUP BY loan_id) AS counts
+        WHERE counts.loan_id = loans.id
+    """)
+    
+    # Payment history is paged newest first within a loan
+    op.drop_index('idx_loan_payments_loan_id')
+    op.create_index('idx_loan_payments_loan_date', 'loan_payments', ['loan_id', 'payment_date', 'id'])
+
+def downgrade():
+    op.drop_index('idx_loan_payments_loan_date')
+    op.create_index('idx_loan_payments_loan_id', 'loan_payments', ['loan_id'])
+    op.drop_column('loans', 'payment_count')
\ No newline at end of file
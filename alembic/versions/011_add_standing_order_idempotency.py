@@ -0,0 +1,27 @@
+"""Add standing order execution idempotency key
+
+Revision ID: 011_add_standing_order_idempotency
+Revises: 010_add_loan_payment_sequence
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '011_add_standing_order_idempotency'
+down_revision = '010_add_loan_payment_sequence'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Historical executions keep a NULL date; only new ones are keyed
+    op.add_column('standing_order_executions', sa.Column('scheduled_date', sa.Date(), nullable=True))
+    op.create_index(
+        'uq_standing_order_executions_order_date', 'standing_order_executions',
+        ['standing_order_id', 'scheduled_date'], unique=True
+    )
+
+def downgrade():
+    op.drop_index('uq_standing_order_executions_order_date')
+    op.drop_column('standing_order_executions', 'scheduled_date')
\ No newline at end of file
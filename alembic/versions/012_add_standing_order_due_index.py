@@ -0,0 +1,24 @@
+"""Add partial index on due standing orders
+
+Revision ID: 012_add_standing_order_due_index
+Revises: 011_add_standing_order_idempotency
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '012_add_standing_order_due_index'
+down_revision = '011_add_standing_order_idempotency'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index(
+        'idx_standing_orders_due', 'standing_orders', ['next_execution_date'],
+        postgresql_where=sa.text('is_active')
+    )
+
+def downgrade():
+    op.drop_index('idx_standing_orders_due')
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""Add bulk transfer jobs and staged rows
+
+Revision ID: 013_add_bulk_transfers
+Revises: 012_add_standing_order_due_index
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision = '013_add_bulk_transfers'
+down_revision = '012_add_standing_order_due_index'
+branch_labels = None
+depends_on = None
+
+PAYMENT_STATUS = postgresql.ENUM('PENDING', 'PROCESSING', 'COMPLETED', 'FAILED', 'CANCELLED', name='paymentstatus', create_type=False)
+
+def upgrade():
+    op.create_table('bulk_transfer_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('job_reference', sa.String(length=50), nullable=False),
+        sa.Column('from_account_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('currency', sa.String(length=3), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('file_name', sa.String(length=255), nullable=True),
+        sa.Column('file_format', sa.String(length=10), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=False),
+        sa.Column('status', PAYMENT_STATUS, nullable=False),
+        sa.Column('total_rows', sa.Integer(), nullable=False),
+        sa.Column('valid_rows', sa.Integer(), nullable=False),
+        sa.Column('rejected_rows', sa.Integer(), nullable=False),
+        sa.Column('credited_rows', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('credited_amount', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('failure_reason', sa.Text(), nullable=True),
+        sa.Column('transaction_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('ingested_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['from_account_id'], ['accounts.id'], ),
+        sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('job_reference')
+    )
+    
+    op.create_table('bulk_transfer_items',
+        sa.Column('job_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('row_number', sa.Integer(), nullable=False),
+        sa.Column('account_number', sa.String(length=50), nullable=True),
+        sa.Column('account_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('amount', sa.Numeric(precision=15, scale=2), nullable=True),
+        sa.Column('reference', sa.String(length=100), nullable=True),
+        sa.Column('status', PAYMENT_STATUS, nullable=False),
+        sa.Column('failure_reason', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['job_id'], ['bulk_transfer_jobs.id'], ),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+        sa.PrimaryKeyConstraint('job_id', 'row_number')
+    )
+    op.create_index('idx_bulk_transfer_items_job_status', 'bulk_transfer_items', ['job_id', 'status', 'row_number'])
+
+def downgrade():
+    op.drop_index('idx_bulk_transfer_items_job_status')
+    op.drop_table('bulk_transfer_items')
+    op.drop_table('bulk_transfer_jobs')
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""Add billers, biller settlements and the unsettled bill payment index
+
+Revision ID: 014_add_biller_settlement
+Revises: 013_add_bulk_transfers
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision = '014_add_biller_settlement'
+down_revision = '013_add_bulk_transfers'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('billers',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('biller_code', sa.String(length=20), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('settlement_account_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('payout_account_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['settlement_account_id'], ['accounts.id'], ),
+        sa.ForeignKeyConstraint(['payout_account_id'], ['accounts.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('biller_code')
+    )
+    
+    op.create_table('biller_settlements',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('biller_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('payment_count', sa.Integer(), nullable=False),
+        sa.Column('transaction_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('settled_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['biller_id'], ['billers.id'], ),
+        sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    
+    op.add_column('bill_payments', sa.Column('settlement_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        'bill_payments_settlement_id_fkey', 'bill_payments', 'biller_settlements', ['settlement_id'], ['id']
+    )
+    op.create_index(
+        'idx_bill_payments_unsettled', 'bill_payments', ['biller_code'],
+        postgresql_where=sa.text("status = 'COMPLETED' AND settlement_id IS NULL")
+    )
+
+def downgrade():
+    op.drop_index('idx_bill_payments_unsettled')
+    op.drop_constraint('bill_payments_settlement_id_fkey', 'bill_payments', type_='foreignkey')
+    op.drop_column('bill_payments', 'settlement_id')
+    op.drop_table('biller_settlements')
+    op.drop_table('billers')
\ No newline at end of file
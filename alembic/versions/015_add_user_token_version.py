@@ -0,0 +1,21 @@
+"""Add user token version for revoking outstanding access tokens
+
+Revision ID: 015_add_user_token_version
+Revises: 014_add_biller_settlement
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '015_add_user_token_version'
+down_revision = '014_add_biller_settlement'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+def downgrade():
+    op.drop_column('users', 'token_version')
\ No newline at end of file
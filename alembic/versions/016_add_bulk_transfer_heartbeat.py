@@ -0,0 +1,21 @@
+"""Add bulk transfer heartbeat for resuming stalled jobs
+
+Revision ID: 016_add_bulk_transfer_heartbeat
+Revises: 015_add_user_token_version
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '016_add_bulk_transfer_heartbeat'
+down_revision = '015_add_user_token_version'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('bulk_transfer_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+
+def downgrade():
+    op.drop_column('bulk_transfer_jobs', 'heartbeat_at')
\ No newline at end of file
@@ -0,0 +1,27 @@
+"""Add interest accrual runs so days that accrued nothing still count as done
+
+Revision ID: 017_add_interest_accrual_runs
+Revises: 016_add_bulk_transfer_heartbeat
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '017_add_interest_accrual_runs'
+down_revision = '016_add_bulk_transfer_heartbeat'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('interest_accrual_runs',
+        sa.Column('range_start', sa.String(length=36), nullable=False),
+        sa.Column('range_end', sa.String(length=36), nullable=False),
+        sa.Column('accrual_date', sa.Date(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('range_start', 'range_end', 'accrual_date')
+    )
+
+def downgrade():
+    op.drop_table('interest_accrual_runs')
\ No newline at end of file
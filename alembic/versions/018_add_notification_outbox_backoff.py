@@ -0,0 +1,21 @@
+"""Add notification outbox retry backoff
+
+Revision ID: 018_add_notification_outbox_backoff
+Revises: 017_add_interest_accrual_runs
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '018_add_notification_outbox_backoff'
+down_revision = '017_add_interest_accrual_runs'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('notification_outbox', sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True))
+
+def downgrade():
+    op.drop_column('notification_outbox', 'next_attempt_at')
\ No newline at end of file
@@ -1,34 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from app.database import get_async_db, get_read_db, get_async_read_db
 from app.schemas.account import AccountCreate, AccountResponse, BalanceResponse
-from app.services.account import AccountService
+from app.services.account import AccountService, AsyncAccountService
+from app.services.statement import StatementService
 
 router = APIRouter()
 
 @router.post("/", response_model=AccountResponse, summary="Create Account", description="Create a new bank account for a customer")
-async def create_account(account: AccountCreate, db: Session = Depends(get_db)):
-    service = AccountService(db)
-    return service.create_account(account)
+async def create_account(account: AccountCreate, db: AsyncSession = Depends(get_async_db)):
+    service = AsyncAccountService(db)
+    return await service.create_account(account)
 
 @router.get("/{account_id}", response_model=AccountResponse, summary="Get Account", description="Retrieve account details by ID")
-async def get_account(account_id: str, db: Session = Depends(get_db)):
-    service = AccountService(db)
-    account = service.get_account(account_id)
+async def get_account(account_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    service = AsyncAccountService(db)
+    account = await service.get_account(account_id)
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     return account
 
 @router.get("/{account_id}/balance", response_model=BalanceResponse, summary="Get Balance", description="Get current account balance")
-async def get_balance(account_id: str, db: Session = Depends(get_db)):
-    service = AccountService(db)
-    balance = service.get_balance(account_id)
+async def get_balance(account_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    service = AsyncAccountService(db)
+    balance = await service.get_balance(account_id)
     if not balance:
         raise HTTPException(status_code=404, detail="Balance not found")
     return balance
 
 @router.get("/customer/{customer_id}", response_model=List[AccountResponse], summary="Get Customer Accounts", description="Get all accounts for a specific customer")
-async def get_customer_accounts(customer_id: str, db: Session = Depends(get_db)):
-    service = AccountService(db)
-    return service.get_customer_accounts(customer_id)
\ No newline at end of file
+async def get_customer_accounts(customer_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    service = AsyncAccountService(db)
+    return await service.get_customer_accounts(customer_id)
+
+# Sync on purpose: statements stream from a server-side cursor, run in the threadpool
+@router.get("/{account_id}/statement", summary="Account Statement", description="Stream an account statement with opening, running and closing balances as JSON lines or CSV")
+def get_statement(
+    account_id: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    format: str = Query("jsonl", pattern="^(jsonl|csv)$"),
+    db: Session = Depends(get_read_db)
+):
+    if not AccountService(db).get_account(account_id):
+        raise HTTPException(status_code=404, detail="Account not found")
+    
+    # Naive bounds are UTC, so they compare with aware ones
+    end_date = end_date or datetime.now(timezone.utc)
+    if end_date.tzinfo is None:
+        end_date = end_date.replace(tzinfo=timezone.utc)
+    start_date = start_date or end_date - timedelta(days=30)
+    if start_date.tzinfo is None:
+        start_date = start_date.replace(tzinfo=timezone.utc)
+    if start_date >= end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    
+    service = StatementService(db)
+    if format == "csv":
+        return StreamingResponse(
+            service.stream_csv(account_id, start_date, end_date),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename=statement-{account_id}.csv"}
+        )
+    return StreamingResponse(
+        service.stream_jsonl(account_id, start_date, end_date),
+        media_type="application/x-ndjson"
+    )
@@ -6,10 +6,12 @@ from app.models.user import User, UserRole, UserStatus
 from app.schemas.user import Token, UserCreate, UserResponse, PasswordChange, PasswordReset
 from app.services.auth import (
     authenticate_user, create_access_token, create_user, 
-    change_password, reset_password, get_user_by_username
+    change_password, reset_password, get_user_by_username, set_user_status, principal_claims
 )
 from app.core.auth import get_current_user, get_current_active_user, require_role
-from datetime import timedelta
+from app.services.jwt_blacklist import jwt_blacklist
+from jose import jwt
+from datetime import datetime, timedelta
 from app.core.config import settings
 from typing import List
 
@@ -27,7 +29,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
         )
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": user.username, "role": user.role.value}, expires_delta=access_token_expires
+        data=principal_claims(user), expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -45,8 +47,12 @@ async def register_user(
     return user
 
 @router.get("/me", response_model=UserResponse, summary="Current User", description="Get current user profile")
-async def get_current_user_profile(current_user: User = Depends(get_current_active_user)):
-    return current_user
+async def get_current_user_profile(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    # The principal only carries what the token does; the profile needs the full row
+    return get_user_by_username(db, current_user.username)
 
 @router.put("/change-password", summary="Change Password", description="Change current user password")
 async def change_user_password(
@@ -85,15 +91,14 @@ async def update_user_status(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role([UserRole.ADMIN]))
 ):
-    user = get_user_by_username(db, username)
-    if not user:
+    if not set_user_status(db, username, status):
         raise HTTPException(status_code=404, detail="User not found")
-    
-    user.status = status
-    db.commit()
     return {"message": f"User status updated to {status.value}"}
 
 @router.delete("/logout", summary="Logout", description="Logout current user")
-async def logout(current_user: User = Depends(get_current_user)):
-    # In a real implementation, you might want to blacklist the token
+async def logout(token: str = Depends(oauth2_scheme), current_user: User = Depends(get_current_user)):
+    payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+    # Tokens issued before jti was added can't be revoked one by one; they expire on their own
+    if payload.get("jti"):
+        await jwt_blacklist.blacklist_token(payload["jti"], datetime.utcfromtimestamp(payload["exp"]))
     return {"message": "Successfully logged out"}
\ No newline at end of file
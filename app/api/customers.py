@@ -1,44 +1,44 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import get_db
+from app.database import get_async_db, get_async_read_db
 from app.schemas.customer import CustomerCreate, CustomerResponse, CustomerOnboarding, KYCStatusUpdate
-from app.services.customer import CustomerService
+from app.services.customer import AsyncCustomerService
 
 router = APIRouter()
 
 @router.post("/", response_model=CustomerResponse, summary="Create Customer", description="Register a new customer with KYC information")
-async def create_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
-    service = CustomerService(db)
-    return service.create_customer(customer)
+async def create_customer(customer: CustomerCreate, db: AsyncSession = Depends(get_async_db)):
+    service = AsyncCustomerService(db)
+    return await service.create_customer(customer)
 
 @router.post("/onboard", response_model=CustomerResponse, summary="Onboard Customer", description="Enhanced customer onboarding with additional information")
-async def onboard_customer(customer: CustomerOnboarding, db: Session = Depends(get_db)):
-    service = CustomerService(db)
-    return service.onboard_customer(customer)
+async def onboard_customer(customer: CustomerOnboarding, db: AsyncSession = Depends(get_async_db)):
+    service = AsyncCustomerService(db)
+    return await service.onboard_customer(customer)
 
 @router.get("/{customer_id}", response_model=CustomerResponse, summary="Get Customer", description="Retrieve customer details by ID")
-async def get_customer(customer_id: str, db: Session = Depends(get_db)):
-    service = CustomerService(db)
-    customer = service.get_customer(customer_id)
+async def get_customer(customer_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    service = AsyncCustomerService(db)
+    customer = await service.get_customer(customer_id)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
     return customer
 
 @router.get("/", response_model=List[CustomerResponse], summary="List Customers", description="Get paginated list of all customers")
-async def list_customers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    service = CustomerService(db)
-    return service.list_customers(skip=skip, limit=limit)
+async def list_customers(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_read_db)):
+    service = AsyncCustomerService(db)
+    return await service.list_customers(skip=skip, limit=limit)
 
 @router.put("/{customer_id}/kyc-status", response_model=CustomerResponse, summary="Update KYC Status", description="Update customer KYC verification status")
-async def update_kyc_status(customer_id: str, status_update: KYCStatusUpdate, db: Session = Depends(get_db)):
-    service = CustomerService(db)
-    customer = service.update_kyc_status(customer_id, status_update)
+async def update_kyc_status(customer_id: str, status_update: KYCStatusUpdate, db: AsyncSession = Depends(get_async_db)):
+    service = AsyncCustomerService(db)
+    customer = await service.update_kyc_status(customer_id, status_update)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
     return customer
 
 @router.get("/pending-kyc", response_model=List[CustomerResponse], summary="Pending KYC Customers", description="Get customers with pending KYC verification")
-async def get_pending_kyc_customers(db: Session = Depends(get_db)):
-    service = CustomerService(db)
-    return service.get_pending_kyc_customers()
\ No newline at end of file
+async def get_pending_kyc_customers(db: AsyncSession = Depends(get_async_read_db)):
+    service = AsyncCustomerService(db)
+    return await service.get_pending_kyc_customers()
\ No newline at end of file
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends
+from app.core.auth import require_role
+from app.core.config import settings
+from app.core.pool_metrics import pool_status
+from app.core.redis_client import redis_breaker
+from app.database import engine, async_engine, read_engine, async_read_engine
+from app.models.user import User, UserRole
+import os
+
+router = APIRouter()
+
+@router.get("/metrics/db-pool", summary="Connection Pool Metrics", description="Pool occupancy and checkout wait times for this worker process's sync and async engines")
+def get_pool_metrics(current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.AUDITOR]))):
+    pools = {
+        "sync": pool_status("sync", engine.pool),
+        "async": pool_status("async", async_engine.pool)
+    }
+    if read_engine is not engine:
+        pools["replica"] = pool_status("replica", read_engine.pool)
+        pools["async-replica"] = pool_status("async-replica", async_read_engine.pool)
+    return {
+        # Each uvicorn or Celery worker has its own pools; scrape every process
+        "pid": os.getpid(),
+        "config": {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_recycle": settings.db_pool_recycle,
+            "pool_pre_ping": settings.db_pool_pre_ping,
+            "pgbouncer": settings.db_pgbouncer,
+            "pgbouncer_null_pool": settings.db_pgbouncer_null_pool
+        },
+        "pools": pools
+    }
+
+@router.get("/metrics/redis", summary="Redis Circuit Breaker", description="Whether this worker process is using Redis or its local fallbacks")
+def get_redis_metrics(current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.AUDITOR]))):
+    return {
+        "pid": os.getpid(),
+        "config": {
+            "max_connections": settings.redis_max_connections,
+            "socket_timeout": settings.redis_socket_timeout,
+            "connect_timeout": settings.redis_connect_timeout,
+            "health_check_interval": settings.redis_health_check_interval,
+            "breaker_threshold": settings.redis_breaker_threshold
+        },
+        "breaker": redis_breaker.status()
+    }
\ No newline at end of file
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import List
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.kyc import KYCDocumentCreate, KYCDocumentResponse, KYCVerification
 from app.services.kyc import KYCService
 from app.models.kyc import DocumentType
@@ -51,7 +51,7 @@ async def upload_kyc_document(
     return service.upload_document(document_data, file_path)
 
 @router.get("/customers/{customer_id}/documents", response_model=List[KYCDocumentResponse], summary="Get Customer Documents", description="Retrieve all KYC documents for a customer")
-async def get_customer_documents(customer_id: str, db: Session = Depends(get_db)):
+async def get_customer_documents(customer_id: str, db: Session = Depends(get_read_db)):
     service = KYCService(db)
     return service.get_customer_documents(customer_id)
 
@@ -73,14 +73,14 @@ async def verify_document(
     return document
 
 @router.get("/customers/{customer_id}/status", summary="Check KYC Status", description="Check customer KYC completion status")
-async def check_kyc_status(customer_id: str, db: Session = Depends(get_db)):
+async def check_kyc_status(customer_id: str, db: Session = Depends(get_read_db)):
     from app.services.kyc_workflow import KYCWorkflowService
     workflow_service = KYCWorkflowService(db)
     return workflow_service.check_kyc_completeness(customer_id)
 
 @router.get("/dashboard/statistics", summary="KYC Statistics", description="Get KYC processing statistics for dashboard")
 async def get_kyc_statistics(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_active_user)
 ):
     if current_user.role not in ["ADMIN", "AUDITOR"]:
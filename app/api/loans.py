@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user import User, UserRole
 from app.models.loan import Loan, LoanStatus
-from app.schemas.loan import LoanApplicationCreate, LoanResponse, LoanApproval, LoanPaymentCreate, LoanPaymentResponse
+from app.schemas.loan import (
+    LoanApplicationCreate, LoanResponse, LoanApproval, LoanPaymentCreate, LoanPaymentResponse, LoanPaymentPage,
+    LoanScheduleResponse, PortfolioScheduleRequest, PortfolioScheduleResponse, AgingBucketSummary
+)
 from app.services.loan import LoanService
+from app.services.delinquency import DelinquencyService
+from app.core.money import ZERO
 from app.core.auth import get_current_active_user, require_role
-from typing import List
+from datetime import date
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -26,21 +32,38 @@ async def list_loan_applications(
     status: LoanStatus = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(require_role([UserRole.TELLER, UserRole.ADMIN, UserRole.AUDITOR]))
 ):
     """Get list of loan applications"""
-    query = db.query(Loan)
-    if status:
-        query = query.filter(Loan.status == status)
-    
-    loans = query.offset(skip).limit(limit).all()
-    return loans
+    service = LoanService(db)
+    return service.list_loans(status, skip, limit)
+
+# Sync on purpose: amortizing the whole book is CPU-bound, run it in the threadpool
+@router.post("/portfolio/schedule", response_model=PortfolioScheduleResponse, summary="Project Portfolio Cash Flows")
+def project_portfolio_schedule(
+    request: PortfolioScheduleRequest,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.AUDITOR]))
+):
+    """Aggregate the amortization schedules of every matching loan by due month, optionally under a rate shock"""
+    service = LoanService(db)
+    return service.portfolio_cash_flows(request.status, request.rate_shift)
+
+@router.get("/portfolio/aging", response_model=List[AgingBucketSummary], summary="Get Portfolio Aging")
+async def get_portfolio_aging(
+    as_of: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.AUDITOR]))
+):
+    """Loan count, outstanding balance and arrears per aging bucket from the latest delinquency run"""
+    service = DelinquencyService(db)
+    return service.get_aging_summary(as_of)
 
 @router.get("/{loan_id}", response_model=LoanResponse, summary="Get Loan Details")
 async def get_loan(
     loan_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get loan details by ID"""
@@ -93,24 +116,49 @@ async def make_loan_payment(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/{loan_id}/payments", response_model=List[LoanPaymentResponse], summary="Get Loan Payments")
+@router.get("/{loan_id}/schedule", response_model=LoanScheduleResponse, summary="Get Amortization Schedule")
+async def get_loan_schedule(
+    loan_id: str,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the full installment table for a loan"""
+    service = LoanService(db)
+    try:
+        installments = service.get_schedule(loan_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return LoanScheduleResponse(
+        loan_id=loan_id,
+        monthly_payment=installments[0].payment if installments else ZERO,
+        total_interest=sum((installment.interest for installment in installments), ZERO),
+        installments=installments
+    )
+
+@router.get("/{loan_id}/payments", response_model=LoanPaymentPage, summary="Get Loan Payments")
 async def get_loan_payments(
     loan_id: str,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get payment history for a loan"""
-    loan = db.query(Loan).filter(Loan.id == loan_id).first()
-    if not loan:
+    """Get payment history for a loan, newest first. Pass `next_cursor` as `cursor` to continue"""
+    if not db.query(Loan.id).filter(Loan.id == loan_id).first():
         raise HTTPException(status_code=404, detail="Loan not found")
-    return loan.payments
+    service = LoanService(db)
+    try:
+        payments, next_cursor = service.get_loan_payments(loan_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"payments": payments, "next_cursor": next_cursor}
 
 @router.get("/customer/{customer_id}", response_model=List[LoanResponse], summary="Get Customer Loans")
 async def get_customer_loans(
     customer_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get all loans for a specific customer"""
-    loans = db.query(Loan).filter(Loan.customer_id == customer_id).all()
-    return loans
\ No newline at end of file
+    service = LoanService(db)
+    return service.get_customer_loans(customer_id)
\ No newline at end of file
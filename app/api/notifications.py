@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user import User, UserRole
 from app.schemas.notification import NotificationCreate, NotificationResponse, NotificationTemplateCreate, NotificationTemplateResponse
 from app.services.notification import NotificationService
@@ -23,7 +23,7 @@ async def create_notification(
 async def get_customer_notifications(
     customer_id: str,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get notifications for a customer"""
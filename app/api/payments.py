@@ -1,20 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form, status
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.core.config import settings
 from app.models.user import User, UserRole
 from app.models.payment import BillPayment, StandingOrder, PaymentStatus
 from app.core.auth import get_current_active_user, require_role
-from pydantic import BaseModel
+from app.services.schedule import FREQUENCIES, next_execution_date, preview_execution_dates
+from app.services.bulk_transfer import BulkTransferService, BULK_FILE_FORMATS
+from app.services.bill_payment import BillPaymentService
+from pydantic import BaseModel, validator
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
+import os
+import aiofiles
 
 router = APIRouter()
 
 class BillPaymentCreate(BaseModel):
     account_id: str
     biller_code: str
-    biller_name: str
+    biller_name: Optional[str] = None
     bill_account_number: str
     amount: Decimal
     currency: str = "USD"
@@ -27,6 +33,44 @@ class BillPaymentResponse(BaseModel):
     status: PaymentStatus
     payment_date: datetime
     
+    @validator('id', pre=True)
+    def stringify_id(cls, v):
+        return str(v)
+    
+    class Config:
+        from_attributes = True
+
+class BillerCreate(BaseModel):
+    biller_code: str
+    name: str
+    settlement_account_id: str
+    payout_account_id: str
+
+class BillerResponse(BaseModel):
+    id: str
+    biller_code: str
+    name: str
+    settlement_account_id: str
+    payout_account_id: str
+    is_active: bool
+    
+    @validator('id', 'settlement_account_id', 'payout_account_id', pre=True)
+    def stringify_id(cls, v):
+        return str(v)
+    
+    class Config:
+        from_attributes = True
+
+class BillerSettlementResponse(BaseModel):
+    id: str
+    amount: Decimal
+    payment_count: int
+    settled_at: datetime
+    
+    @validator('id', pre=True)
+    def stringify_id(cls, v):
+        return str(v)
+    
     class Config:
         from_attributes = True
 
@@ -39,6 +83,17 @@ class StandingOrderCreate(BaseModel):
     start_date: datetime
     end_date: Optional[datetime] = None
     description: Optional[str] = None
+    
+    @validator('frequency')
+    def validate_frequency(cls, v):
+        v = v.upper()
+        if v not in FREQUENCIES:
+            raise ValueError(f"Frequency must be one of {', '.join(FREQUENCIES)}")
+        return v
+    
+    @validator('start_date', 'end_date')
+    def assume_utc(cls, v):
+        return v.replace(tzinfo=timezone.utc) if v and v.tzinfo is None else v
 
 class StandingOrderResponse(BaseModel):
     id: str
@@ -48,9 +103,53 @@ class StandingOrderResponse(BaseModel):
     next_execution_date: datetime
     is_active: bool
     
+    @validator('id', pre=True)
+    def stringify_id(cls, v):
+        return str(v)
+    
+    class Config:
+        from_attributes = True
+
+class StandingOrderSchedule(BaseModel):
+    order_id: str
+    execution_dates: List[datetime]
+
+class BulkTransferJobResponse(BaseModel):
+    id: str
+    job_reference: str
+    file_name: Optional[str] = None
+    status: PaymentStatus
+    total_rows: int
+    valid_rows: int
+    rejected_rows: int
+    credited_rows: int
+    total_amount: Decimal
+    credited_amount: Decimal
+    failure_reason: Optional[str] = None
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    
+    @validator('id', pre=True)
+    def stringify_id(cls, v):
+        return str(v)
+    
+    class Config:
+        from_attributes = True
+
+class BulkTransferItemResponse(BaseModel):
+    row_number: int
+    account_number: Optional[str] = None
+    amount: Optional[Decimal] = None
+    reference: Optional[str] = None
+    status: PaymentStatus
+    failure_reason: Optional[str] = None
+    
     class Config:
         from_attributes = True
 
+# Upload bytes read per await, so a payroll file never sits in memory whole
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 @router.post("/bills", response_model=BillPaymentResponse, summary="Pay Bill")
 async def pay_bill(
     payment: BillPaymentCreate,
@@ -58,30 +157,21 @@ async def pay_bill(
     current_user: User = Depends(require_role([UserRole.TELLER, UserRole.ADMIN]))
 ):
     """Process a bill payment"""
-    import uuid
-    
-    bill_payment = BillPayment(
-        payment_reference=f"BILL{str(uuid.uuid4().int)[:10]}",
-        account_id=payment.account_id,
-        biller_code=payment.biller_code,
-        biller_name=payment.biller_name,
-        bill_account_number=payment.bill_account_number,
-        amount=payment.amount,
-        currency=payment.currency,
-        status=PaymentStatus.COMPLETED
-    )
-    
-    db.add(bill_payment)
-    db.commit()
-    db.refresh(bill_payment)
-    return bill_payment
+    service = BillPaymentService(db)
+    try:
+        return service.pay_bill(
+            payment.account_id, payment.biller_code, payment.bill_account_number,
+            payment.amount, payment.currency, payment.biller_name
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/bills", response_model=List[BillPaymentResponse], summary="List Bill Payments")
 async def list_bill_payments(
     account_id: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get list of bill payments"""
@@ -92,6 +182,42 @@ async def list_bill_payments(
     payments = query.offset(skip).limit(limit).all()
     return payments
 
+@router.post("/billers", response_model=BillerResponse, summary="Register Biller")
+async def create_biller(
+    biller: BillerCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN]))
+):
+    """Register a biller with its settlement and payout accounts"""
+    service = BillPaymentService(db)
+    try:
+        return service.create_biller(
+            biller.biller_code, biller.name, biller.settlement_account_id, biller.payout_account_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/billers", response_model=List[BillerResponse], summary="List Billers")
+async def list_billers(
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get list of registered billers"""
+    return BillPaymentService(db).list_billers(skip, limit)
+
+@router.get("/billers/{biller_code}/settlements", response_model=List[BillerSettlementResponse], summary="List Biller Settlements")
+async def list_biller_settlements(
+    biller_code: str,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(require_role([UserRole.TELLER, UserRole.ADMIN]))
+):
+    """Get the aggregated settlement transfers made to a biller, newest first"""
+    return BillPaymentService(db).get_settlements(biller_code, skip, limit)
+
 @router.post("/standing-orders", response_model=StandingOrderResponse, summary="Create Standing Order")
 async def create_standing_order(
     order: StandingOrderCreate,
@@ -101,6 +227,13 @@ async def create_standing_order(
     """Create a new standing order"""
     import uuid
     
+    # The first execution is the start date rolled onto a business day
+    first_execution = next_execution_date(
+        order.start_date, order.frequency, order.end_date, after=order.start_date - timedelta(microseconds=1)
+    )
+    if first_execution is None:
+        raise HTTPException(status_code=400, detail="Standing order has no execution date before its end date")
+    
     standing_order = StandingOrder(
         order_reference=f"SO{str(uuid.uuid4().int)[:10]}",
         from_account_id=order.from_account_id,
@@ -110,7 +243,7 @@ async def create_standing_order(
         frequency=order.frequency,
         start_date=order.start_date,
         end_date=order.end_date,
-        next_execution_date=order.start_date,
+        next_execution_date=first_execution,
         description=order.description
     )
     
@@ -125,7 +258,7 @@ async def list_standing_orders(
     is_active: Optional[bool] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get list of standing orders"""
@@ -138,6 +271,25 @@ async def list_standing_orders(
     orders = query.offset(skip).limit(limit).all()
     return orders
 
+@router.get("/standing-orders/{order_id}/schedule", response_model=StandingOrderSchedule, summary="Preview Standing Order Schedule")
+async def preview_standing_order_schedule(
+    order_id: str,
+    count: int = Query(12, ge=1, le=120),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """List the next execution dates of a standing order"""
+    order = db.query(StandingOrder).filter(StandingOrder.id == order_id).first()
+    if not order:
+        raise HTTPException(status_code=404, detail="Standing order not found")
+    
+    dates = []
+    if order.is_active and order.frequency in FREQUENCIES:
+        dates = preview_execution_dates(
+            order.start_date, order.frequency, order.end_date, order.next_execution_date, count
+        )
+    return StandingOrderSchedule(order_id=str(order.id), execution_dates=dates)
+
 @router.put("/standing-orders/{order_id}/cancel", summary="Cancel Standing Order")
 async def cancel_standing_order(
     order_id: str,
@@ -151,4 +303,67 @@ async def cancel_standing_order(
     
     order.is_active = False
     db.commit()
-    return {"message": "Standing order cancelled successfully"}
\ No newline at end of file
+    return {"message": "Standing order cancelled successfully"}
+
+@router.post("/bulk-transfers", response_model=BulkTransferJobResponse, status_code=status.HTTP_202_ACCEPTED, summary="Upload Bulk Transfer File")
+async def upload_bulk_transfer(
+    from_account_id: str = Form(...),
+    description: Optional[str] = Form(None),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.TELLER, UserRole.ADMIN]))
+):
+    """Upload a CSV or JSON-lines payroll file; rows are validated and posted in the background"""
+    import uuid
+    from app.services.scheduler import process_bulk_transfer
+    
+    extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+    file_format = BULK_FILE_FORMATS.get(extension)
+    if not file_format:
+        raise HTTPException(status_code=400, detail="File must be .csv, .jsonl or .ndjson")
+    
+    os.makedirs(settings.bulk_transfer_upload_dir, exist_ok=True)
+    # Absolute, so the worker opens the same file whatever its working directory
+    file_path = os.path.abspath(os.path.join(settings.bulk_transfer_upload_dir, f"{uuid.uuid4()}.{extension}"))
+    async with aiofiles.open(file_path, "wb") as buffer:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await buffer.write(chunk)
+    
+    service = BulkTransferService(db)
+    try:
+        job = service.create_job(
+            from_account_id, file.filename, file_format, file_path, description, created_by=current_user.id
+        )
+    except ValueError as e:
+        os.remove(file_path)
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    process_bulk_transfer.delay(str(job.id))
+    return job
+
+@router.get("/bulk-transfers/{job_id}", response_model=BulkTransferJobResponse, summary="Get Bulk Transfer Status")
+async def get_bulk_transfer(
+    job_id: str,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get progress and totals of a bulk transfer job"""
+    job = BulkTransferService(db).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Bulk transfer not found")
+    return job
+
+@router.get("/bulk-transfers/{job_id}/items", response_model=List[BulkTransferItemResponse], summary="List Bulk Transfer Rows")
+async def list_bulk_transfer_items(
+    job_id: str,
+    item_status: Optional[PaymentStatus] = Query(None, alias="status"),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """List the rows of a bulk transfer; filter on FAILED for the rejection report"""
+    service = BulkTransferService(db)
+    if not service.get_job(job_id):
+        raise HTTPException(status_code=404, detail="Bulk transfer not found")
+    return service.get_items(job_id, item_status, skip, limit)
\ No newline at end of file
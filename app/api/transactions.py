@@ -1,34 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.schemas.transaction import TransactionCreate, TransactionResponse
-from app.services.transaction import TransactionService
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+from app.database import get_async_db, get_async_read_db
+from app.schemas.transaction import TransactionCreate, TransactionResponse, TransactionPage, TransactionBatchProcess, TransactionBatchResult
+from app.services.transaction import AsyncTransactionService
 
 router = APIRouter()
 
 @router.post("/", response_model=TransactionResponse, summary="Create Transaction", description="Create a new banking transaction (deposit, withdrawal, transfer)")
-async def create_transaction(transaction: TransactionCreate, db: Session = Depends(get_db)):
-    service = TransactionService(db)
-    return service.create_transaction(transaction)
+async def create_transaction(transaction: TransactionCreate, db: AsyncSession = Depends(get_async_db)):
+    service = AsyncTransactionService(db)
+    return await service.create_transaction(transaction)
+
+@router.post("/process-batch", response_model=List[TransactionBatchResult], summary="Process Transactions in Batch", description="Process many pending transactions at once, committing in chunks and returning a result per transaction")
+async def process_transactions_batch(batch: TransactionBatchProcess, db: AsyncSession = Depends(get_async_db)):
+    if batch.chunk_size is not None and batch.chunk_size < 1:
+        raise HTTPException(status_code=400, detail="chunk_size must be positive")
+    service = AsyncTransactionService(db)
+    return await service.process_many(batch.transaction_ids, chunk_size=batch.chunk_size)
 
 @router.get("/{transaction_id}", response_model=TransactionResponse, summary="Get Transaction", description="Retrieve transaction details by ID")
-async def get_transaction(transaction_id: str, db: Session = Depends(get_db)):
-    service = TransactionService(db)
-    transaction = service.get_transaction(transaction_id)
+async def get_transaction(transaction_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    service = AsyncTransactionService(db)
+    transaction = await service.get_transaction(transaction_id)
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return transaction
 
-@router.get("/account/{account_id}", response_model=List[TransactionResponse], summary="Get Account Transactions", description="Get paginated transaction history for an account")
-async def get_account_transactions(account_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    service = TransactionService(db)
-    return service.get_account_transactions(account_id, skip=skip, limit=limit)
+@router.get("/account/{account_id}", response_model=TransactionPage, summary="Get Account Transactions", description="Get transaction history for an account, newest first. Pass `next_cursor` from the previous page as `cursor` to continue")
+async def get_account_transactions(
+    account_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    service = AsyncTransactionService(db)
+    try:
+        transactions, next_cursor = await service.get_account_transactions(
+            account_id, limit=limit, cursor=cursor, start_date=start_date, end_date=end_date
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"transactions": transactions, "next_cursor": next_cursor}
 
 @router.post("/{transaction_id}/process", summary="Process Transaction", description="Process a pending transaction using double-entry accounting")
-async def process_transaction(transaction_id: str, db: Session = Depends(get_db)):
-    service = TransactionService(db)
-    result = service.process_transaction(transaction_id)
+async def process_transaction(transaction_id: str, db: AsyncSession = Depends(get_async_db)):
+    service = AsyncTransactionService(db)
+    result = await service.process_transaction(transaction_id)
     if not result:
         raise HTTPException(status_code=400, detail="Transaction processing failed")
     return {"message": "Transaction processed successfully"}
\ No newline at end of file
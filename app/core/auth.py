@@ -5,7 +5,12 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User, UserRole, UserStatus
 from app.core.config import settings
+from app.core.principal_cache import principal_cache
+from app.core.token_versions import token_versions
+from app.services.jwt_blacklist import jwt_blacklist
 from typing import List, Callable
+import time
+import uuid
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
@@ -23,11 +28,45 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
     
+    jti = payload.get("jti")
+    if jti is not None and await jwt_blacklist.is_blacklisted(jti):
+        raise credentials_exception
+    
+    version = payload.get("ver")
+    if version is not None:
+        # Role and status are taken from the token; a bumped token_version is what revokes it
+        if token_versions.current(db, username) != version:
+            raise credentials_exception
+        try:
+            return _principal_from_claims(payload)
+        except (KeyError, ValueError):
+            raise credentials_exception
+    
+    # Tokens issued without claims need the user row; jti-less ones are told apart by their expiry
+    token_id = str(payload.get("jti") or payload.get("exp"))
+    if principal_cache.enabled:
+        user = principal_cache.get(username, token_id)
+        if user is not None:
+            return user
+    
+    loaded_at = time.monotonic()
+    generation = principal_cache.generation(username) if principal_cache.enabled else None
     user = db.query(User).filter(User.username == username).first()
     if user is None:
         raise credentials_exception
+    if principal_cache.enabled:
+        principal_cache.put(user, token_id, loaded_at, generation)
     return user
 
+def _principal_from_claims(payload: dict) -> User:
+    return User(
+        id=uuid.UUID(payload["uid"]),
+        username=payload["sub"],
+        role=UserRole(payload["role"]),
+        status=UserStatus(payload["status"]),
+        token_version=payload["ver"]
+    )
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if current_user.status != UserStatus.ACTIVE:
         raise HTTPException(status_code=400, detail="Inactive user")
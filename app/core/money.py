@@ -0,0 +1,34 @@
+"""
+Money arithmetic shared by every ledger posting path
+"""
+
+from decimal import Decimal, Context, ROUND_HALF_EVEN
+from typing import Union
+
+# Matches the DECIMAL(15, 2) ledger columns
+MONEY_QUANTUM = Decimal("0.01")
+
+# 28 significant digits leaves ample headroom over 15 before quantizing
+MONEY_CONTEXT = Context(prec=28, rounding=ROUND_HALF_EVEN)
+
+ZERO = Decimal("0.00")
+
+MoneyLike = Union[Decimal, int, str]
+
+def to_money(value: MoneyLike) -> Decimal:
+    """Convert a value to a Decimal quantized to cents"""
+    if value is None:
+        return ZERO
+    if isinstance(value, float):
+        # Tolerate legacy float callers; go through repr so 0.1 stays 0.1
+        value = repr(value)
+    if not isinstance(value, Decimal):
+        value = Decimal(value)
+    return value.quantize(MONEY_QUANTUM, context=MONEY_CONTEXT)
+
+def add_money(*amounts: MoneyLike) -> Decimal:
+    """Sum amounts exactly and quantize the result to cents"""
+    total = ZERO
+    for amount in amounts:
+        total = MONEY_CONTEXT.add(total, to_money(amount))
+    return total
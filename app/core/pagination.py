@@ -0,0 +1,21 @@
+"""
+Opaque keyset cursors for newest-first listings ordered by (timestamp, id)
+"""
+
+from datetime import datetime
+from typing import Tuple
+import base64
+import json
+import uuid
+
+def encode_cursor(timestamp: datetime, row_id) -> str:
+    """Cursor pointing just past the row at (timestamp, row_id)"""
+    position = {"ts": timestamp.isoformat(), "id": str(row_id)}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(position["ts"]), uuid.UUID(position["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid pagination cursor")
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Connection pool instrumentation: checkout wait times and pool occupancy per engine
+"""
+
+from bisect import bisect_left
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from typing import Dict
+import threading
+import time
+
+# Upper bounds in seconds; a checkout slower than the last bucket lands in +Inf
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class PoolMetrics:
+    """Checkout counters for one pool, safe to update from any thread"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self._bucket_counts = [0] * (len(WAIT_BUCKETS) + 1)
+    
+    def observe(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self._bucket_counts[bisect_left(WAIT_BUCKETS, seconds)] += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+    
+    def histogram(self) -> Dict[str, int]:
+        """Cumulative counts per upper bound, Prometheus style"""
+        with self._lock:
+            counts = list(self._bucket_counts)
+        histogram, running = {}, 0
+        for bound, count in zip([*map(str, WAIT_BUCKETS), "+Inf"], counts):
+            running += count
+            histogram[bound] = running
+        return histogram
+
+# Keyed by the pool's logging name, which survives engine.dispose() recreating the pool
+_metrics: Dict[str, PoolMetrics] = {}
+_metrics_lock = threading.Lock()
+
+def metrics_for(name: str) -> PoolMetrics:
+    with _metrics_lock:
+        return _metrics.setdefault(name, PoolMetrics())
+
+class _TimedCheckout:
+    """Times Pool.connect(): queueing for a free slot, opening a connection and the pre-ping"""
+    
+    def connect(self):
+        metrics = metrics_for(getattr(self, "logging_name", None) or "default")
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            metrics.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        metrics.observe(time.perf_counter() - start)
+        return connection
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    pass
+
+def pool_status(name: str, pool) -> Dict:
+    """Occupancy of the engine's current pool plus the checkout counters recorded under name"""
+    metrics = metrics_for(name)
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            # Negative until the pool has opened pool_size connections
+            "overflow": pool.overflow(),
+            "timeout": pool.timeout()
+        })
+    status.update({
+        "checkouts": metrics.checkouts,
+        "timeouts": metrics.timeouts,
+        "wait_seconds": {
+            "buckets": metrics.histogram(),
+            "sum": round(metrics.wait_sum, 6),
+            "max": round(metrics.wait_max, 6),
+            "count": metrics.checkouts + metrics.timeouts
+        }
+    })
+    return status
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""
+Authenticated principals cached per (username, token id) so auth checks skip the users table
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from app.core.config import settings
+from app.core.redis_client import get_redis, get_subscriber_redis, redis_breaker
+from app.models.user import User, UserRole, UserStatus
+from typing import Dict, Optional, Set, Tuple
+import hashlib
+import json
+import threading
+import time
+import redis
+import uuid
+
+PRINCIPAL_KEY = "corex:principal:{}"
+PRINCIPAL_GENERATION_KEY = "corex:principal-generation:{}"
+PRINCIPAL_INVALIDATION_CHANNEL = "corex:principal:invalidate"
+
+# Bumped on every invalidation; kept long enough to outlive any lookup in flight when it was bumped
+PRINCIPAL_GENERATION_TTL = 86400
+
+# Shares a snapshot only if the user's generation is still the one read before the lookup,
+# so a worker that read the user before another worker's invalidation can't put it back
+PUT_IF_CURRENT_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+PUT_IF_CURRENT_SHA = hashlib.sha1(PUT_IF_CURRENT_SCRIPT.encode()).hexdigest()
+
+# Everything routes read from current_user; the password hash is never cached
+PRINCIPAL_FIELDS = ("id", "username", "email", "role", "status", "created_at")
+
+def _snapshot(user: User) -> Dict:
+    return {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+
+def _to_json(snapshot: Dict) -> str:
+    return json.dumps({
+        "id": str(snapshot["id"]),
+        "username": snapshot["username"],
+        "email": snapshot["email"],
+        "role": snapshot["role"].value,
+        "status": snapshot["status"].value if snapshot["status"] else None,
+        "created_at": snapshot["created_at"].isoformat() if snapshot["created_at"] else None
+    })
+
+def _from_json(value: str) -> Dict:
+    data = json.loads(value)
+    return {
+        "id": uuid.UUID(data["id"]),
+        "username": data["username"],
+        "email": data["email"],
+        "role": UserRole(data["role"]),
+        "status": UserStatus(data["status"]) if data["status"] else None,
+        "created_at": datetime.fromisoformat(data["created_at"]) if data["created_at"] else None
+    }
+
+class PrincipalCache:
+    """In-process TTL LRU of user snapshots with an optional shared Redis tier
+    
+    Hits hand back a fresh transient User, so no request can change another's
+    principal or attach it to a session.
+    """
+    
+    def __init__(self, ttl_seconds: int, max_size: int, use_redis: bool = False):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.use_redis = use_redis
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._keys_by_user: Dict[str, Set[Tuple[str, str]]] = {}
+        self._invalidated_at: Dict[str, float] = {}
+        self._listener: Optional[threading.Thread] = None
+        self._redis = get_redis() if use_redis else None
+    
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+    
+    def get(self, username: str, token_id: str) -> Optional[User]:
+        self._start_listener()
+        key = (username, token_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return User(**entry[1])
+                self._drop(key)
+        
+        if not self._redis_available():
+            return None
+        try:
+            value = self._redis.get(PRINCIPAL_KEY.format(username))
+        except redis.RedisError as e:
+            redis_breaker.failed(e)
+            return None
+        redis_breaker.succeeded()
+        if value is None:
+            return None
+        snapshot = _from_json(value)
+        self._store(key, snapshot)
+        return User(**snapshot)
+    
+    def generation(self, username: str) -> Optional[int]:
+        """Shared invalidation count of username, to read before loading the user for put"""
+        if not self._redis_available():
+            return None
+        try:
+            value = self._redis.get(PRINCIPAL_GENERATION_KEY.format(username))
+        except redis.RedisError as e:
+            redis_breaker.failed(e)
+            return None
+        redis_breaker.succeeded()
+        return int(value) if value is not None else 0
+    
+    def put(self, user: User, token_id: str, loaded_at: float, generation: Optional[int] = None):
+        """Cache user as read at loaded_at (time.monotonic()), unless it was invalidated since
+        
+        The Redis tier is only written with the generation read before the lookup.
+        """
+        snapshot = _snapshot(user)
+        with self._lock:
+            if self._invalidated_at.get(user.username, 0.0) >= loaded_at:
+                return
+        self._store((user.username, token_id), snapshot)
+        if generation is None or not self._redis_available():
+            return
+        keys = (PRINCIPAL_KEY.format(user.username), PRINCIPAL_GENERATION_KEY.format(user.username))
+        args = (generation, _to_json(snapshot), self.ttl_seconds)
+        try:
+            try:
+                self._redis.evalsha(PUT_IF_CURRENT_SHA, 2, *keys, *args)
+            except redis.exceptions.NoScriptError:
+                self._redis.eval(PUT_IF_CURRENT_SCRIPT, 2, *keys, *args)
+        except redis.RedisError as e:
+            redis_breaker.failed(e)
+    
+    def invalidate(self, username: str, broadcast: bool = True):
+        """Forget every cached token of username, on every worker when the Redis tier is on"""
+        now = time.monotonic()
+        with self._lock:
+            for key in list(self._keys_by_user.get(username, ())):
+                self._drop(key)
+            # A request that read the user before now must not cache what it read
+            self._invalidated_at[username] = now
+            if len(self._invalidated_at) > self.max_size:
+                self._invalidated_at = {
+                    name: at for name, at in self._invalidated_at.items() if now - at < 60
+                }
+        if broadcast and self._redis_available():
+            try:
+                pipe = self._redis.pipeline(transaction=False)
+                # Bumped before the delete, so a put racing it can't write the old snapshot back
+                pipe.incr(PRINCIPAL_GENERATION_KEY.format(username))
+                pipe.expire(PRINCIPAL_GENERATION_KEY.format(username), PRINCIPAL_GENERATION_TTL)
+                pipe.delete(PRINCIPAL_KEY.format(username))
+                pipe.publish(PRINCIPAL_INVALIDATION_CHANNEL, username)
+                pipe.execute()
+            except redis.RedisError as e:
+                # The TTL still bounds how long other workers can serve the old principal
+                redis_breaker.failed(e)
+                print(f"Failed to broadcast principal invalidation: {e}")
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._invalidated_at.clear()
+    
+    def _store(self, key: Tuple[str, str], snapshot: Dict):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+    
+    def _drop(self, key: Tuple[str, str]):
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+    
+    def _redis_available(self) -> bool:
+        # While the breaker is open, lookups fall back to the database
+        return self.use_redis and redis_breaker.available
+    
+    def _start_listener(self):
+        # A listener that died with its connection is started again once the breaker closes
+        if not self._redis_available():
+            return
+        if self._listener is None or not self._listener.is_alive():
+            with self._lock:
+                if self._listener is None or not self._listener.is_alive():
+                    self._listener = threading.Thread(target=self._listen, daemon=True)
+                    self._listener.start()
+    
+    def _listen(self):
+        try:
+            pubsub = get_subscriber_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(PRINCIPAL_INVALIDATION_CHANNEL)
+            # Subscribed first; whatever was invalidated while nobody listened is dropped here
+            with self._lock:
+                self._entries.clear()
+                self._keys_by_user.clear()
+            for message in pubsub.listen():
+                self.invalidate(message["data"], broadcast=False)
+        except redis.RedisError as e:
+            redis_breaker.failed(e)
+        except Exception as e:
+            print(f"Principal invalidation listener stopped: {e}")
+
+# Global instance
+principal_cache = PrincipalCache(
+    settings.principal_cache_ttl,
+    settings.principal_cache_size,
+    use_redis=settings.principal_cache_redis
+)
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""
+Rate limits per route and per role
+"""
+
+from typing import NamedTuple
+from app.core.config import settings
+from app.models.user import UserRole
+
+class RateLimit(NamedTuple):
+    requests: int
+    period_seconds: int
+
+class RateLimitConfig:
+    """Which limit applies to a request: a route limit, else the caller's role limit, else the default"""
+    
+    # Everyone without a role limit, including unauthenticated callers (limited per client address)
+    DEFAULT_LIMIT = RateLimit(settings.rate_limit_requests_per_minute, 60)
+    
+    # (method, path prefix); "*" matches any method and the longest matching prefix wins
+    ROUTE_LIMITS = {
+        ("POST", "/auth/token"): RateLimit(10, 60),
+        ("PUT", "/auth/change-password"): RateLimit(5, 300),
+        ("POST", "/auth/reset-password"): RateLimit(5, 300),
+        ("POST", "/transactions/process-batch"): RateLimit(10, 60)
+    }
+    
+    # Keyed by the role claim of the caller's token
+    ROLE_LIMITS = {
+        UserRole.ADMIN: RateLimit(600, 60),
+        UserRole.TELLER: RateLimit(300, 60),
+        UserRole.AUDITOR: RateLimit(300, 60),
+        UserRole.API_USER: RateLimit(1200, 60)
+    }
\ No newline at end of file
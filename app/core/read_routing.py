@@ -0,0 +1,119 @@
+"""
+Read-your-writes stickiness: who wrote recently, so their reads skip the replica
+"""
+
+from fastapi import Request
+from jose import JWTError, jwt
+from app.core.config import settings
+from app.core.redis_client import get_async_redis, get_redis, redis_breaker
+from typing import Dict, Optional
+import redis
+import threading
+import time
+
+RECENT_WRITE_KEY = "corex:recent-write:{}"
+
+# Methods that can change state; anything else is treated as a read
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+def token_claims(request: Request) -> Dict:
+    """Claims of a validly signed bearer token, or {}; revocation is left to get_current_user"""
+    authorization = request.headers.get("Authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            return jwt.decode(authorization[7:], settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+        except JWTError:
+            pass
+    return {}
+
+def request_principal(request: Request, claims: Optional[Dict] = None) -> str:
+    """The token's subject for authenticated callers, the client address for everyone else"""
+    claims = token_claims(request) if claims is None else claims
+    if claims.get("sub"):
+        return f"user:{claims['sub']}"
+    forwarded_for = request.headers.get("X-Forwarded-For")
+    if forwarded_for:
+        return f"ip:{forwarded_for.split(',')[0].strip()}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+class RecentWrites:
+    """Write timestamps per principal, in Redis so every worker agrees, with a local fallback"""
+    
+    def __init__(self, window_seconds: int):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._local: Dict[str, float] = {}
+        self._redis = get_redis()
+    
+    def record(self, principal: str):
+        if not self._remember(principal):
+            return
+        try:
+            self._redis.set(RECENT_WRITE_KEY.format(principal), 1, ex=self.window_seconds)
+        except redis.RedisError as e:
+            redis_breaker.failed(e)
+            print(f"Failed to record write for read-your-writes: {e}")
+    
+    async def record_async(self, principal: str):
+        """record for the event loop: the Redis write is awaited instead of blocking it"""
+        if not self._remember(principal):
+            return
+        try:
+            await get_async_redis().set(RECENT_WRITE_KEY.format(principal), 1, ex=self.window_seconds)
+        except redis.RedisError as e:
+            redis_breaker.failed(e)
+            print(f"Failed to record write for read-your-writes: {e}")
+    
+    def is_recent(self, principal: str) -> bool:
+        recent = self._recent_here(principal)
+        if recent is not None:
+            return recent
+        try:
+            recent = bool(self._redis.exists(RECENT_WRITE_KEY.format(principal)))
+        except redis.RedisError as e:
+            redis_breaker.failed(e)
+            return False
+        redis_breaker.succeeded()
+        return recent
+    
+    async def is_recent_async(self, principal: str) -> bool:
+        """is_recent for the event loop: the Redis lookup is awaited instead of blocking it"""
+        recent = self._recent_here(principal)
+        if recent is not None:
+            return recent
+        try:
+            recent = bool(await get_async_redis().exists(RECENT_WRITE_KEY.format(principal)))
+        except redis.RedisError as e:
+            redis_breaker.failed(e)
+            return False
+        redis_breaker.succeeded()
+        return recent
+    
+    def _remember(self, principal: str) -> bool:
+        """Note the write locally; True if Redis should be told as well"""
+        now = time.monotonic()
+        with self._lock:
+            self._local[principal] = now
+            # Forget anyone whose window has passed so the fallback stays small
+            if len(self._local) > 10000:
+                self._local = {p: t for p, t in self._local.items() if now - t < self.window_seconds}
+        return redis_breaker.available
+    
+    def _recent_here(self, principal: str) -> Optional[bool]:
+        """The answer without asking Redis, or None when only Redis knows"""
+        with self._lock:
+            written_at = self._local.get(principal)
+        if written_at is not None and time.monotonic() - written_at < self.window_seconds:
+            return True
+        # Without Redis only this worker's writes are known; the replica is still right for the rest
+        if not redis_breaker.available:
+            return False
+        return None
+
+recent_writes = RecentWrites(settings.read_your_writes_seconds) if settings.read_your_writes_seconds > 0 else None
+
+def reads_from_primary(request: Request) -> bool:
+    return recent_writes is not None and recent_writes.is_recent(request_principal(request))
+
+async def reads_from_primary_async(request: Request) -> bool:
+    return recent_writes is not None and await recent_writes.is_recent_async(request_principal(request))
\ No newline at end of file
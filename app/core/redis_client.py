@@ -0,0 +1,135 @@
+"""
+Shared Redis connections: one lazily created pool per process, short timeouts and a circuit breaker
+
+Callers check redis_breaker.available before talking to Redis and report failures
+to it. Once it opens, every caller takes its local fallback straight away; a
+background probe pings Redis and closes the breaker again, so no request waits
+on a connect timeout while Redis is down.
+"""
+
+from app.core.config import settings
+from typing import Optional
+import asyncio
+import threading
+import time
+import weakref
+import redis
+import redis.asyncio as aioredis
+
+class RedisCircuitBreaker:
+    """Closed while Redis answers; opens after failure_threshold consecutive failures
+    
+    The probe thread pings every probe_interval seconds in both states: a failed
+    ping opens the breaker before requests run into the outage, a successful one
+    closes it.
+    """
+    
+    def __init__(self, failure_threshold: int, probe_interval: float):
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open = False
+        self._opened_at = 0.0
+        self._prober: Optional[threading.Thread] = None
+    
+    @property
+    def available(self) -> bool:
+        self._start_prober()
+        return not self._open
+    
+    def succeeded(self):
+        self._failures = 0
+    
+    def failed(self, error: Exception):
+        with self._lock:
+            self._failures += 1
+            if self._open or self._failures < self.failure_threshold:
+                return
+            self._open = True
+            self._opened_at = time.monotonic()
+        print(f"Redis unavailable, using local fallbacks: {error}")
+    
+    def status(self) -> dict:
+        return {
+            "state": "open" if self._open else "closed",
+            "consecutive_failures": self._failures,
+            "open_for_seconds": round(time.monotonic() - self._opened_at, 3) if self._open else 0.0
+        }
+    
+    def _close(self):
+        with self._lock:
+            was_open, self._open, self._failures = self._open, False, 0
+        if was_open:
+            print(f"Redis reachable again after {time.monotonic() - self._opened_at:.1f}s")
+    
+    def _start_prober(self):
+        if self._prober is None:
+            with self._lock:
+                if self._prober is None:
+                    self._prober = threading.Thread(target=self._probe, daemon=True)
+                    self._prober.start()
+    
+    def _probe(self):
+        while True:
+            try:
+                get_redis().ping()
+            except redis.RedisError as e:
+                # Straight to open: a failed ping is as clear a signal as the threshold's worth of requests
+                self._failures = max(self._failures, self.failure_threshold - 1)
+                self.failed(e)
+            else:
+                self._close()
+            time.sleep(self.probe_interval)
+
+_pool: Optional[redis.ConnectionPool] = None
+_subscriber_pool: Optional[redis.ConnectionPool] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis]" = weakref.WeakKeyDictionary()
+_pool_lock = threading.Lock()
+
+def _connection_kwargs() -> dict:
+    return {
+        "host": settings.redis_host,
+        "port": settings.redis_port,
+        "decode_responses": True,
+        "socket_connect_timeout": settings.redis_connect_timeout,
+        "health_check_interval": settings.redis_health_check_interval
+    }
+
+def get_redis() -> redis.Redis:
+    """Client on the process-wide pool; nothing connects until the first command"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = redis.ConnectionPool(
+                    max_connections=settings.redis_max_connections,
+                    socket_timeout=settings.redis_socket_timeout,
+                    **_connection_kwargs()
+                )
+    return redis.Redis(connection_pool=_pool)
+
+def get_subscriber_redis() -> redis.Redis:
+    """Client for pub/sub listeners, which block in listen() longer than any socket timeout"""
+    global _subscriber_pool
+    if _subscriber_pool is None:
+        with _pool_lock:
+            if _subscriber_pool is None:
+                _subscriber_pool = redis.ConnectionPool(**_connection_kwargs())
+    return redis.Redis(connection_pool=_subscriber_pool)
+
+def get_async_redis() -> aioredis.Redis:
+    """asyncio client for the running loop; its connections can't be shared with other loops"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = aioredis.Redis(
+            max_connections=settings.redis_max_connections,
+            socket_timeout=settings.redis_socket_timeout,
+            **_connection_kwargs()
+        )
+        _async_clients[loop] = client
+    return client
+
+# Global instance
+redis_breaker = RedisCircuitBreaker(settings.redis_breaker_threshold, settings.redis_health_check_interval)
\ No newline at end of file
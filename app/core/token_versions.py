@@ -0,0 +1,146 @@
+"""
+Current token_version per user, so a token's claims can be trusted without loading the user
+"""
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.redis_client import get_redis, get_subscriber_redis, redis_breaker
+from app.models.user import User
+from typing import Dict, Optional, Tuple
+import threading
+import time
+import redis
+
+TOKEN_VERSION_KEY = "corex:token-version:{}"
+TOKEN_VERSION_CHANNEL = "corex:token-versions:bump"
+
+class TokenVersionMap:
+    """username -> token_version, held per process for ttl_seconds with an optional Redis tier
+    
+    A token is valid only while the version it was issued at is still current, so
+    revoking all of a user's tokens is one increment and checking one is a dict lookup.
+    """
+    
+    def __init__(self, ttl_seconds: int, use_redis: bool = False):
+        self.ttl_seconds = ttl_seconds
+        self.use_redis = use_redis
+        self._lock = threading.Lock()
+        self._versions: Dict[str, Tuple[int, float]] = {}
+        self._bumped_at: Dict[str, float] = {}
+        self._listener: Optional[threading.Thread] = None
+        self._redis = get_redis() if use_redis else None
+    
+    def current(self, db: Session, username: str) -> Optional[int]:
+        """The user's current version, or None when there is no such user"""
+        self._start_listener()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._versions.get(username)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        
+        version = self._redis_version(username)
+        if version is None:
+            version = db.execute(select(User.token_version).where(User.username == username)).scalar()
+            if version is None:
+                return None
+            self._share(username, version)
+        self._remember(username, version, loaded_at=now)
+        return version
+    
+    def bump(self, db: Session, username: str) -> Optional[int]:
+        """Revoke every outstanding token of username; takes effect when db commits"""
+        return db.execute(
+            update(User).where(User.username == username).values(
+                token_version=User.token_version + 1
+            ).returning(User.token_version).execution_options(synchronize_session=False)
+        ).scalar()
+    
+    def bumped(self, username: str, version: int):
+        """Record a committed bump here and, with Redis, on every other worker"""
+        now = time.monotonic()
+        with self._lock:
+            self._bumped_at[username] = now
+            self._versions[username] = (version, now + self.ttl_seconds)
+            if len(self._bumped_at) > 10000:
+                self._bumped_at = {name: at for name, at in self._bumped_at.items() if now - at < 60}
+        if self._redis_available():
+            try:
+                pipe = self._redis.pipeline(transaction=False)
+                pipe.set(TOKEN_VERSION_KEY.format(username), version, ex=self.ttl_seconds)
+                pipe.publish(TOKEN_VERSION_CHANNEL, username)
+                pipe.execute()
+            except redis.RedisError as e:
+                # Other workers reread the database once their entries expire
+                redis_breaker.failed(e)
+                print(f"Failed to broadcast token version bump: {e}")
+    
+    def forget(self, username: str):
+        with self._lock:
+            self._versions.pop(username, None)
+    
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+            self._bumped_at.clear()
+    
+    def _remember(self, username: str, version: int, loaded_at: float):
+        with self._lock:
+            # A version read before a bump landed here must not replace the bumped one
+            if self._bumped_at.get(username, 0.0) >= loaded_at:
+                return
+            self._versions[username] = (version, loaded_at + self.ttl_seconds)
+    
+    def _redis_version(self, username: str) -> Optional[int]:
+        if not self._redis_available():
+            return None
+        try:
+            value = self._redis.get(TOKEN_VERSION_KEY.format(username))
+        except redis.RedisError as e:
+            redis_breaker.failed(e)
+            return None
+        redis_breaker.succeeded()
+        return int(value) if value is not None else None
+    
+    def _share(self, username: str, version: int):
+        if not self._redis_available():
+            return
+        try:
+            # nx: never overwrite a version another worker has just bumped. The key expires like
+            # the local entries, so a bump that failed to reach Redis is stale for one TTL at most
+            self._redis.set(TOKEN_VERSION_KEY.format(username), version, ex=self.ttl_seconds, nx=True)
+        except redis.RedisError as e:
+            redis_breaker.failed(e)
+    
+    def _redis_available(self) -> bool:
+        return self.use_redis and redis_breaker.available
+    
+    def _start_listener(self):
+        # A listener that died with its connection is started again once the breaker closes
+        if not self._redis_available():
+            return
+        if self._listener is None or not self._listener.is_alive():
+            with self._lock:
+                if self._listener is None or not self._listener.is_alive():
+                    self._listener = threading.Thread(target=self._listen, daemon=True)
+                    self._listener.start()
+    
+    def _listen(self):
+        try:
+            pubsub = get_subscriber_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(TOKEN_VERSION_CHANNEL)
+            # Subscribed first; bumps announced while nobody listened are picked up by rereading
+            with self._lock:
+                self._versions.clear()
+            for message in pubsub.listen():
+                # The next check rereads the bumped version from Redis
+                self.forget(message["data"])
+        except redis.RedisError as e:
+            redis_breaker.failed(e)
+        except Exception as e:
+            # The TTL still bounds how long this worker accepts revoked tokens
+            print(f"Token version listener stopped: {e}")
+
+# Global instance
+token_versions = TokenVersionMap(settings.token_version_cache_ttl, use_redis=settings.token_version_redis)
\ No newline at end of file
@@ -1,8 +1,15 @@
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.pool_metrics import TimedAsyncQueuePool, TimedNullPool, TimedQueuePool
+from app.core.read_routing import reads_from_primary, reads_from_primary_async
+import asyncio
 import os
+import uuid
 
 # Handle different database URLs for different environments
 database_url = settings.database_url
@@ -18,14 +25,113 @@ if database_url.startswith("sqlite://"):
     if database_url == "sqlite:///app/corex.db":
         database_url = "sqlite:///app/data/corex.db"
 
-engine = create_engine(database_url, 
-                     connect_args={"check_same_thread": False} if "sqlite" in database_url else {})
+def engine_options(url: str, name: str, asyncio_driver: bool = False) -> dict:
+    """Pool settings from Settings for PostgreSQL; SQLite keeps SQLAlchemy's defaults"""
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        return {} if asyncio_driver else {"connect_args": {"check_same_thread": False}}
+    if backend != "postgresql":
+        return {}
+    
+    options = {
+        "pool_logging_name": name,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle
+    }
+    if settings.db_pgbouncer_null_pool:
+        options["poolclass"] = TimedNullPool
+    else:
+        options.update(
+            poolclass=TimedAsyncQueuePool if asyncio_driver else TimedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout
+        )
+    if settings.db_pgbouncer and asyncio_driver:
+        # A transaction-mode PgBouncer hands each transaction a different server connection,
+        # so asyncpg must not cache prepared statements or reuse their names
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__"
+        }
+    return options
+
+engine = create_engine(database_url, **engine_options(database_url, "sync"))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# asyncio drivers for the same databases the synchronous engine talks to
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    return parsed.set(drivername=driver).render_as_string(hide_password=False) if driver else url
+
+async_engine = create_async_engine(async_database_url(database_url), **engine_options(database_url, "async", asyncio_driver=True))
+# Nothing is expired on commit: an expired attribute would need a lazy load, which can't await
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Read replica for read-only routes; without one, reads use the primary engines
+replica_url = settings.database_replica_url
+if replica_url.startswith("postgres://"):
+    replica_url = replica_url.replace("postgres://", "postgresql://", 1)
+
+if replica_url:
+    read_engine = create_engine(replica_url, **engine_options(replica_url, "replica"))
+    async_read_engine = create_async_engine(
+        async_database_url(replica_url), **engine_options(replica_url, "async-replica", asyncio_driver=True)
+    )
+else:
+    read_engine, async_read_engine = engine, async_engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def _use_replica(request: Request) -> bool:
+    return read_engine is not engine and not reads_from_primary(request)
+
+async def _use_replica_async(request: Request) -> bool:
+    return read_engine is not engine and not await reads_from_primary_async(request)
+
+def get_read_db(request: Request):
+    """Session for read-only routes: the replica, unless this caller wrote within the stickiness window"""
+    db = ReadSessionLocal() if _use_replica(request) else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+_async_pool_loop = None
+
+def _bind_async_pool_to_running_loop():
+    """asyncpg connections only work on the loop that opened them, so a new loop
+    (TestClient without a context manager, asyncio.run in a task) starts a fresh pool"""
+    global _async_pool_loop
+    loop = asyncio.get_running_loop()
+    if _async_pool_loop is not loop:
+        if _async_pool_loop is not None:
+            async_engine.sync_engine.dispose(close=False)
+            if async_read_engine is not async_engine:
+                async_read_engine.sync_engine.dispose(close=False)
+        _async_pool_loop = loop
+
+async def get_async_db():
+    """Session for async routes; queries are awaited instead of blocking the event loop"""
+    _bind_async_pool_to_running_loop()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db(request: Request):
+    """Async counterpart of get_read_db"""
+    _bind_async_pool_to_running_loop()
+    session_factory = AsyncReadSessionLocal if await _use_replica_async(request) else AsyncSessionLocal
+    async with session_factory() as db:
+        yield db
\ No newline at end of file
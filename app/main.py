@@ -1,9 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
-from app.api import customers, accounts, transactions, auth, kyc, loans, payments, notifications
+from app.api import customers, accounts, transactions, auth, kyc, loans, payments, notifications, internal
 from app.core.config import settings
 from app.database import engine
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
 from app.models import Base
 
 # Create database tables
@@ -78,6 +80,10 @@ app = FastAPI(
         {
             "name": "Notifications", 
             "description": "🔔 **Notification management system**\n\nSMS, email, and in-app notifications for transactions, KYC updates, and system alerts."
+        },
+        {
+            "name": "Internal", 
+            "description": "🛠️ **Operational metrics**\n\nPer-process database connection pool occupancy and checkout wait times (Admin and Auditor only)."
         }
     ],
     servers=[
@@ -101,6 +107,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Writes pin the caller's reads to the primary for READ_YOUR_WRITES_SECONDS
+if settings.database_replica_url and settings.read_your_writes_seconds > 0:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Per caller GCRA limits, shared through Redis; see app/core/rate_limit_config.py
+if settings.rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(customers.router, prefix="/customers", tags=["Customers"])
@@ -110,6 +124,7 @@ app.include_router(transactions.router, prefix="/transactions", tags=["Transacti
 app.include_router(loans.router, prefix="/loans", tags=["Loans"])
 app.include_router(payments.router, prefix="/payments", tags=["Payments"])
 app.include_router(notifications.router, prefix="/notifications", tags=["Notifications"])
+app.include_router(internal.router, prefix="/internal", tags=["Internal"])
 
 # Custom OpenAPI schema with security
 def custom_openapi():
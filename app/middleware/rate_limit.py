@@ -1,105 +1,122 @@
-from fastapi import Request, HTTPException, status
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
+import hashlib
+import math
 import time
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 import redis
-from app.core.config import settings
+from app.core.rate_limit_config import RateLimit, RateLimitConfig
+from app.core.read_routing import request_principal, token_claims
+from app.core.redis_client import get_async_redis, redis_breaker
+
+# GCRA: the key holds the theoretical arrival time (TAT, ms) of the caller's next request.
+# Each allowed request pushes it one emission interval (period / requests) further; a request
+# is refused while that would put it more than one period ahead of now. One key per caller,
+# one round trip per request, and refused requests change nothing.
+# Takes the time from Redis so every worker shares one clock (needs effects replication, Redis 5+).
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+if tat + interval - now > period then
+    return {0, 0, tat + interval - period - now, tat - now}
+end
+redis.call('SET', KEYS[1], tat + interval, 'PX', tat + interval - now)
+return {1, math.floor((period - (tat + interval - now)) / interval), 0, tat + interval - now}
+"""
+GCRA_SHA = hashlib.sha1(GCRA_SCRIPT.encode()).hexdigest()
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """Rate limiting middleware to prevent API abuse"""
     
-    def __init__(self, app, requests_per_minute: int = 60):
+    def __init__(self, app, requests_per_minute: Optional[int] = None,
+                 route_limits: Optional[Dict[Tuple[str, str], RateLimit]] = None,
+                 role_limits: Optional[Dict] = None):
         super().__init__(app)
-        self.requests_per_minute = requests_per_minute
-        self.window_size = 60  # 1 minute window
-        
-        try:
-            self.redis_client = redis.Redis(
-                host=settings.redis_host,
-                port=settings.redis_port,
-                decode_responses=True
-            )
-        except:
-            # Fallback to in-memory storage
-            self.redis_client = None
-            self._requests: Dict[str, list] = {}
+        self.default_limit = RateLimit(requests_per_minute, 60) if requests_per_minute else RateLimitConfig.DEFAULT_LIMIT
+        self.route_limits = RateLimitConfig.ROUTE_LIMITS if route_limits is None else route_limits
+        self.role_limits = RateLimitConfig.ROLE_LIMITS if role_limits is None else role_limits
+        # Fallback for while the Redis circuit breaker is open: key -> TAT in ms
+        self._arrivals: Dict[str, int] = {}
     
     async def dispatch(self, request: Request, call_next):
         # Skip rate limiting for health checks
         if request.url.path in ["/health", "/"]:
             return await call_next(request)
         
-        client_ip = self._get_client_ip(request)
+        claims = token_claims(request)
+        scope, limit = self._limit_for(request, claims)
+        key = f"rate_limit:{scope}:{request_principal(request, claims)}"
+        allowed, remaining, retry_after_ms, reset_ms = await self._acquire(key, limit)
         
-        # Check rate limit
-        if not self._is_allowed(client_ip):
-            raise HTTPException(
+        headers = {
+            "X-RateLimit-Limit": str(limit.requests),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(math.ceil(reset_ms / 1000))
+        }
+        if not allowed:
+            headers["Retry-After"] = str(math.ceil(retry_after_ms / 1000))
+            return JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Rate limit exceeded. Please try again later."
+                content={"detail": "Rate limit exceeded. Please try again later."},
+                headers=headers
             )
         
-        # Record the request
-        self._record_request(client_ip)
-        
-        return await call_next(request)
+        response = await call_next(request)
+        response.headers.update(headers)
+        return response
     
-    def _get_client_ip(self, request: Request) -> str:
-        """Get client IP address"""
-        # Check for forwarded headers first
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            return forwarded_for.split(",")[0].strip()
-        
-        real_ip = request.headers.get("X-Real-IP")
-        if real_ip:
-            return real_ip
+    def _limit_for(self, request: Request, claims: Dict) -> Tuple[str, RateLimit]:
+        """The bucket a request counts against and its limit"""
+        path, best = request.url.path, None
+        for (method, prefix), limit in self.route_limits.items():
+            if method not in ("*", request.method):
+                continue
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                if best is None or len(prefix) > len(best[0][1]):
+                    best = ((method, prefix), limit)
+        if best is not None:
+            return f"{best[0][0]} {best[0][1]}", best[1]
         
-        return request.client.host if request.client else "unknown"
+        role = claims.get("role")
+        for limit_role, limit in self.role_limits.items():
+            if limit_role == role:
+                return f"role:{role}", limit
+        return "default", self.default_limit
     
-    def _is_allowed(self, client_ip: str) -> bool:
-        """Check if request is allowed based on rate limit"""
-        current_time = time.time()
+    async def _acquire(self, key: str, limit: RateLimit) -> Tuple[bool, int, int, int]:
+        """(allowed, remaining, retry after ms, ms until the bucket is empty again)"""
+        period = limit.period_seconds * 1000
+        # Whole milliseconds, rounded down so a full burst always fits in the period
+        interval = max(1, period // limit.requests)
         
-        if self.redis_client:
-            # Use Redis for distributed rate limiting
-            key = f"rate_limit:{client_ip}"
-            pipe = self.redis_client.pipeline()
-            
-            # Remove old entries
-            pipe.zremrangebyscore(key, 0, current_time - self.window_size)
-            
-            # Count current requests
-            pipe.zcard(key)
-            
-            # Add current request
-            pipe.zadd(key, {str(current_time): current_time})
-            
-            # Set expiration
-            pipe.expire(key, self.window_size)
-            
-            results = pipe.execute()
-            request_count = results[1]
-            
-            return request_count < self.requests_per_minute
-        else:
-            # Fallback to in-memory storage
-            if client_ip not in self._requests:
-                self._requests[client_ip] = []
-            
-            # Clean old requests
-            self._requests[client_ip] = [
-                req_time for req_time in self._requests[client_ip]
-                if current_time - req_time < self.window_size
-            ]
-            
-            return len(self._requests[client_ip]) < self.requests_per_minute
-    
-    def _record_request(self, client_ip: str):
-        """Record the current request"""
-        current_time = time.time()
+        if redis_breaker.available:
+            client = get_async_redis()
+            args = (interval, period)
+            try:
+                try:
+                    result = await client.evalsha(GCRA_SHA, 1, key, *args)
+                except redis.exceptions.NoScriptError:
+                    result = await client.eval(GCRA_SCRIPT, 1, key, *args)
+            except redis.RedisError as e:
+                redis_breaker.failed(e)
+            else:
+                redis_breaker.succeeded()
+                return bool(result[0]), result[1], result[2], result[3]
         
-        if not self.redis_client:
-            # Only record for in-memory storage (Redis records in _is_allowed)
-            if client_ip not in self._requests:
-                self._requests[client_ip] = []
-            self._requests[client_ip].append(current_time)
\ No newline at end of file
+        # Fallback to in-memory storage: the same algorithm, per worker
+        now = time.time_ns() // 1_000_000
+        tat = max(self._arrivals.get(key, now), now)
+        if tat + interval - now > period:
+            return False, 0, tat + interval - period - now, tat - now
+        self._arrivals[key] = tat + interval
+        if len(self._arrivals) > 100000:
+            # Entries in the past are the same as no entry
+            self._arrivals = {k: at for k, at in self._arrivals.items() if at > now}
+        return True, (period - (tat + interval - now)) // interval, 0, tat + interval - now
\ No newline at end of file
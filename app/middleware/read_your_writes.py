@@ -0,0 +1,12 @@
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.read_routing import WRITE_METHODS, recent_writes, request_principal
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """Remember successful writes so the same caller's next reads go to the primary"""
+    
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if recent_writes is not None and request.method in WRITE_METHODS and response.status_code < 400:
+            await recent_writes.record_async(request_principal(request))
+        return response
\ No newline at end of file
@@ -1,13 +1,13 @@
 from app.database import Base
 from .customer import Customer
-from .account import Account, Balance
+from .account import Account, Balance, BalanceSnapshot
 from .transaction import Transaction, Entry
 from .user import User
 from .audit import AuditLog
 from .kyc import KYCDocument
-from .loan import Loan, LoanPayment
-from .interest import InterestRate, InterestPosting
-from .payment import BillPayment, StandingOrder, StandingOrderExecution
-from .notification import Notification, NotificationTemplate
+from .loan import Loan, LoanPayment, LoanDelinquency, LoanAgingSummary
+from .interest import InterestRate, InterestPosting, InterestAccrual, InterestAccrualRun
+from .payment import BillPayment, Biller, BillerSettlement, StandingOrder, StandingOrderExecution, BulkTransferJob, BulkTransferItem
+from .notification import Notification, NotificationTemplate, NotificationOutbox
 
-__all__ = ["Base", "Customer", "Account", "Balance", "Transaction", "Entry", "User", "AuditLog", "KYCDocument", "Loan", "LoanPayment", "InterestRate", "InterestPosting", "BillPayment", "StandingOrder", "StandingOrderExecution"]
\ No newline at end of file
+__all__ = ["Base", "Customer", "Account", "Balance", "BalanceSnapshot", "Transaction", "Entry", "User", "AuditLog", "KYCDocument", "Loan", "LoanPayment", "LoanDelinquency", "LoanAgingSummary", "InterestRate", "InterestPosting", "InterestAccrual", "InterestAccrualRun", "BillPayment", "Biller", "BillerSettlement", "StandingOrder", "StandingOrderExecution", "BulkTransferJob", "BulkTransferItem", "NotificationOutbox"]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, DECIMAL
+from sqlalchemy import Column, String, Date, DateTime, Enum, ForeignKey, DECIMAL
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -40,4 +40,13 @@ class Balance(Base):
     available_balance = Column(DECIMAL(15, 2), default=0.00)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
-    account = relationship("Account", back_populates="balance")
\ No newline at end of file
+    account = relationship("Account", back_populates="balance")
+
+class BalanceSnapshot(Base):
+    """Ledger balance at the close of each UTC day on which the account moved"""
+    __tablename__ = "balance_snapshots"
+    
+    account_id = Column(UUID(as_uuid=True), ForeignKey("accounts.id"), primary_key=True)
+    snapshot_date = Column(Date, primary_key=True)
+    closing_balance = Column(DECIMAL(15, 2), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Numeric, DateTime, Enum, ForeignKey, Boolean
+from sqlalchemy import Column, String, Numeric, Date, DateTime, Enum, ForeignKey, Boolean
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -55,4 +55,30 @@ class InterestPosting(Base):
     # Relationships
     account = relationship("Account")
     rate = relationship("InterestRate")
-    transaction = relationship("Transaction")
\ No newline at end of file
+    transaction = relationship("Transaction")
+
+class InterestAccrual(Base):
+    """Interest earned on one account's closing balance for one UTC day"""
+    __tablename__ = "interest_accruals"
+    
+    account_id = Column(UUID(as_uuid=True), ForeignKey("accounts.id"), primary_key=True)
+    accrual_date = Column(Date, primary_key=True)
+    rate_id = Column(UUID(as_uuid=True), ForeignKey("interest_rates.id"), nullable=False)
+    
+    closing_balance = Column(Numeric(15, 2), nullable=False)
+    interest_rate = Column(Numeric(5, 4), nullable=False)
+    # Kept unrounded so a month of accruals rounds once, at posting
+    accrued_amount = Column(Numeric(15, 8), nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class InterestAccrualRun(Base):
+    """One completed accrual of one UTC day over one account-id range, whether or not anything accrued"""
+    __tablename__ = "interest_accrual_runs"
+    
+    # Range bounds as passed to the job; an open end is stored as ""
+    range_start = Column(String(36), primary_key=True)
+    range_end = Column(String(36), primary_key=True)
+    accrual_date = Column(Date, primary_key=True)
+    
+    completed_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Numeric, DateTime, Enum, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Numeric, Date, DateTime, Enum, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -19,6 +19,13 @@ class LoanType(str, enum.Enum):
     MORTGAGE = "MORTGAGE"
     AUTO = "AUTO"
 
+class AgingBucket(str, enum.Enum):
+    CURRENT = "CURRENT"
+    DPD_1_30 = "DPD_1_30"
+    DPD_31_60 = "DPD_31_60"
+    DPD_61_90 = "DPD_61_90"
+    DPD_90_PLUS = "DPD_90_PLUS"
+
 class Loan(Base):
     __tablename__ = "loans"
     
@@ -36,6 +43,8 @@ class Loan(Base):
     status = Column(Enum(LoanStatus), default=LoanStatus.PENDING)
     disbursed_amount = Column(Numeric(15, 2), default=0)
     outstanding_balance = Column(Numeric(15, 2), default=0)
+    # Sequence of the last payment taken, so numbering never counts the payment history
+    payment_count = Column(Integer, nullable=False, default=0, server_default="0")
     
     application_date = Column(DateTime(timezone=True), server_default=func.now())
     approval_date = Column(DateTime(timezone=True))
@@ -67,4 +76,43 @@ class LoanPayment(Base):
     
     # Relationships
     loan = relationship("Loan", back_populates="payments")
-    transaction = relationship("Transaction")
\ No newline at end of file
+    transaction = relationship("Transaction")
+    
+    __table_args__ = (
+        Index("idx_loan_payments_loan_date", "loan_id", "payment_date", "id"),
+    )
+
+class LoanDelinquency(Base):
+    """Latest delinquency position of each active loan, rebuilt by the aging job"""
+    __tablename__ = "loan_delinquency"
+    
+    loan_id = Column(UUID(as_uuid=True), ForeignKey("loans.id"), primary_key=True)
+    as_of_date = Column(Date, nullable=False)
+    
+    installments_due = Column(Integer, nullable=False)
+    amount_due = Column(Numeric(15, 2), nullable=False)
+    amount_paid = Column(Numeric(15, 2), nullable=False)
+    arrears_amount = Column(Numeric(15, 2), nullable=False)
+    days_past_due = Column(Integer, nullable=False)
+    aging_bucket = Column(Enum(AgingBucket), nullable=False)
+    outstanding_balance = Column(Numeric(15, 2), nullable=False)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    loan = relationship("Loan")
+    
+    __table_args__ = (
+        Index("idx_loan_delinquency_bucket", "aging_bucket"),
+    )
+
+class LoanAgingSummary(Base):
+    """Portfolio totals per aging bucket for each run date"""
+    __tablename__ = "loan_aging_summary"
+    
+    as_of_date = Column(Date, primary_key=True)
+    aging_bucket = Column(Enum(AgingBucket), primary_key=True)
+    loan_count = Column(Integer, nullable=False)
+    outstanding_balance = Column(Numeric(15, 2), nullable=False)
+    arrears_amount = Column(Numeric(15, 2), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
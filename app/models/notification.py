@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, Enum, ForeignKey, Boolean
+from sqlalchemy import Column, String, Text, DateTime, Enum, ForeignKey, Boolean, Integer, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -57,4 +57,27 @@ class NotificationTemplate(Base):
     message_template = Column(Text, nullable=False)
     
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class NotificationOutbox(Base):
+    """Notification events written in the same database transaction as the ledger postings"""
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        Index("idx_notification_outbox_status_created", "status", "created_at"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    template_code = Column(String(50), nullable=False)
+    notification_type = Column(Enum(NotificationType), nullable=False)
+    channel = Column(Enum(NotificationChannel), nullable=False)
+    account_id = Column(UUID(as_uuid=True), ForeignKey("accounts.id"))
+    payload = Column(JSON, nullable=False)
+    
+    status = Column(Enum(NotificationStatus), default=NotificationStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    # Set after a failed attempt; the event is not retried before then
+    next_attempt_at = Column(DateTime(timezone=True))
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    dispatched_at = Column(DateTime(timezone=True))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Numeric, DateTime, Enum, ForeignKey, Text, Boolean
+from sqlalchemy import Column, String, Numeric, Integer, Date, DateTime, Enum, ForeignKey, Text, Boolean, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -37,10 +37,54 @@ class BillPayment(Base):
     
     status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING)
     transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id"))
+    # Set when the sweep moves this payment on to the biller
+    settlement_id = Column(UUID(as_uuid=True), ForeignKey("biller_settlements.id"))
     
     # Relationships
     account = relationship("Account")
     transaction = relationship("Transaction")
+    settlement = relationship("BillerSettlement", back_populates="payments")
+    
+    __table_args__ = (
+        # The settlement sweep only ever reads posted payments that are still unsettled
+        Index(
+            "idx_bill_payments_unsettled", "biller_code",
+            postgresql_where=text("status = 'COMPLETED' AND settlement_id IS NULL")
+        ),
+    )
+
+class Biller(Base):
+    """A payee for bill payments: bills collect in its settlement account until swept to its payout account"""
+    __tablename__ = "billers"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    biller_code = Column(String(20), unique=True, nullable=False)
+    name = Column(String(100), nullable=False)
+    settlement_account_id = Column(UUID(as_uuid=True), ForeignKey("accounts.id"), nullable=False)
+    payout_account_id = Column(UUID(as_uuid=True), ForeignKey("accounts.id"), nullable=False)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    settlement_account = relationship("Account", foreign_keys=[settlement_account_id])
+    payout_account = relationship("Account", foreign_keys=[payout_account_id])
+    settlements = relationship("BillerSettlement", back_populates="biller")
+
+class BillerSettlement(Base):
+    """One aggregated transfer from a biller's settlement account covering many bill payments"""
+    __tablename__ = "biller_settlements"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    biller_id = Column(UUID(as_uuid=True), ForeignKey("billers.id"), nullable=False)
+    amount = Column(Numeric(15, 2), nullable=False)
+    payment_count = Column(Integer, nullable=False)
+    transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id"))
+    settled_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    biller = relationship("Biller", back_populates="settlements")
+    transaction = relationship("Transaction")
+    payments = relationship("BillPayment", back_populates="settlement")
 
 class StandingOrder(Base):
     __tablename__ = "standing_orders"
@@ -67,12 +111,19 @@ class StandingOrder(Base):
     from_account = relationship("Account", foreign_keys=[from_account_id])
     to_account = relationship("Account", foreign_keys=[to_account_id])
     executions = relationship("StandingOrderExecution", back_populates="standing_order")
+    
+    __table_args__ = (
+        # The executor only ever scans active orders by due time
+        Index("idx_standing_orders_due", "next_execution_date", postgresql_where=text("is_active")),
+    )
 
 class StandingOrderExecution(Base):
     __tablename__ = "standing_order_executions"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     standing_order_id = Column(UUID(as_uuid=True), ForeignKey("standing_orders.id"), nullable=False)
+    # Due date this execution settles; with the order it is the idempotency key
+    scheduled_date = Column(Date)
     
     execution_date = Column(DateTime(timezone=True), server_default=func.now())
     amount = Column(Numeric(15, 2), nullable=False)
@@ -83,4 +134,69 @@ class StandingOrderExecution(Base):
     
     # Relationships
     standing_order = relationship("StandingOrder", back_populates="executions")
-    transaction = relationship("Transaction")
\ No newline at end of file
+    transaction = relationship("Transaction")
+    
+    __table_args__ = (
+        Index("uq_standing_order_executions_order_date", "standing_order_id", "scheduled_date", unique=True),
+    )
+
+class BulkTransferJob(Base):
+    """An uploaded payroll file: one debit from the source account, one credit per valid row"""
+    __tablename__ = "bulk_transfer_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_reference = Column(String(50), unique=True, nullable=False)
+    from_account_id = Column(UUID(as_uuid=True), ForeignKey("accounts.id"), nullable=False)
+    currency = Column(String(3), nullable=False)
+    description = Column(Text)
+    
+    file_name = Column(String(255))
+    file_format = Column(String(10), nullable=False)  # CSV, JSONL
+    file_path = Column(String(500), nullable=False)
+    
+    status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING, nullable=False)
+    total_rows = Column(Integer, default=0, nullable=False)
+    valid_rows = Column(Integer, default=0, nullable=False)
+    rejected_rows = Column(Integer, default=0, nullable=False)
+    credited_rows = Column(Integer, default=0, nullable=False)
+    total_amount = Column(Numeric(15, 2), default=0, nullable=False)
+    credited_amount = Column(Numeric(15, 2), default=0, nullable=False)
+    failure_reason = Column(Text)
+    
+    # The single debit every credit in the file is posted under
+    transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id"))
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    ingested_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime(timezone=True))
+    # Bumped on every batch commit; a stale one on a PROCESSING job means its worker died
+    heartbeat_at = Column(DateTime(timezone=True))
+    
+    # Relationships
+    from_account = relationship("Account")
+    transaction = relationship("Transaction")
+    items = relationship("BulkTransferItem", back_populates="job")
+
+class BulkTransferItem(Base):
+    """One row of a payroll file, staged with its validation outcome"""
+    __tablename__ = "bulk_transfer_items"
+    
+    job_id = Column(UUID(as_uuid=True), ForeignKey("bulk_transfer_jobs.id"), primary_key=True)
+    row_number = Column(Integer, primary_key=True)
+    
+    account_number = Column(String(50))
+    account_id = Column(UUID(as_uuid=True), ForeignKey("accounts.id"))
+    amount = Column(Numeric(15, 2))
+    reference = Column(String(100))
+    
+    # PENDING until credited; rejected rows are FAILED with the reason
+    status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING, nullable=False)
+    failure_reason = Column(Text)
+    
+    # Relationships
+    job = relationship("BulkTransferJob", back_populates="items")
+    
+    __table_args__ = (
+        Index("idx_bulk_transfer_items_job_status", "job_id", "status", "row_number"),
+    )
\ No newline at end of file
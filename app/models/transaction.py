@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, DECIMAL, Text
+from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, DECIMAL, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -25,6 +25,11 @@ class EntryType(str, enum.Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Keyset pagination of account history walks these in (created_at, id) order
+        Index("idx_transactions_from_account_created", "from_account_id", "created_at", "id"),
+        Index("idx_transactions_to_account_created", "to_account_id", "created_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     transaction_id = Column(String(50), unique=True, nullable=False)
@@ -42,6 +47,10 @@ class Transaction(Base):
 
 class Entry(Base):
     __tablename__ = "entries"
+    __table_args__ = (
+        # Statements and point-in-time balances scan an account's entries in time order
+        Index("idx_entries_account_created", "account_id", "created_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id"))
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 from typing import Optional
 from datetime import datetime
 from decimal import Decimal
@@ -19,6 +19,10 @@ class AccountResponse(AccountBase):
     created_at: datetime
     updated_at: datetime
     
+    @validator('id', 'customer_id', pre=True)
+    def stringify_ids(cls, v):
+        return str(v) if v is not None else v
+    
     class Config:
         from_attributes = True
 
@@ -28,5 +32,9 @@ class BalanceResponse(BaseModel):
     available_balance: Decimal
     updated_at: datetime
     
+    @validator('account_id', pre=True)
+    def stringify_ids(cls, v):
+        return str(v)
+    
     class Config:
         from_attributes = True
\ No newline at end of file
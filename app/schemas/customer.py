@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, validator
 from typing import Optional, List
 from datetime import date, datetime
 from app.models.customer import KYCStatus, CustomerStatus
@@ -31,6 +31,10 @@ class CustomerResponse(CustomerBase):
     updated_at: datetime
     kyc_documents: Optional[List[KYCDocumentResponse]] = []
     
+    @validator('id', pre=True)
+    def stringify_ids(cls, v):
+        return str(v)
+    
     class Config:
         from_attributes = True
 
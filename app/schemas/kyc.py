@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 from typing import Optional
 from datetime import datetime
 from app.models.kyc import DocumentType, DocumentStatus
@@ -21,6 +21,10 @@ class KYCDocumentResponse(KYCDocumentBase):
     created_at: datetime
     updated_at: datetime
     
+    @validator('id', 'customer_id', 'verified_by', pre=True)
+    def stringify_ids(cls, v):
+        return str(v) if v is not None else v
+    
     class Config:
         from_attributes = True
 
@@ -1,8 +1,8 @@
 from pydantic import BaseModel, validator
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from typing import Optional, List
-from app.models.loan import LoanStatus, LoanType
+from app.models.loan import LoanStatus, LoanType, AgingBucket
 
 class LoanApplicationCreate(BaseModel):
     customer_id: str
@@ -38,6 +38,10 @@ class LoanResponse(BaseModel):
     application_date: datetime
     approval_date: Optional[datetime]
     
+    @validator('id', 'customer_id', pre=True)
+    def stringify_ids(cls, v):
+        return str(v)
+    
     class Config:
         from_attributes = True
 
@@ -70,5 +74,56 @@ class LoanPaymentResponse(BaseModel):
     interest_paid: Decimal
     balance_after_payment: Decimal
     
+    @validator('id', pre=True)
+    def stringify_id(cls, v):
+        return str(v)
+    
+    class Config:
+        from_attributes = True
+
+class LoanPaymentPage(BaseModel):
+    payments: List[LoanPaymentResponse]
+    next_cursor: Optional[str] = None
+
+class InstallmentResponse(BaseModel):
+    number: int
+    due_date: date
+    payment: Decimal
+    principal: Decimal
+    interest: Decimal
+    remaining_balance: Decimal
+    
+    class Config:
+        from_attributes = True
+
+class LoanScheduleResponse(BaseModel):
+    loan_id: str
+    monthly_payment: Decimal
+    total_interest: Decimal
+    installments: List[InstallmentResponse]
+
+class PortfolioScheduleRequest(BaseModel):
+    status: Optional[LoanStatus] = LoanStatus.ACTIVE
+    rate_shift: Decimal = Decimal('0')  # Percentage points added to every loan's annual rate
+
+class PortfolioCashFlow(BaseModel):
+    due_month: date
+    payment: Decimal
+    principal: Decimal
+    interest: Decimal
+
+class PortfolioScheduleResponse(BaseModel):
+    loan_count: int
+    total_principal: Decimal
+    total_interest: Decimal
+    cash_flows: List[PortfolioCashFlow]
+
+class AgingBucketSummary(BaseModel):
+    as_of_date: date
+    aging_bucket: AgingBucket
+    loan_count: int
+    outstanding_balance: Decimal
+    arrears_amount: Decimal
+    
     class Config:
         from_attributes = True
\ No newline at end of file
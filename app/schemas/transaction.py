@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, validator
+from typing import Optional, List
 from datetime import datetime
 from decimal import Decimal
 from app.models.transaction import TransactionType, TransactionStatus
@@ -23,5 +23,22 @@ class TransactionResponse(TransactionBase):
     created_at: datetime
     processed_at: Optional[datetime] = None
     
+    @validator('id', 'from_account_id', 'to_account_id', pre=True)
+    def stringify_ids(cls, v):
+        return str(v) if v is not None else v
+    
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TransactionPage(BaseModel):
+    transactions: List[TransactionResponse]
+    next_cursor: Optional[str] = None
+
+class TransactionBatchProcess(BaseModel):
+    transaction_ids: List[str]
+    chunk_size: Optional[int] = None
+
+class TransactionBatchResult(BaseModel):
+    transaction_id: str
+    status: TransactionStatus
+    error: Optional[str] = None
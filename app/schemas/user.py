@@ -22,6 +22,10 @@ class UserResponse(UserBase):
     status: UserStatus
     created_at: datetime
     
+    @validator('id', pre=True)
+    def stringify_id(cls, v):
+        return str(v)
+    
     class Config:
         from_attributes = True
 
@@ -1,9 +1,27 @@
+from sqlalchemy import select, insert, delete, func, case, cast, literal, Date
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models.account import Account, Balance
+from app.models.account import Account, Balance, BalanceSnapshot
+from app.models.transaction import Entry, EntryType
 from app.schemas.account import AccountCreate
+from app.core.config import settings
+from app.core.money import ZERO, to_money
+from decimal import Decimal
+from datetime import date, datetime, time, timedelta, timezone
 from typing import List, Optional
 import uuid
 
+def signed_entry_amount():
+    """Entry amount as it affects the account balance"""
+    return case((Entry.entry_type == EntryType.CREDIT, Entry.amount), else_=-Entry.amount)
+
+def entry_day():
+    """UTC calendar day an entry was posted on"""
+    return cast(func.timezone("UTC", Entry.created_at), Date)
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
 class AccountService:
     def __init__(self, db: Session):
         self.db = db
@@ -22,8 +40,8 @@ class AccountService:
         # Create initial balance record
         balance = Balance(
             account_id=account.id,
-            ledger_balance=0.00,
-            available_balance=0.00
+            ledger_balance=ZERO,
+            available_balance=ZERO
         )
         self.db.add(balance)
         self.db.commit()
@@ -42,11 +60,127 @@ class AccountService:
     def get_customer_accounts(self, customer_id: str) -> List[Account]:
         return self.db.query(Account).filter(Account.customer_id == customer_id).all()
     
-    def update_balance(self, account_id: str, ledger_balance: float, available_balance: float) -> Optional[Balance]:
+    def update_balance(self, account_id: str, ledger_balance: Decimal, available_balance: Decimal) -> Optional[Balance]:
         balance = self.get_balance(account_id)
         if balance:
-            balance.ledger_balance = ledger_balance
-            balance.available_balance = available_balance
+            balance.ledger_balance = to_money(ledger_balance)
+            balance.available_balance = to_money(available_balance)
             self.db.commit()
             self.db.refresh(balance)
-        return balance
\ No newline at end of file
+        return balance
+    
+    def balance_as_of(self, account_id: str, as_of: datetime) -> Decimal:
+        """Ledger balance including every entry posted at or before as_of"""
+        if as_of.tzinfo is None:
+            as_of = as_of.replace(tzinfo=timezone.utc)
+        
+        # Nearest snapshot that closed before as_of's day, then only the delta since
+        snapshot = self.db.query(BalanceSnapshot).filter(
+            BalanceSnapshot.account_id == account_id,
+            BalanceSnapshot.snapshot_date < as_of.astimezone(timezone.utc).date()
+        ).order_by(BalanceSnapshot.snapshot_date.desc()).first()
+        
+        delta = select(func.coalesce(func.sum(signed_entry_amount()), 0)).where(
+            Entry.account_id == account_id,
+            Entry.created_at <= as_of
+        )
+        if snapshot:
+            delta = delta.where(Entry.created_at >= _day_start(snapshot.snapshot_date + timedelta(days=1)))
+        
+        opening = snapshot.closing_balance if snapshot else ZERO
+        return to_money(to_money(opening) + to_money(self.db.execute(delta).scalar()))
+    
+    def build_balance_snapshots(self, through: Optional[date] = None) -> int:
+        """Snapshot closing balances for each settled day since the last run, redoing the last one
+        
+        Entries are stamped with the start of their transaction, so a posting that began before
+        midnight can commit after the day was snapshotted. Days are only taken once they have been
+        over for the settle lag, and the last snapshotted day is rebuilt to pick up any stragglers.
+        """
+        settled = (
+            datetime.now(timezone.utc) - timedelta(seconds=settings.balance_snapshot_settle_seconds)
+        ).date() - timedelta(days=1)
+        through = min(through or settled, settled)
+        
+        last_day = self.db.query(func.max(BalanceSnapshot.snapshot_date)).scalar()
+        if last_day:
+            day = last_day
+        else:
+            day = self.db.query(func.min(entry_day())).scalar()
+            if day is None:
+                return 0
+        
+        created = 0
+        while day <= through:
+            if day == last_day:
+                self.db.execute(delete(BalanceSnapshot).where(BalanceSnapshot.snapshot_date == day))
+            created += self._snapshot_day(day)
+            # One commit per day keeps the job restartable from the last finished day
+            self.db.commit()
+            day += timedelta(days=1)
+        return created
+    
+    def _snapshot_day(self, day: date) -> int:
+        deltas = select(
+            Entry.account_id,
+            func.sum(signed_entry_amount()).label("delta")
+        ).where(
+            Entry.created_at >= _day_start(day),
+            Entry.created_at < _day_start(day + timedelta(days=1))
+        ).group_by(Entry.account_id).subquery()
+        
+        previous_day = select(
+            BalanceSnapshot.account_id,
+            func.max(BalanceSnapshot.snapshot_date).label("snapshot_date")
+        ).join(deltas, deltas.c.account_id == BalanceSnapshot.account_id).where(
+            BalanceSnapshot.snapshot_date < day
+        ).group_by(BalanceSnapshot.account_id).subquery()
+        
+        previous = select(BalanceSnapshot.account_id, BalanceSnapshot.closing_balance).join(
+            previous_day,
+            (previous_day.c.account_id == BalanceSnapshot.account_id) &
+            (previous_day.c.snapshot_date == BalanceSnapshot.snapshot_date)
+        ).subquery()
+        
+        rows = select(
+            deltas.c.account_id,
+            literal(day, Date),
+            func.coalesce(previous.c.closing_balance, 0) + deltas.c.delta
+        ).select_from(deltas).outerjoin(previous, previous.c.account_id == deltas.c.account_id)
+        
+        result = self.db.execute(
+            insert(BalanceSnapshot).from_select(
+                ["account_id", "snapshot_date", "closing_balance"], rows
+            )
+        )
+        return result.rowcount
+
+class AsyncAccountService:
+    """AccountService for async routes"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_account(self, account_data: AccountCreate) -> Account:
+        account = Account(
+            account_number=f"AC{str(uuid.uuid4().int)[:10]}",
+            **account_data.dict()
+        )
+        self.db.add(account)
+        await self.db.flush()
+        self.db.add(Balance(account_id=account.id, ledger_balance=ZERO, available_balance=ZERO))
+        await self.db.commit()
+        await self.db.refresh(account)
+        return account
+    
+    async def get_account(self, account_id: str) -> Optional[Account]:
+        return await self.db.scalar(select(Account).where(Account.id == account_id))
+    
+    async def get_account_by_number(self, account_number: str) -> Optional[Account]:
+        return await self.db.scalar(select(Account).where(Account.account_number == account_number))
+    
+    async def get_balance(self, account_id: str) -> Optional[Balance]:
+        return await self.db.scalar(select(Balance).where(Balance.account_id == account_id))
+    
+    async def get_customer_accounts(self, customer_id: str) -> List[Account]:
+        return (await self.db.scalars(select(Account).where(Account.customer_id == customer_id))).all()
\ No newline at end of file
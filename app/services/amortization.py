@@ -0,0 +1,105 @@
+"""
+Level-payment amortization schedules computed exactly in Decimal cents
+"""
+
+from calendar import monthrange
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from app.core.money import MONEY_CONTEXT, to_money
+
+class LoanTerms(NamedTuple):
+    principal: Decimal
+    annual_rate: Decimal  # Percent, as stored on Loan.interest_rate
+    months: int
+    start_date: date
+
+class Installment(NamedTuple):
+    number: int
+    due_date: date
+    payment: Decimal
+    principal: Decimal
+    interest: Decimal
+    remaining_balance: Decimal
+
+def monthly_rate(annual_rate: Decimal) -> Decimal:
+    """Monthly rate as a fraction from an annual percentage"""
+    return MONEY_CONTEXT.divide(Decimal(annual_rate), Decimal(1200))
+
+def monthly_payment(principal: Decimal, rate: Decimal, months: int) -> Decimal:
+    """Level payment that amortizes principal over months at the monthly rate, in cents"""
+    if rate == 0:
+        return to_money(MONEY_CONTEXT.divide(Decimal(principal), months))
+    return to_money(MONEY_CONTEXT.multiply(Decimal(principal), _annuity_factor(rate, months)))
+
+def add_months(start: date, months: int) -> date:
+    """Same day months later, clamped to the end of shorter months"""
+    year, month = divmod(start.month - 1 + months, 12)
+    year += start.year
+    return date(year, month + 1, min(start.day, monthrange(year, month + 1)[1]))
+
+def _annuity_factor(rate: Decimal, months: int) -> Decimal:
+    growth = MONEY_CONTEXT.power(1 + rate, months)
+    return MONEY_CONTEXT.divide(rate * growth, growth - 1)
+
+def amortization_schedule(terms: LoanTerms) -> List[Installment]:
+    return amortization_schedules([terms])[0]
+
+def amortization_schedules(portfolio: List[LoanTerms]) -> List[List[Installment]]:
+    """Full schedules for many loans at once"""
+    schedules: List[List[Installment]] = [[] for _ in portfolio]
+    for index, installment in iter_installments(portfolio):
+        schedules[index].append(installment)
+    return schedules
+
+def iter_installments(portfolio: List[LoanTerms]) -> Iterator[Tuple[int, Installment]]:
+    """Yield (loan index, installment), advancing one period at a time across the whole portfolio
+
+    Payments are solved once per distinct (rate, term) pair, which is what keeps
+    portfolio-sized batches cheap: loan books reuse a handful of products.
+    """
+    factors: Dict[Tuple[Decimal, int], Decimal] = {}
+    rates = [monthly_rate(terms.annual_rate) for terms in portfolio]
+    payments = []
+    for terms, rate in zip(portfolio, rates):
+        if rate == 0:
+            payments.append(monthly_payment(terms.principal, rate, terms.months))
+            continue
+        key = (rate, terms.months)
+        if key not in factors:
+            factors[key] = _annuity_factor(rate, terms.months)
+        payments.append(to_money(MONEY_CONTEXT.multiply(Decimal(terms.principal), factors[key])))
+
+    # Loans disbursed on the same day share one due-date calendar
+    calendars: Dict[date, List[date]] = {}
+    for terms in portfolio:
+        known = calendars.setdefault(terms.start_date, [])
+        known.extend(add_months(terms.start_date, number) for number in range(len(known) + 1, terms.months + 1))
+
+    balances = [to_money(terms.principal) for terms in portfolio]
+    longest = max((terms.months for terms in portfolio), default=0)
+
+    for number in range(1, longest + 1):
+        for index, terms in enumerate(portfolio):
+            if number > terms.months:
+                continue
+            interest = to_money(balances[index] * rates[index])
+            if number == terms.months:
+                # The final installment absorbs every rounding cent so the loan closes at exactly zero
+                principal = balances[index]
+            else:
+                principal = min(payments[index] - interest, balances[index])
+            balances[index] -= principal
+            yield index, Installment(
+                number=number,
+                due_date=calendars[terms.start_date][number - 1],
+                payment=principal + interest,
+                principal=principal,
+                interest=interest,
+                remaining_balance=balances[index]
+            )
+
+def loan_terms(principal: Decimal, annual_rate: Decimal, term_months, start: Optional[datetime]) -> LoanTerms:
+    """Terms for a Loan row; schedules run from disbursement, or today for undisbursed loans"""
+    start_date = start.date() if isinstance(start, datetime) else (start or date.today())
+    return LoanTerms(to_money(principal), Decimal(annual_rate), int(term_months), start_date)
\ No newline at end of file
@@ -6,6 +6,8 @@ from sqlalchemy.orm import Session
 from app.models.user import User, UserStatus
 from app.schemas.user import UserCreate
 from app.core.config import settings
+from app.core.principal_cache import principal_cache
+from app.core.token_versions import token_versions
 import uuid
 import hashlib
 
@@ -48,10 +50,20 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
+def principal_claims(user: User) -> dict:
+    """Claims that let get_current_user trust the token without loading the user"""
+    return {
+        "sub": user.username,
+        "uid": str(user.id),
+        "role": user.role.value,
+        "status": user.status.value,
+        "ver": user.token_version
+    }
+
 def create_user(db: Session, user_data: UserCreate) -> User:
     hashed_password = get_password_hash(user_data.password)
     user = User(
@@ -79,7 +91,7 @@ def change_password(db: Session, username: str, current_password: str, new_passw
         return False
     
     user.password_hash = get_password_hash(new_password)
-    db.commit()
+    _commit_and_revoke_tokens(db, username)
     return True
 
 def reset_password(db: Session, username: str, new_password: str) -> bool:
@@ -88,9 +100,25 @@ def reset_password(db: Session, username: str, new_password: str) -> bool:
         return False
     
     user.password_hash = get_password_hash(new_password)
-    db.commit()
+    _commit_and_revoke_tokens(db, username)
     return True
 
+def set_user_status(db: Session, username: str, status: UserStatus) -> Optional[User]:
+    user = get_user_by_username(db, username)
+    if not user:
+        return None
+    
+    user.status = status
+    _commit_and_revoke_tokens(db, username)
+    return user
+
+def _commit_and_revoke_tokens(db: Session, username: str):
+    """Commit with the user's token_version bumped, so every token issued so far stops working"""
+    version = token_versions.bump(db, username)
+    db.commit()
+    token_versions.bumped(username, version)
+    principal_cache.invalidate(username)
+
 def verify_token(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
@@ -0,0 +1,164 @@
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+from app.models.account import Account, AccountStatus
+from app.models.payment import BillPayment, Biller, BillerSettlement, PaymentStatus
+from app.models.transaction import Transaction, TransactionType
+from app.services.transaction import TransactionService
+from app.core.money import to_money
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+import uuid
+
+class BillPaymentService:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def create_biller(self, biller_code: str, name: str, settlement_account_id: str, payout_account_id: str) -> Biller:
+        if self.db.query(Biller).filter(Biller.biller_code == biller_code).first():
+            raise ValueError("Biller code already registered")
+        accounts = {
+            str(account.id): account for account in self.db.query(Account).filter(
+                Account.id.in_([settlement_account_id, payout_account_id])
+            )
+        }
+        settlement_account = accounts.get(str(settlement_account_id))
+        payout_account = accounts.get(str(payout_account_id))
+        if not settlement_account or not payout_account:
+            raise ValueError("Settlement or payout account not found")
+        if settlement_account.id == payout_account.id:
+            raise ValueError("Settlement and payout accounts must differ")
+        if settlement_account.currency != payout_account.currency:
+            raise ValueError("Settlement and payout accounts must share a currency")
+        
+        biller = Biller(
+            biller_code=biller_code,
+            name=name,
+            settlement_account_id=settlement_account.id,
+            payout_account_id=payout_account.id
+        )
+        self.db.add(biller)
+        self.db.commit()
+        self.db.refresh(biller)
+        return biller
+    
+    def list_billers(self, skip: int = 0, limit: int = 100) -> List[Biller]:
+        return self.db.query(Biller).order_by(Biller.biller_code).offset(skip).limit(limit).all()
+    
+    def pay_bill(self, account_id: str, biller_code: str, bill_account_number: str, amount: Decimal,
+                 currency: str = "USD", biller_name: Optional[str] = None) -> BillPayment:
+        """Debit the payer and credit the biller's settlement account in one ledger transaction"""
+        amount = to_money(amount)
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+        biller = self.db.query(Biller).filter(Biller.biller_code == biller_code, Biller.is_active == True).first()
+        if not biller:
+            raise ValueError("Unknown biller")
+        account = self.db.query(Account).filter(Account.id == account_id).first()
+        if not account:
+            raise ValueError("Account not found")
+        if account.status != AccountStatus.ACTIVE:
+            raise ValueError("Account is not active")
+        if currency != account.currency or currency != biller.settlement_account.currency:
+            raise ValueError(f"Bill must be paid in {account.currency}")
+        
+        reference = f"BILL{str(uuid.uuid4().int)[:10]}"
+        transaction = Transaction(
+            transaction_id=f"TXN{str(uuid.uuid4().int)[:12]}",
+            from_account_id=account.id,
+            to_account_id=biller.settlement_account_id,
+            amount=amount,
+            currency=currency,
+            transaction_type=TransactionType.TRANSFER,
+            description=f"Bill payment {reference}: {biller.name} {bill_account_number}"
+        )
+        self.db.add(transaction)
+        self.db.flush()
+        posted = TransactionService(self.db).post_transactions([transaction], require_funds=True)
+        
+        bill_payment = BillPayment(
+            payment_reference=reference,
+            account_id=account.id,
+            biller_code=biller.biller_code,
+            biller_name=biller_name or biller.name,
+            bill_account_number=bill_account_number,
+            amount=amount,
+            currency=currency,
+            status=PaymentStatus.COMPLETED if posted else PaymentStatus.FAILED,
+            transaction_id=transaction.id
+        )
+        self.db.add(bill_payment)
+        self.db.commit()
+        if not posted:
+            raise ValueError("Insufficient funds")
+        self.db.refresh(bill_payment)
+        return bill_payment
+    
+    def sweep_settlements(self, cutoff: Optional[datetime] = None) -> Dict[str, int]:
+        """Move each biller's unsettled payments on to its payout account in one transfer
+        
+        Returns the number of payments settled per biller code. Billers are settled
+        and committed one at a time, so ledger writes scale with billers, not bills.
+        """
+        cutoff = cutoff or datetime.utcnow()
+        # Legacy payments were never posted to the ledger, so there is nothing to sweep for them
+        unsettled = (
+            BillPayment.status == PaymentStatus.COMPLETED,
+            BillPayment.settlement_id.is_(None),
+            BillPayment.transaction_id.isnot(None),
+            BillPayment.payment_date <= cutoff
+        )
+        billers = self.db.query(Biller).filter(
+            Biller.biller_code.in_(select(BillPayment.biller_code).where(*unsettled).distinct())
+        ).order_by(Biller.biller_code).all()
+        
+        settled = {}
+        for biller in billers:
+            count = self._settle_biller(biller, unsettled)
+            if count:
+                settled[biller.biller_code] = count
+        return settled
+    
+    def _settle_biller(self, biller: Biller, unsettled) -> int:
+        settlement = BillerSettlement(biller_id=biller.id, amount=0, payment_count=0)
+        self.db.add(settlement)
+        self.db.flush()
+        
+        # Claiming by setting settlement_id means a concurrent sweep can't take the same payments
+        self.db.execute(
+            update(BillPayment).where(BillPayment.biller_code == biller.biller_code, *unsettled).values(
+                settlement_id=settlement.id
+            ).execution_options(synchronize_session=False)
+        )
+        count, total = self.db.execute(
+            select(func.count(), func.coalesce(func.sum(BillPayment.amount), 0)).where(
+                BillPayment.settlement_id == settlement.id
+            )
+        ).one()
+        if not count:
+            self.db.rollback()
+            return 0
+        
+        transaction = Transaction(
+            transaction_id=f"TXN{str(uuid.uuid4().int)[:12]}",
+            from_account_id=biller.settlement_account_id,
+            to_account_id=biller.payout_account_id,
+            amount=total,
+            currency=biller.settlement_account.currency,
+            transaction_type=TransactionType.TRANSFER,
+            description=f"Biller settlement {biller.biller_code}: {count} payments"
+        )
+        self.db.add(transaction)
+        self.db.flush()
+        TransactionService(self.db).post_transactions([transaction])
+        
+        settlement.amount = total
+        settlement.payment_count = count
+        settlement.transaction_id = transaction.id
+        self.db.commit()
+        return count
+    
+    def get_settlements(self, biller_code: str, skip: int = 0, limit: int = 100) -> List[BillerSettlement]:
+        return self.db.query(BillerSettlement).join(Biller).filter(
+            Biller.biller_code == biller_code
+        ).order_by(BillerSettlement.settled_at.desc()).offset(skip).limit(limit).all()
\ No newline at end of file
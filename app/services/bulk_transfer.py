@@ -0,0 +1,319 @@
+"""
+Bulk transfer (payroll) files: streamed validation, batched account resolution and bulk posting
+"""
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.account import Account, AccountStatus
+from app.models.payment import BulkTransferJob, BulkTransferItem, PaymentStatus
+from app.models.transaction import Transaction, TransactionType
+from app.services.transaction import TransactionService
+from app.core.config import settings
+from app.core.money import add_money, to_money
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+import csv
+import json
+import os
+import uuid
+
+# File extension -> stored file format
+BULK_FILE_FORMATS = {"csv": "CSV", "jsonl": "JSONL", "ndjson": "JSONL"}
+
+REQUIRED_COLUMNS = ("account_number", "amount")
+
+# Largest amount a DECIMAL(15, 2) column holds
+MAX_AMOUNT = Decimal("9999999999999.99")
+
+class PayrollRow(NamedTuple):
+    row_number: int
+    account_number: str
+    amount: Optional[Decimal]
+    reference: Optional[str]
+    currency: Optional[str]
+    error: Optional[str]
+
+def read_rows(stream: TextIO, file_format: str) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """Yield (row number, record) one line at a time; unparsable lines come back as None"""
+    if file_format == "CSV":
+        reader = csv.DictReader(stream)
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+        missing = [column for column in REQUIRED_COLUMNS if column not in reader.fieldnames]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        for number, record in enumerate(reader, start=1):
+            yield number, record
+        return
+    
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            # Decimal straight from the text so amounts never pass through float
+            record = json.loads(line, parse_float=Decimal)
+        except ValueError:
+            record = None
+        yield number, record if isinstance(record, dict) else None
+
+def validate_rows(records: Iterable[Tuple[int, Optional[Dict]]]) -> Iterator[PayrollRow]:
+    """Check each record on its own; anything needing the database is left to the batch lookup"""
+    for number, record in records:
+        yield _validate(number, record)
+
+def _validate(number: int, record: Optional[Dict]) -> PayrollRow:
+    if record is None:
+        return PayrollRow(number, "", None, None, None, "Malformed row")
+    
+    account_number = str(record.get("account_number") or "").strip()
+    reference = str(record.get("reference") or "").strip() or None
+    currency = str(record.get("currency") or "").strip().upper() or None
+    
+    def rejected(error: str) -> PayrollRow:
+        return PayrollRow(number, account_number[:50], None, reference and reference[:100], currency, error)
+    
+    if not account_number:
+        return rejected("Missing account number")
+    try:
+        amount = Decimal(str(record.get("amount")).strip())
+    except InvalidOperation:
+        return rejected("Invalid amount")
+    if not amount.is_finite() or amount <= 0:
+        return rejected("Amount must be positive")
+    if amount != to_money(amount):
+        return rejected("Amount has more than two decimal places")
+    if amount > MAX_AMOUNT:
+        return rejected("Amount is too large")
+    if reference and len(reference) > 100:
+        return rejected("Reference is longer than 100 characters")
+    return PayrollRow(number, account_number[:50], to_money(amount), reference, currency, None)
+
+def batched(rows: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+class BulkTransferService:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def create_job(self, from_account_id: str, file_name: str, file_format: str, file_path: str,
+                   description: Optional[str] = None, created_by=None) -> BulkTransferJob:
+        account = self.db.query(Account).filter(Account.id == from_account_id).first()
+        if not account:
+            raise ValueError("Source account not found")
+        if account.status != AccountStatus.ACTIVE:
+            raise ValueError("Source account is not active")
+        
+        job = BulkTransferJob(
+            job_reference=f"BULK{str(uuid.uuid4().int)[:10]}",
+            from_account_id=account.id,
+            currency=account.currency,
+            description=description,
+            file_name=file_name,
+            file_format=file_format,
+            file_path=file_path,
+            created_by=created_by
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+    
+    def get_job(self, job_id: str) -> Optional[BulkTransferJob]:
+        return self.db.query(BulkTransferJob).filter(BulkTransferJob.id == job_id).first()
+    
+    def get_items(self, job_id: str, status: Optional[PaymentStatus] = None,
+                  skip: int = 0, limit: int = 100) -> List[BulkTransferItem]:
+        query = self.db.query(BulkTransferItem).filter(BulkTransferItem.job_id == job_id)
+        if status:
+            query = query.filter(BulkTransferItem.status == status)
+        return query.order_by(BulkTransferItem.row_number).offset(skip).limit(limit).all()
+    
+    def process(self, job_id: str, batch_size: Optional[int] = None) -> Optional[BulkTransferJob]:
+        """Stage every row of the job's file, then post the debit and the credits
+        
+        Only a PENDING job is claimed, so a redelivered task is a no-op. Each step
+        commits per batch with a heartbeat and records how far it got, so a job
+        handed back by resume_stalled picks up where it stopped without posting
+        anything twice.
+        """
+        batch_size = batch_size or settings.bulk_transfer_batch_size
+        claimed = self.db.execute(
+            update(BulkTransferJob).where(
+                BulkTransferJob.id == job_id,
+                BulkTransferJob.status == PaymentStatus.PENDING
+            ).values(status=PaymentStatus.PROCESSING, heartbeat_at=func.now()).returning(BulkTransferJob.id)
+        ).first()
+        self.db.commit()
+        if not claimed:
+            return None
+        
+        job = self.get_job(job_id)
+        if job.ingested_at is None:
+            try:
+                self._ingest(job, batch_size)
+            except (ValueError, UnicodeDecodeError, csv.Error, OSError) as e:
+                self.db.rollback()
+                return self._fail(job, str(e))
+        return self._post(job, batch_size)
+    
+    def resume_stalled(self, stale_seconds: Optional[int] = None) -> List[str]:
+        """Ids of jobs to queue again: stale PROCESSING jobs, handed back as PENDING, and old PENDING ones
+        
+        A live worker beats on every batch commit, so silence for longer than any
+        batch takes means it died. A job still PENDING that long lost its task at
+        upload; queuing one twice is harmless, since only one task can claim it.
+        """
+        stale_seconds = stale_seconds or settings.bulk_transfer_stale_seconds
+        stale = func.now() - timedelta(seconds=stale_seconds)
+        unqueued = self.db.execute(
+            select(BulkTransferJob.id).where(
+                BulkTransferJob.status == PaymentStatus.PENDING,
+                BulkTransferJob.created_at < stale
+            )
+        ).scalars().all()
+        resumed = self.db.execute(
+            update(BulkTransferJob).where(
+                BulkTransferJob.status == PaymentStatus.PROCESSING,
+                func.coalesce(BulkTransferJob.heartbeat_at, BulkTransferJob.created_at) < stale
+            ).values(status=PaymentStatus.PENDING).returning(BulkTransferJob.id)
+        ).scalars().all()
+        self.db.commit()
+        return [str(job_id) for job_id in [*unqueued, *resumed]]
+    
+    def _ingest(self, job: BulkTransferJob, batch_size: int):
+        with open(job.file_path, newline="", encoding="utf-8-sig") as stream:
+            rows = validate_rows(read_rows(stream, job.file_format))
+            # Rows staged by an earlier attempt are already committed
+            for batch in batched(islice(rows, job.total_rows, None), batch_size):
+                if batch[-1].row_number > settings.bulk_transfer_max_rows:
+                    raise ValueError(f"File has more than {settings.bulk_transfer_max_rows} rows")
+                self._stage(job, batch)
+                job.heartbeat_at = func.now()
+                self.db.commit()
+        job.ingested_at = datetime.utcnow()
+        self.db.commit()
+        # Every row is staged, so a resume never reads the file again
+        try:
+            os.remove(job.file_path)
+        except OSError:
+            pass
+    
+    def _stage(self, job: BulkTransferJob, batch: List[PayrollRow]):
+        # One lookup resolves every account number in the batch
+        numbers = {row.account_number for row in batch if row.error is None}
+        accounts = {
+            account.account_number: account for account in self.db.execute(
+                select(Account.id, Account.account_number, Account.currency, Account.status).where(
+                    Account.account_number.in_(numbers)
+                )
+            )
+        } if numbers else {}
+        
+        items, total = [], Decimal("0.00")
+        for row in batch:
+            account = accounts.get(row.account_number)
+            error = row.error
+            if error is None:
+                if account is None:
+                    error = "Unknown account"
+                elif account.status != AccountStatus.ACTIVE:
+                    error = "Account is not active"
+                elif account.currency != job.currency or (row.currency and row.currency != job.currency):
+                    error = f"Currency must be {job.currency}"
+                elif account.id == job.from_account_id:
+                    error = "Cannot credit the source account"
+            
+            if error is None:
+                total = add_money(total, row.amount)
+            items.append({
+                "job_id": job.id,
+                "row_number": row.row_number,
+                "account_number": row.account_number,
+                "account_id": account.id if account and error is None else None,
+                "amount": row.amount,
+                "reference": row.reference,
+                "status": PaymentStatus.PENDING if error is None else PaymentStatus.FAILED,
+                "failure_reason": error
+            })
+        
+        # Core insert: one multi-row statement per page instead of the ORM's per-key-set grouping
+        self.db.execute(pg_insert(BulkTransferItem.__table__).on_conflict_do_nothing(), items)
+        rejected = sum(1 for item in items if item["failure_reason"])
+        job.total_rows += len(items)
+        job.rejected_rows += rejected
+        job.valid_rows += len(items) - rejected
+        job.total_amount = add_money(job.total_amount, total)
+    
+    def _post(self, job: BulkTransferJob, batch_size: int) -> BulkTransferJob:
+        service = TransactionService(self.db)
+        if job.transaction_id is None:
+            if job.valid_rows == 0:
+                return self._fail(job, "No valid rows")
+            
+            debit = Transaction(
+                transaction_id=f"BLK{str(uuid.uuid4().int)[:12]}",
+                from_account_id=job.from_account_id,
+                amount=job.total_amount,
+                currency=job.currency,
+                transaction_type=TransactionType.TRANSFER,
+                description=f"Bulk transfer {job.job_reference}: {job.description or job.file_name}"
+            )
+            self.db.add(debit)
+            self.db.flush()
+            if not service.post_transactions([debit], require_funds=True):
+                self.db.commit()
+                return self._fail(job, "Insufficient funds")
+            job.transaction_id = debit.id
+            self.db.commit()
+        
+        debit = self.db.get(Transaction, job.transaction_id)
+        while True:
+            pending = select(BulkTransferItem.row_number).where(
+                BulkTransferItem.job_id == job.id,
+                BulkTransferItem.status == PaymentStatus.PENDING
+            ).order_by(BulkTransferItem.row_number).limit(batch_size).with_for_update(skip_locked=True).cte("pending")
+            # Flag the chunk PROCESSING so the statements below select it by status alone;
+            # it becomes COMPLETED in the same commit, so no other worker ever sees the flag.
+            # The CTE locks its rows once; as a subquery it can be rescanned per row, and a
+            # rescan skips the rows already flagged and claims the next ones, past batch_size
+            claimed = self.db.execute(
+                update(BulkTransferItem).where(
+                    BulkTransferItem.job_id == job.id,
+                    BulkTransferItem.row_number.in_(select(pending.c.row_number))
+                ).values(status=PaymentStatus.PROCESSING).execution_options(synchronize_session=False)
+            ).rowcount
+            if not claimed:
+                break
+            
+            in_chunk = (BulkTransferItem.job_id == job.id, BulkTransferItem.status == PaymentStatus.PROCESSING)
+            service.post_credits(debit, select(BulkTransferItem.account_id, BulkTransferItem.amount).where(*in_chunk))
+            amounts = self.db.execute(
+                update(BulkTransferItem).where(*in_chunk).values(
+                    status=PaymentStatus.COMPLETED
+                ).returning(BulkTransferItem.amount).execution_options(synchronize_session=False)
+            ).scalars().all()
+            job.credited_rows += len(amounts)
+            job.credited_amount = add_money(job.credited_amount, *amounts)
+            job.heartbeat_at = func.now()
+            self.db.commit()
+        
+        job.status = PaymentStatus.COMPLETED
+        job.completed_at = datetime.utcnow()
+        self.db.commit()
+        return job
+    
+    def _fail(self, job: BulkTransferJob, reason: str) -> BulkTransferJob:
+        job.status = PaymentStatus.FAILED
+        job.failure_reason = reason
+        job.completed_at = datetime.utcnow()
+        self.db.commit()
+        return job
\ No newline at end of file
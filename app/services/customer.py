@@ -1,4 +1,6 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from app.models.customer import Customer, KYCStatus
 from app.schemas.customer import CustomerCreate, CustomerOnboarding, KYCStatusUpdate
 from typing import List, Optional
@@ -61,4 +63,61 @@ class CustomerService:
         return customer
     
     def get_pending_kyc_customers(self) -> List[Customer]:
-        return self.db.query(Customer).filter(Customer.kyc_status == KYCStatus.PENDING).all()
\ No newline at end of file
+        return self.db.query(Customer).filter(Customer.kyc_status == KYCStatus.PENDING).all()
+
+class AsyncCustomerService:
+    """CustomerService for async routes
+    
+    Responses include kyc_documents, so every load selects them eagerly: a lazy
+    load can't be awaited from inside response serialization.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    def _customers(self):
+        return select(Customer).options(selectinload(Customer.kyc_documents))
+    
+    async def _reload(self, customer: Customer) -> Customer:
+        # Picks up server-side defaults and onupdate values along with the documents
+        return await self.db.scalar(
+            self._customers().where(Customer.id == customer.id).execution_options(populate_existing=True)
+        )
+    
+    async def create_customer(self, customer_data: CustomerCreate) -> Customer:
+        customer = Customer(
+            customer_number=f"CX{str(uuid.uuid4().int)[:8]}",
+            **customer_data.dict()
+        )
+        self.db.add(customer)
+        await self.db.commit()
+        return await self._reload(customer)
+    
+    async def onboard_customer(self, customer_data: CustomerOnboarding) -> Customer:
+        customer = Customer(
+            customer_number=f"CX{str(uuid.uuid4().int)[:8]}",
+            **customer_data.dict(exclude_none=True)
+        )
+        self.db.add(customer)
+        await self.db.commit()
+        return await self._reload(customer)
+    
+    async def get_customer(self, customer_id: str) -> Optional[Customer]:
+        return await self.db.scalar(self._customers().where(Customer.id == customer_id))
+    
+    async def get_customer_by_number(self, customer_number: str) -> Optional[Customer]:
+        return await self.db.scalar(self._customers().where(Customer.customer_number == customer_number))
+    
+    async def list_customers(self, skip: int = 0, limit: int = 100) -> List[Customer]:
+        return (await self.db.scalars(self._customers().offset(skip).limit(limit))).all()
+    
+    async def update_kyc_status(self, customer_id: str, status_update: KYCStatusUpdate) -> Optional[Customer]:
+        customer = await self.get_customer(customer_id)
+        if customer:
+            customer.kyc_status = status_update.kyc_status
+            await self.db.commit()
+            customer = await self._reload(customer)
+        return customer
+    
+    async def get_pending_kyc_customers(self) -> List[Customer]:
+        return (await self.db.scalars(self._customers().where(Customer.kyc_status == KYCStatus.PENDING))).all()
\ No newline at end of file
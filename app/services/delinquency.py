@@ -0,0 +1,136 @@
+from sqlalchemy import select, delete, insert, func, case, cast, literal, Date, Integer
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.loan import Loan, LoanPayment, LoanStatus, LoanDelinquency, LoanAgingSummary, AgingBucket
+from app.core.config import settings
+from datetime import date, datetime
+from typing import List, Optional
+
+DELINQUENCY_COLUMNS = [
+    "loan_id", "as_of_date", "installments_due", "amount_due", "amount_paid",
+    "arrears_amount", "days_past_due", "aging_bucket", "outstanding_balance"
+]
+
+def _add_months(start, months):
+    """PostgreSQL date arithmetic: clamps to month end exactly like the amortization calendar"""
+    return cast(start + func.make_interval(0, months), Date)
+
+class DelinquencyService:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def refresh(self, as_of: Optional[date] = None, chunk_size: Optional[int] = None) -> int:
+        """Recompute arrears, days past due and aging bucket for every active loan"""
+        as_of = as_of or datetime.utcnow().date()
+        chunk_size = chunk_size or settings.loan_delinquency_chunk_size
+        
+        refreshed = 0
+        last_loan_id = None
+        while True:
+            loan_ids = self._refresh_chunk(as_of, last_loan_id, chunk_size)
+            if not loan_ids:
+                break
+            last_loan_id = max(loan_ids)
+            refreshed += len(loan_ids)
+            self.db.commit()
+        
+        # Loans that closed or defaulted since the last run were not touched this time
+        self.db.execute(delete(LoanDelinquency).where(LoanDelinquency.as_of_date < as_of))
+        self._summarize(as_of)
+        self.db.commit()
+        return refreshed
+    
+    def _refresh_chunk(self, as_of: date, after_loan_id, chunk_size: int) -> List:
+        as_of_date = literal(as_of, Date)
+        start_date = cast(func.timezone("UTC", Loan.disbursement_date), Date)
+        age = func.age(as_of_date, start_date)
+        
+        paid = select(func.coalesce(func.sum(LoanPayment.amount_paid), 0)).where(
+            LoanPayment.loan_id == Loan.id
+        ).correlate(Loan).scalar_subquery()
+        
+        loans = select(
+            Loan.id.label("loan_id"),
+            Loan.monthly_payment,
+            Loan.outstanding_balance,
+            start_date.label("start_date"),
+            cast(Loan.term_months, Integer).label("term"),
+            paid.label("amount_paid"),
+            (func.extract("year", age) * 12 + func.extract("month", age)).label("whole_months")
+        ).where(
+            Loan.status == LoanStatus.ACTIVE,
+            Loan.disbursement_date.isnot(None)
+        )
+        if after_loan_id is not None:
+            loans = loans.where(Loan.id > after_loan_id)
+        loans = loans.order_by(Loan.id).limit(chunk_size).subquery()
+        
+        # age() undercounts when the anniversary was clamped to a shorter month's end
+        elapsed = case(
+            (_add_months(loans.c.start_date, cast(loans.c.whole_months, Integer) + 1) <= as_of_date,
+             loans.c.whole_months + 1),
+            else_=loans.c.whole_months
+        )
+        due = select(
+            loans,
+            func.greatest(func.least(elapsed, loans.c.term), 0).label("installments_due"),
+            # Installments the payments so far cover in full
+            func.floor(loans.c.amount_paid / func.nullif(loans.c.monthly_payment, 0)).label("covered")
+        ).subquery()
+        
+        amount_due = due.c.installments_due * due.c.monthly_payment
+        arrears = func.greatest(amount_due - due.c.amount_paid, 0)
+        oldest_unpaid = _add_months(due.c.start_date, cast(func.coalesce(due.c.covered, 0), Integer) + 1)
+        days_past_due = case((arrears > 0, as_of_date - oldest_unpaid), else_=0)
+        bucket = case(
+            (days_past_due <= 0, AgingBucket.CURRENT.value),
+            (days_past_due <= 30, AgingBucket.DPD_1_30.value),
+            (days_past_due <= 60, AgingBucket.DPD_31_60.value),
+            (days_past_due <= 90, AgingBucket.DPD_61_90.value),
+            else_=AgingBucket.DPD_90_PLUS.value
+        )
+        
+        rows = select(
+            due.c.loan_id,
+            as_of_date,
+            cast(due.c.installments_due, Integer),
+            amount_due,
+            due.c.amount_paid,
+            arrears,
+            days_past_due,
+            cast(bucket, LoanDelinquency.aging_bucket.type),
+            func.coalesce(due.c.outstanding_balance, 0)
+        )
+        
+        upsert = pg_insert(LoanDelinquency).from_select(DELINQUENCY_COLUMNS, rows)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[LoanDelinquency.loan_id],
+            set_={
+                **{name: upsert.excluded[name] for name in DELINQUENCY_COLUMNS[1:]},
+                "updated_at": func.now()
+            }
+        ).returning(LoanDelinquency.loan_id)
+        return self.db.execute(upsert).scalars().all()
+    
+    def _summarize(self, as_of: date):
+        self.db.execute(delete(LoanAgingSummary).where(LoanAgingSummary.as_of_date == as_of))
+        totals = select(
+            LoanDelinquency.as_of_date,
+            LoanDelinquency.aging_bucket,
+            func.count(),
+            func.sum(LoanDelinquency.outstanding_balance),
+            func.sum(LoanDelinquency.arrears_amount)
+        ).where(LoanDelinquency.as_of_date == as_of).group_by(
+            LoanDelinquency.as_of_date, LoanDelinquency.aging_bucket
+        )
+        self.db.execute(insert(LoanAgingSummary).from_select(
+            ["as_of_date", "aging_bucket", "loan_count", "outstanding_balance", "arrears_amount"], totals
+        ))
+    
+    def get_aging_summary(self, as_of: Optional[date] = None) -> List[LoanAgingSummary]:
+        """Bucket totals for as_of, or for the latest run"""
+        if as_of is None:
+            as_of = self.db.query(func.max(LoanAgingSummary.as_of_date)).scalar()
+        return self.db.query(LoanAgingSummary).filter(
+            LoanAgingSummary.as_of_date == as_of
+        ).order_by(LoanAgingSummary.aging_bucket).all()
\ No newline at end of file
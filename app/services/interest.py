@@ -1,11 +1,147 @@
+from sqlalchemy import select, insert, update, values, column, exists, func, DECIMAL
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
 from sqlalchemy.orm import Session
-from app.models.interest import InterestRate, InterestPosting, InterestType, InterestFrequency
-from app.models.account import Account, Balance, AccountType
-from app.models.transaction import Transaction, TransactionType
+from app.models.interest import InterestRate, InterestPosting, InterestAccrual, InterestAccrualRun, InterestType, InterestFrequency
+from app.models.account import Account, Balance, BalanceSnapshot, AccountType, AccountStatus
+from app.models.transaction import Transaction, TransactionType, TransactionStatus, Entry, EntryType
+from app.services.account import _day_start
+from app.core.config import settings
+from app.core.money import to_money, add_money
+from app.core.redis_client import get_redis, get_subscriber_redis, redis_breaker
+from bisect import bisect_right
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import redis
+import threading
+import time
 import uuid
 
+DAYS_IN_YEAR = 365
+
+# Daily accruals keep sub-cent precision; only the monthly total is rounded to cents
+ACCRUAL_QUANTUM = Decimal("0.00000001")
+
+RATE_INVALIDATION_CHANNEL = "interest-rates:invalidate"
+
+class RateTier(NamedTuple):
+    id: uuid.UUID
+    base_rate: Decimal
+    min_balance: Decimal
+    effective_date: datetime
+    end_date: Optional[datetime]
+
+class RateTierCache:
+    """Per-process cache of active interest rate tiers with bisect lookup by balance"""
+    
+    def __init__(self, max_age_seconds: int, listen: bool = False):
+        self.max_age_seconds = max_age_seconds
+        self.listen = listen
+        self._lock = threading.Lock()
+        self._rates: Optional[Dict[InterestType, List[RateTier]]] = None
+        self._loaded_at = 0.0
+        # Per type: (valid_from, valid_until, ascending floors, tiers) for the set of rates in effect
+        self._windows: Dict[InterestType, Tuple[datetime, datetime, List[Decimal], List[RateTier]]] = {}
+        self._listener: Optional[threading.Thread] = None
+    
+    def lookup(self, db: Session, interest_type: InterestType, balance: Decimal,
+               at: datetime) -> Optional[RateTier]:
+        """Tier with the highest balance floor at or below balance, among rates in effect at at"""
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        self._start_listener()
+        _, _, floors, tiers = self._window(db, interest_type, at)
+        index = bisect_right(floors, balance) - 1
+        return tiers[index] if index >= 0 else None
+    
+    def invalidate(self, broadcast: bool = False):
+        """Drop cached tiers, optionally telling every other worker to do the same"""
+        with self._lock:
+            self._rates = None
+            self._windows = {}
+        if broadcast and self.listen:
+            try:
+                get_redis().publish(RATE_INVALIDATION_CHANNEL, "1")
+            except Exception as e:
+                print(f"Failed to broadcast interest rate invalidation: {e}")
+    
+    def _window(self, db: Session, interest_type: InterestType, at: datetime):
+        with self._lock:
+            if self._rates is None or time.monotonic() - self._loaded_at > self.max_age_seconds:
+                self._load(db)
+            
+            window = self._windows.get(interest_type)
+            # Rebuild only when at crosses an effective_date or end_date boundary
+            if window is None or not window[0] <= at < window[1]:
+                window = self._build_window(interest_type, at)
+                self._windows[interest_type] = window
+            return window
+    
+    def _load(self, db: Session):
+        rates: Dict[InterestType, List[RateTier]] = {}
+        for rate in db.query(InterestRate).filter(InterestRate.is_active == True):
+            rates.setdefault(rate.interest_type, []).append(RateTier(
+                rate.id, rate.base_rate, to_money(rate.min_balance), rate.effective_date, rate.end_date
+            ))
+        self._rates = rates
+        self._windows = {}
+        self._loaded_at = time.monotonic()
+    
+    def _build_window(self, interest_type: InterestType, at: datetime):
+        rates = self._rates.get(interest_type, [])
+        tiers = sorted(
+            (rate for rate in rates if rate.effective_date <= at and (rate.end_date is None or rate.end_date > at)),
+            key=lambda rate: rate.min_balance
+        )
+        
+        boundaries = [rate.effective_date for rate in rates] + [rate.end_date for rate in rates if rate.end_date]
+        valid_from = max((b for b in boundaries if b <= at), default=datetime.min.replace(tzinfo=timezone.utc))
+        valid_until = min((b for b in boundaries if b > at), default=datetime.max.replace(tzinfo=timezone.utc))
+        return valid_from, valid_until, [tier.min_balance for tier in tiers], tiers
+    
+    def _start_listener(self):
+        # A listener that died with its connection is started again once the breaker closes
+        if not self.listen or not redis_breaker.available:
+            return
+        if self._listener is None or not self._listener.is_alive():
+            with self._lock:
+                if self._listener is None or not self._listener.is_alive():
+                    self._listener = threading.Thread(target=self._listen, daemon=True)
+                    self._listener.start()
+    
+    def _listen(self):
+        try:
+            pubsub = get_subscriber_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(RATE_INVALIDATION_CHANNEL)
+            # Subscribed first; whatever changed while nobody listened is reloaded from here
+            self.invalidate()
+            for _ in pubsub.listen():
+                self.invalidate()
+        except redis.RedisError as e:
+            # The max age still bounds how long this worker can serve stale tiers
+            redis_breaker.failed(e)
+        except Exception as e:
+            print(f"Interest rate invalidation listener stopped: {e}")
+
+# Global instance
+rate_tier_cache = RateTierCache(
+    settings.interest_rate_cache_max_age,
+    listen=settings.interest_rate_cache_pubsub
+)
+
+def account_id_ranges(shards: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Split the UUID keyspace into contiguous [start, end) ranges, one per worker"""
+    step = (1 << 128) // shards
+    bounds = [str(uuid.UUID(int=step * i)) for i in range(1, shards)]
+    return list(zip([None] + bounds, bounds + [None]))
+
+def _in_account_range(query, account_column, start_account_id, end_account_id):
+    if start_account_id is not None:
+        query = query.where(account_column >= start_account_id)
+    if end_account_id is not None:
+        query = query.where(account_column < end_account_id)
+    return query
+
 class InterestService:
     def __init__(self, db: Session):
         self.db = db
@@ -23,106 +159,263 @@ class InterestService:
         self.db.add(rate)
         self.db.commit()
         self.db.refresh(rate)
+        rate_tier_cache.invalidate(broadcast=True)
         return rate
     
     def calculate_savings_interest(self, account_id: str, period_days: int = 30) -> Decimal:
-        """Calculate interest for savings account"""
-        account = self.db.query(Account).filter(Account.id == account_id).first()
-        if not account or account.account_type != AccountType.SAVINGS:
-            return Decimal('0')
+        """Interest accrued on a savings account over the last period_days days"""
+        since = datetime.utcnow().date() - timedelta(days=period_days)
+        accrued = self.db.query(func.sum(InterestAccrual.accrued_amount)).filter(
+            InterestAccrual.account_id == account_id,
+            InterestAccrual.accrual_date >= since
+        ).scalar()
+        return to_money(accrued)
+    
+    def accrue_daily_interest(self, day: date, start_account_id: Optional[str] = None,
+                              end_account_id: Optional[str] = None,
+                              chunk_size: Optional[int] = None) -> int:
+        """Accrue one day of interest on savings accounts in [start_account_id, end_account_id)
+        
+        Closing balances come from balance snapshots, which must already be built through day.
+        The run is recorded once every chunk is in, even when nothing earned interest.
+        """
+        chunk_size = chunk_size or settings.interest_posting_chunk_size
+        # Tiers as they stood at the close of day, matching the closing balance
+        day_close = _day_start(day + timedelta(days=1)) - timedelta(microseconds=1)
         
-        balance = self.db.query(Balance).filter(Balance.account_id == account_id).first()
-        if not balance or balance.ledger_balance <= 0:
-            return Decimal('0')
+        accrued_count = 0
+        last_account_id = None
+        while True:
+            rows = self._accrual_chunk(day, start_account_id, end_account_id, last_account_id, chunk_size)
+            if not rows:
+                break
+            last_account_id = rows[-1].id
+            
+            accruals = []
+            for row in rows:
+                balance = to_money(row.closing_balance)
+                if balance <= 0:
+                    continue
+                rate = rate_tier_cache.lookup(self.db, InterestType.SAVINGS, balance, day_close)
+                if rate is None:
+                    continue
+                accruals.append({
+                    "account_id": row.id,
+                    "accrual_date": day,
+                    "rate_id": rate.id,
+                    "closing_balance": balance,
+                    "interest_rate": rate.base_rate,
+                    "accrued_amount": (balance * rate.base_rate / DAYS_IN_YEAR).quantize(ACCRUAL_QUANTUM)
+                })
+            
+            if accruals:
+                # Re-running a day only fills in accounts that are still missing
+                inserted = self.db.execute(
+                    pg_insert(InterestAccrual).on_conflict_do_nothing().returning(InterestAccrual.account_id),
+                    accruals
+                ).all()
+                accrued_count += len(inserted)
+            self.db.commit()
+        
+        self.db.execute(pg_insert(InterestAccrualRun).values(
+            range_start=start_account_id or "", range_end=end_account_id or "", accrual_date=day
+        ).on_conflict_do_nothing())
+        self.db.commit()
+        return accrued_count
+    
+    def _accrual_chunk(self, day: date, start_account_id, end_account_id,
+                       after_account_id, chunk_size: int) -> List:
+        """Next chunk of active savings accounts in the range with their closing balance for day"""
+        closing = select(BalanceSnapshot.closing_balance).where(
+            BalanceSnapshot.account_id == Account.id,
+            BalanceSnapshot.snapshot_date <= day
+        ).order_by(BalanceSnapshot.snapshot_date.desc()).limit(1).correlate(Account).scalar_subquery()
         
-        # Get applicable interest rate
-        rate = self.db.query(InterestRate).filter(
-            InterestRate.interest_type == InterestType.SAVINGS,
-            InterestRate.is_active == True,
-            InterestRate.min_balance <= balance.ledger_balance
-        ).order_by(InterestRate.min_balance.desc()).first()
+        query = select(Account.id, closing.label("closing_balance")).where(
+            Account.account_type == AccountType.SAVINGS,
+            Account.status == AccountStatus.ACTIVE
+        )
+        query = _in_account_range(query, Account.id, start_account_id, end_account_id)
+        if after_account_id is not None:
+            query = query.where(Account.id > after_account_id)
         
-        if not rate:
-            return Decimal('0')
+        return self.db.execute(query.order_by(Account.id).limit(chunk_size)).all()
+    
+    def missing_accrual_days(self, period_end: Optional[datetime] = None,
+                             start_account_id: Optional[str] = None,
+                             end_account_id: Optional[str] = None) -> List[date]:
+        """Days of the month ending at period_end on which the range's accrual never ran
         
-        # Calculate interest (simple daily calculation)
-        daily_rate = rate.base_rate / 365
-        interest_amount = Decimal(str(balance.ledger_balance)) * daily_rate * period_days
+        A posted month is never posted again, so it must not post until every day is in.
+        Runs are matched on the exact range bounds they were recorded with.
+        """
+        period_end, period_start = self._monthly_period(period_end)
+        ran = set(self.db.execute(
+            select(InterestAccrualRun.accrual_date).where(
+                InterestAccrualRun.range_start == (start_account_id or ""),
+                InterestAccrualRun.range_end == (end_account_id or ""),
+                InterestAccrualRun.accrual_date >= period_start.date(),
+                InterestAccrualRun.accrual_date < period_end.date()
+            )
+        ).scalars())
         
-        return interest_amount.quantize(Decimal('0.01'))
+        days = (period_end - period_start).days
+        return [
+            period_start.date() + timedelta(days=i) for i in range(days)
+            if period_start.date() + timedelta(days=i) not in ran
+        ]
     
-    def post_monthly_interest(self) -> int:
-        """Post monthly interest for all eligible savings accounts"""
+    def post_monthly_interest(self, period_end: Optional[datetime] = None,
+                              chunk_size: Optional[int] = None,
+                              start_account_id: Optional[str] = None,
+                              end_account_id: Optional[str] = None) -> int:
+        """Post the interest accrued during the calendar month ending at period_end"""
+        period_end, period_start = self._monthly_period(period_end)
+        chunk_size = chunk_size or settings.interest_posting_chunk_size
+        
         posted_count = 0
+        last_account_id = None
+        while True:
+            rows = self._interest_chunk(
+                period_start, period_end, start_account_id, end_account_id, last_account_id, chunk_size
+            )
+            if not rows:
+                break
+            last_account_id = rows[-1].id
+            posted_count += self._post_interest_chunk(rows, period_start, period_end)
+            # Each chunk is durable on its own, so a failed run can simply be restarted
+            self.db.commit()
         
-        # Get all active savings accounts
-        savings_accounts = self.db.query(Account).filter(
-            Account.account_type == AccountType.SAVINGS,
-            Account.status == "ACTIVE"
-        ).all()
+        return posted_count
+    
+    def _monthly_period(self, period_end: Optional[datetime]) -> Tuple[datetime, datetime]:
+        if period_end is None:
+            now = datetime.now(timezone.utc)
+            period_end = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
+        elif period_end.tzinfo is None:
+            period_end = period_end.replace(tzinfo=timezone.utc)
         
-        for account in savings_accounts:
-            try:
-                interest_amount = self.calculate_savings_interest(account.id, 30)
-                
-                if interest_amount > 0:
-                    # Create interest posting record
-                    posting = InterestPosting(
-                        account_id=account.id,
-                        rate_id=self._get_savings_rate_id(),
-                        calculation_period_start=datetime.utcnow() - timedelta(days=30),
-                        calculation_period_end=datetime.utcnow(),
-                        average_balance=self._get_account_balance(account.id),
-                        interest_rate=self._get_savings_rate(),
-                        interest_amount=interest_amount
-                    )
-                    
-                    # Create credit transaction
-                    transaction = Transaction(
-                        transaction_id=f"INT{str(uuid.uuid4().int)[:10]}",
-                        to_account_id=account.id,
-                        amount=interest_amount,
-                        currency=account.currency,
-                        transaction_type=TransactionType.CREDIT,
-                        description="Monthly interest credit"
-                    )
-                    
-                    # Update account balance
-                    balance = self.db.query(Balance).filter(Balance.account_id == account.id).first()
-                    if balance:
-                        balance.ledger_balance += float(interest_amount)
-                        balance.available_balance += float(interest_amount)
-                    
-                    posting.transaction_id = transaction.id
-                    
-                    self.db.add(posting)
-                    self.db.add(transaction)
-                    posted_count += 1
-                    
-            except Exception as e:
-                print(f"Error posting interest for account {account.id}: {e}")
+        previous = period_end - timedelta(days=1)
+        period_start = datetime(previous.year, previous.month, 1, tzinfo=timezone.utc)
+        return period_end, period_start
+    
+    def _interest_chunk(self, period_start: datetime, period_end: datetime, start_account_id,
+                        end_account_id, after_account_id, chunk_size: int) -> List:
+        """Next chunk of unposted accounts with their accrual totals and closing rate for the period"""
+        in_period = (
+            (InterestAccrual.accrual_date >= period_start.date()) &
+            (InterestAccrual.accrual_date < period_end.date())
+        )
+        already_posted = exists().where(
+            InterestPosting.account_id == InterestAccrual.account_id,
+            InterestPosting.calculation_period_end == period_end
+        )
+        
+        totals = select(
+            InterestAccrual.account_id,
+            func.sum(InterestAccrual.accrued_amount).label("accrued_amount"),
+            func.sum(InterestAccrual.closing_balance).label("balance_days")
+        ).where(in_period, ~already_posted)
+        totals = _in_account_range(totals, InterestAccrual.account_id, start_account_id, end_account_id)
+        if after_account_id is not None:
+            totals = totals.where(InterestAccrual.account_id > after_account_id)
+        totals = totals.group_by(InterestAccrual.account_id).order_by(
+            InterestAccrual.account_id
+        ).limit(chunk_size).subquery()
+        
+        # The tier the account sat in on the last accrued day is the rate recorded on the posting
+        closing_rate = select(
+            InterestAccrual.account_id,
+            InterestAccrual.rate_id,
+            InterestAccrual.interest_rate
+        ).distinct(InterestAccrual.account_id).where(
+            in_period,
+            InterestAccrual.account_id.in_(select(totals.c.account_id))
+        ).order_by(InterestAccrual.account_id, InterestAccrual.accrual_date.desc()).subquery()
+        
+        query = select(
+            Account.id,
+            Account.account_number,
+            Account.currency,
+            totals.c.accrued_amount,
+            totals.c.balance_days,
+            closing_rate.c.rate_id,
+            closing_rate.c.interest_rate
+        ).join(totals, totals.c.account_id == Account.id).join(
+            closing_rate, closing_rate.c.account_id == Account.id
+        )
+        
+        return self.db.execute(query.order_by(Account.id)).all()
+    
+    def _post_interest_chunk(self, rows: List, period_start: datetime, period_end: datetime) -> int:
+        period_days = (period_end - period_start).days
+        processed_at = datetime.utcnow()
+        transactions, entries, postings, credits = [], [], [], []
+        for row in rows:
+            interest_amount = to_money(row.accrued_amount)
+            if interest_amount <= 0:
                 continue
+            
+            transaction_id = uuid.uuid4()
+            transactions.append({
+                "id": transaction_id,
+                # Deterministic reference: the unique constraint rejects a second posting for the period
+                "transaction_id": f"INT{period_start:%Y%m}-{row.account_number}",
+                "to_account_id": row.id,
+                "amount": interest_amount,
+                "currency": row.currency or "USD",
+                "transaction_type": TransactionType.INTEREST,
+                "description": "Monthly interest credit",
+                "status": TransactionStatus.COMPLETED,
+                "processed_at": processed_at
+            })
+            entries.append({
+                "transaction_id": transaction_id,
+                "account_id": row.id,
+                "entry_type": EntryType.CREDIT,
+                "amount": interest_amount
+            })
+            postings.append({
+                "account_id": row.id,
+                "rate_id": row.rate_id,
+                "calculation_period_start": period_start,
+                "calculation_period_end": period_end,
+                # Days without an accrual held no positive balance and count as zero
+                "average_balance": to_money(row.balance_days / period_days),
+                "interest_rate": row.interest_rate,
+                "interest_amount": interest_amount,
+                "transaction_id": transaction_id
+            })
+            credits.append({"account_id": row.id, "amount": interest_amount})
         
-        self.db.commit()
-        return posted_count
+        if not transactions:
+            return 0
+        
+        self.db.execute(insert(Transaction), transactions)
+        self.db.execute(insert(Entry), entries)
+        self.db.execute(insert(InterestPosting), postings)
+        self._credit_balances(credits)
+        return len(transactions)
     
-    def _get_savings_rate_id(self) -> str:
-        """Get active savings interest rate ID"""
-        rate = self.db.query(InterestRate).filter(
-            InterestRate.interest_type == InterestType.SAVINGS,
-            InterestRate.is_active == True
-        ).first()
-        return str(rate.id) if rate else None
-    
-    def _get_savings_rate(self) -> Decimal:
-        """Get active savings interest rate"""
-        rate = self.db.query(InterestRate).filter(
-            InterestRate.interest_type == InterestType.SAVINGS,
-            InterestRate.is_active == True
-        ).first()
-        return rate.base_rate if rate else Decimal('0')
-    
-    def _get_account_balance(self, account_id: str) -> Decimal:
-        """Get account balance"""
-        balance = self.db.query(Balance).filter(Balance.account_id == account_id).first()
-        return Decimal(str(balance.ledger_balance)) if balance else Decimal('0')
\ No newline at end of file
+    def _credit_balances(self, credits: List[Dict]):
+        """Add each amount to its account's balances in a single UPDATE ... FROM (VALUES ...)"""
+        # The UPDATE locks rows in join order; take them in _lock_balances' order first so
+        # month-end posting can't deadlock against transfers running alongside it
+        self.db.execute(
+            select(Balance.account_id).where(
+                Balance.account_id.in_([credit["account_id"] for credit in credits])
+            ).order_by(Balance.account_id).with_for_update()
+        )
+        
+        amounts = values(
+            column("account_id", UUID(as_uuid=True)),
+            column("amount", DECIMAL(15, 2)),
+            name="credits"
+        ).data([(credit["account_id"], credit["amount"]) for credit in credits])
+        
+        self.db.execute(
+            update(Balance).where(Balance.account_id == amounts.c.account_id).values(
+                ledger_balance=Balance.ledger_balance + amounts.c.amount,
+                available_balance=Balance.available_balance + amounts.c.amount
+            ).execution_options(synchronize_session=False)
+        )
@@ -1,47 +1,233 @@
-from typing import Set
-from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime
+import hashlib
+import heapq
+import math
+import threading
+import time
 import redis
 from app.core.config import settings
+from app.core.redis_client import get_async_redis, get_subscriber_redis, redis_breaker
+
+REVOKED_KEY = "corex:revoked-jti:{}"
+REVOCATION_CHANNEL = "corex:revoked-jti"
+
+class BloomFilter:
+    """Fixed-size bloom filter: no false negatives, false positives at about error_rate up to capacity"""
+    
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+    
+    def add(self, member: str):
+        for position in self._positions(member):
+            self._bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, member: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(member))
+    
+    def _positions(self, member: str):
+        digest = hashlib.blake2b(member.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+class ExpiringSet:
+    """Members that drop out at their expiry (epoch seconds), at most max_size of them
+    
+    A min-heap on expiry makes purging cost O(log n) per expired member; when full,
+    the member closest to expiring is dropped first and evicted_until records until
+    when the set may be missing members.
+    """
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.evicted_until = 0.0
+        self._expiry: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+    
+    def add(self, member: str, expires_at: float):
+        self.purge()
+        if self._expiry.get(member, 0.0) >= expires_at:
+            return
+        self._expiry[member] = expires_at
+        heapq.heappush(self._heap, (expires_at, member))
+        while len(self._expiry) > self.max_size:
+            self.evicted_until = max(self.evicted_until, self._pop())
+        if len(self._heap) > 2 * len(self._expiry) + 64:
+            # Members re-added with a later expiry leave stale heap entries behind
+            self._heap = [(at, member) for member, at in self._expiry.items()]
+            heapq.heapify(self._heap)
+    
+    def __contains__(self, member: str) -> bool:
+        return self._expiry.get(member, 0.0) > time.time()
+    
+    def __len__(self) -> int:
+        return len(self._expiry)
+    
+    def members(self) -> List[str]:
+        self.purge()
+        return list(self._expiry)
+    
+    def purge(self):
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            self._pop()
+    
+    def clear(self):
+        self._expiry.clear()
+        self._heap.clear()
+    
+    def _pop(self) -> float:
+        expires_at, member = heapq.heappop(self._heap)
+        if self._expiry.get(member) == expires_at:
+            del self._expiry[member]
+        return expires_at
 
 class JWTBlacklist:
-    """JWT Token Blacklist Service using Redis"""
+    """Revoked token ids (jti) until the tokens expire
+    
+    Every revocation this process knows of is in a local ExpiringSet and a bloom filter,
+    and with Redis on, the listener keeps both in step with the other workers. A token
+    the filter has never seen is therefore not revoked and costs no network call; only
+    filter hits missing locally are confirmed against Redis. While the listener isn't
+    subscribed, or after the local set overflowed, every check goes to Redis.
+    """
+    
+    def __init__(self, max_size: int, error_rate: float, use_redis: bool = True):
+        self.max_size = max_size
+        self.error_rate = error_rate
+        self.use_redis = use_redis
+        self._lock = threading.Lock()
+        self._revoked = ExpiringSet(max_size)
+        self._bloom = BloomFilter(max_size, error_rate)
+        self._bloom_members = 0
+        self._synced = threading.Event()
+        if not use_redis:
+            self._synced.set()
+        self._listener: Optional[threading.Thread] = None
+    
+    async def blacklist_token(self, jti: str, expires_at: datetime):
+        """Revoke jti until expires_at, the token's own expiry (naive UTC)"""
+        expires_at_epoch = _epoch(expires_at)
+        ttl = int(expires_at_epoch - time.time()) + 1
+        if ttl <= 0:
+            return
+        self._add(jti, expires_at_epoch)
+        if self._redis_available():
+            try:
+                async with get_async_redis().pipeline(transaction=False) as pipe:
+                    pipe.set(REVOKED_KEY.format(jti), "1", ex=ttl)
+                    pipe.publish(REVOCATION_CHANNEL, f"{jti} {expires_at_epoch}")
+                    await pipe.execute()
+            except redis.RedisError as e:
+                redis_breaker.failed(e)
+                print(f"Failed to share revocation of {jti}: {e}")
     
-    def __init__(self):
+    async def is_blacklisted(self, jti: str) -> bool:
+        return jti in await self.revoked([jti])
+    
+    async def revoked(self, jtis: Iterable[str]) -> Set[str]:
+        """The revoked ones among jtis, confirmed with one pipelined round trip at most"""
+        self._start_listener()
+        found, unsure = set(), []
+        with self._lock:
+            complete = self._synced.is_set() and self._revoked.evicted_until <= time.time()
+            for jti in jtis:
+                if jti in self._revoked:
+                    found.add(jti)
+                elif not complete or jti in self._bloom:
+                    unsure.append(jti)
+        if not unsure or not self._redis_available():
+            return found
         try:
-            self.redis_client = redis.Redis(
-                host=settings.redis_host,
-                port=settings.redis_port,
-                decode_responses=True
-            )
-        except:
-            # Fallback to in-memory storage if Redis is not available
-            self.redis_client = None
-            self._blacklisted_tokens: Set[str] = set()
-    
-    def blacklist_token(self, token: str, expires_at: datetime):
-        """Add token to blacklist"""
-        if self.redis_client:
-            # Calculate TTL for Redis
-            ttl = int((expires_at - datetime.utcnow()).total_seconds())
-            if ttl > 0:
-                self.redis_client.setex(f"blacklist:{token}", ttl, "1")
-        else:
-            # Fallback to in-memory storage
-            self._blacklisted_tokens.add(token)
-    
-    def is_blacklisted(self, token: str) -> bool:
-        """Check if token is blacklisted"""
-        if self.redis_client:
-            return self.redis_client.exists(f"blacklist:{token}")
-        else:
-            return token in self._blacklisted_tokens
+            async with get_async_redis().pipeline(transaction=False) as pipe:
+                for jti in unsure:
+                    pipe.exists(REVOKED_KEY.format(jti))
+                results = await pipe.execute()
+        except redis.RedisError as e:
+            redis_breaker.failed(e)
+            return found
+        redis_breaker.succeeded()
+        return found | {jti for jti, exists in zip(unsure, results) if exists}
     
     def cleanup_expired_tokens(self):
-        """Clean up expired tokens (Redis handles this automatically)"""
-        if not self.redis_client:
-            # For in-memory storage, we'd need to track expiration times
-            # This is a simplified implementation
-            pass
+        """Drop expired revocations and rebuild the bloom filter from the ones left"""
+        with self._lock:
+            self._revoked.purge()
+            self._rebuild_bloom()
+    
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+            self._rebuild_bloom()
+    
+    def _add(self, jti: str, expires_at: float):
+        with self._lock:
+            self._revoked.add(jti, expires_at)
+            self._bloom.add(jti)
+            self._bloom_members += 1
+            if self._bloom_members > self.max_size:
+                # Expired ids can't be taken out of a bloom filter, so it is rebuilt once it's full
+                self._revoked.purge()
+                self._rebuild_bloom()
+    
+    def _rebuild_bloom(self):
+        self._bloom = BloomFilter(self.max_size, self.error_rate)
+        members = self._revoked.members()
+        for jti in members:
+            self._bloom.add(jti)
+        self._bloom_members = len(members)
+    
+    def _redis_available(self) -> bool:
+        # While the breaker is open, checks are answered from local revocations
+        return self.use_redis and redis_breaker.available
+    
+    def _start_listener(self):
+        if not self._redis_available():
+            return
+        if self._listener is None or not self._listener.is_alive():
+            with self._lock:
+                if self._listener is None or not self._listener.is_alive():
+                    self._listener = threading.Thread(target=self._listen, daemon=True)
+                    self._listener.start()
+    
+    def _listen(self):
+        try:
+            client = get_subscriber_redis()
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(REVOCATION_CHANNEL)
+            # Subscribed first, so nothing revoked while loading the existing ones is missed
+            self._load_existing(client)
+            self._synced.set()
+            for message in pubsub.listen():
+                jti, expires_at = message["data"].split()
+                self._add(jti, float(expires_at))
+        except redis.RedisError as e:
+            redis_breaker.failed(e)
+        except Exception as e:
+            print(f"JWT revocation listener stopped: {e}")
+        finally:
+            self._synced.clear()
+    
+    def _load_existing(self, client: redis.Redis):
+        keys = list(client.scan_iter(match=REVOKED_KEY.format("*"), count=1000))
+        for start in range(0, len(keys), 1000):
+            batch = keys[start:start + 1000]
+            pipe = client.pipeline(transaction=False)
+            for key in batch:
+                pipe.ttl(key)
+            now = time.time()
+            for key, ttl in zip(batch, pipe.execute()):
+                if ttl > 0:
+                    self._add(key.rsplit(":", 1)[1], now + ttl)
+
+def _epoch(value: datetime) -> float:
+    return (value - datetime(1970, 1, 1)).total_seconds()
 
 # Global instance
-jwt_blacklist = JWTBlacklist()
\ No newline at end of file
+jwt_blacklist = JWTBlacklist(
+    settings.jwt_revocation_local_size,
+    settings.jwt_revocation_bloom_error_rate,
+    use_redis=settings.jwt_revocation_redis
+)
\ No newline at end of file
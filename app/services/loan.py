@@ -1,12 +1,17 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session, raiseload
 from app.models.loan import Loan, LoanPayment, LoanStatus, LoanType
 from app.models.account import Account, Balance
 from app.models.transaction import Transaction, TransactionType
 from app.schemas.loan import LoanApplicationCreate, LoanApproval, LoanPaymentCreate
+from app.services.amortization import Installment, amortization_schedule, iter_installments, loan_terms, monthly_payment
+from app.core.config import settings
+from app.core.money import ZERO, to_money, add_money
+from app.core.pagination import encode_cursor, decode_cursor
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 import uuid
-import math
 
 class LoanService:
     def __init__(self, db: Session):
@@ -81,7 +86,7 @@ class LoanService:
                 to_account_id=loan.account_id,
                 amount=loan.principal_amount,
                 currency="USD",
-                transaction_type=TransactionType.CREDIT,
+                transaction_type=TransactionType.DEPOSIT,
                 description=f"Loan disbursement - {loan.loan_number}"
             )
             self.db.add(transaction)
@@ -89,8 +94,8 @@ class LoanService:
             # Update account balance
             balance = self.db.query(Balance).filter(Balance.account_id == loan.account_id).first()
             if balance:
-                balance.ledger_balance += float(loan.principal_amount)
-                balance.available_balance += float(loan.principal_amount)
+                balance.ledger_balance = add_money(balance.ledger_balance, loan.principal_amount)
+                balance.available_balance = add_money(balance.available_balance, loan.principal_amount)
             
             # Update loan status
             loan.status = LoanStatus.ACTIVE
@@ -99,28 +104,30 @@ class LoanService:
             
             self.db.commit()
             return True
-            
+        
         except Exception:
             self.db.rollback()
             return False
     
     def make_payment(self, payment_data: LoanPaymentCreate) -> LoanPayment:
         """Process loan payment"""
-        loan = self.db.query(Loan).filter(Loan.id == payment_data.loan_id).first()
+        # Row lock serializes payments on a loan, keeping the balance and the sequence consistent
+        loan = self.db.query(Loan).filter(Loan.id == payment_data.loan_id).with_for_update().first()
         if not loan or loan.status != LoanStatus.ACTIVE:
             raise ValueError("Loan not found or not active")
         
         # Calculate interest and principal portions
         monthly_rate = loan.interest_rate / 100 / 12
-        interest_portion = loan.outstanding_balance * monthly_rate
-        principal_portion = payment_data.amount_paid - interest_portion
+        interest_portion = to_money(loan.outstanding_balance * monthly_rate)
+        principal_portion = to_money(payment_data.amount_paid) - interest_portion
         
         if principal_portion < 0:
             principal_portion = Decimal('0')
             interest_portion = payment_data.amount_paid
         
         # Create payment record
-        payment_number = f"PMT{len(loan.payments) + 1:03d}"
+        loan.payment_count = (loan.payment_count or 0) + 1
+        payment_number = f"PMT{loan.payment_count:03d}"
         payment = LoanPayment(
             loan_id=loan.id,
             payment_number=payment_number,
@@ -140,16 +147,81 @@ class LoanService:
         self.db.refresh(payment)
         return payment
     
-    def _calculate_monthly_payment(self, principal: Decimal, monthly_rate: Decimal, months: int) -> Decimal:
-        """Calculate monthly payment using loan formula"""
-        if monthly_rate == 0:
-            return principal / months
+    def list_loans(self, status: Optional[LoanStatus] = None, skip: int = 0, limit: int = 100) -> List[Loan]:
+        # LoanResponse is built from columns only; raising on lazy loads keeps listings a single query
+        query = self.db.query(Loan).options(raiseload("*"))
+        if status:
+            query = query.filter(Loan.status == status)
+        return query.order_by(Loan.application_date.desc(), Loan.id).offset(skip).limit(limit).all()
+    
+    def get_customer_loans(self, customer_id: str) -> List[Loan]:
+        return self.db.query(Loan).options(raiseload("*")).filter(Loan.customer_id == customer_id).all()
+    
+    def get_loan_payments(self, loan_id: str, limit: int = 100,
+                          cursor: Optional[str] = None) -> Tuple[List[LoanPayment], Optional[str]]:
+        """Page through a loan's payments newest first, returning the page and the next cursor"""
+        query = self.db.query(LoanPayment).filter(LoanPayment.loan_id == loan_id)
+        if cursor:
+            query = query.filter(tuple_(LoanPayment.payment_date, LoanPayment.id) < decode_cursor(cursor))
+        payments = query.order_by(
+            LoanPayment.payment_date.desc(), LoanPayment.id.desc()
+        ).limit(limit + 1).all()
+        
+        next_cursor = None
+        if len(payments) > limit:
+            payments = payments[:limit]
+            next_cursor = encode_cursor(payments[-1].payment_date, payments[-1].id)
+        return payments, next_cursor
+    
+    def get_schedule(self, loan_id: str) -> List[Installment]:
+        """Contractual installment table for a loan"""
+        loan = self.db.query(Loan).filter(Loan.id == loan_id).first()
+        if not loan:
+            raise ValueError("Loan not found")
+        return amortization_schedule(loan_terms(
+            loan.principal_amount, loan.interest_rate, loan.term_months, loan.disbursement_date
+        ))
+    
+    def portfolio_cash_flows(self, status: Optional[LoanStatus] = LoanStatus.ACTIVE,
+                             rate_shift: Decimal = ZERO, chunk_size: Optional[int] = None) -> Dict:
+        """Scheduled cash flows of every matching loan, aggregated by due month
+        
+        rate_shift is added to each loan's annual percentage rate for stress scenarios.
+        Loans stream from the database a chunk at a time, so the book is never held in memory.
+        """
+        chunk_size = chunk_size or settings.loan_portfolio_chunk_size
+        query = select(Loan.principal_amount, Loan.interest_rate, Loan.term_months, Loan.disbursement_date)
+        if status:
+            query = query.where(Loan.status == status)
         
-        rate_float = float(monthly_rate)
-        principal_float = float(principal)
+        loan_count, total_principal = 0, ZERO
+        months: Dict[date, Dict[str, Decimal]] = {}
+        for rows in self.db.execute(query.execution_options(yield_per=chunk_size)).partitions():
+            portfolio = [
+                loan_terms(row.principal_amount, max(row.interest_rate + rate_shift, ZERO), row.term_months, row.disbursement_date)
+                for row in rows
+            ]
+            loan_count += len(portfolio)
+            total_principal = sum((terms.principal for terms in portfolio), total_principal)
+            for _, installment in iter_installments(portfolio):
+                month = months.setdefault(
+                    installment.due_date.replace(day=1),
+                    {"payment": ZERO, "principal": ZERO, "interest": ZERO}
+                )
+                month["payment"] += installment.payment
+                month["principal"] += installment.principal
+                month["interest"] += installment.interest
         
-        payment = principal_float * (rate_float * (1 + rate_float) ** months) / ((1 + rate_float) ** months - 1)
-        return Decimal(str(round(payment, 2)))
+        return {
+            "loan_count": loan_count,
+            "total_principal": total_principal,
+            "total_interest": sum((month["interest"] for month in months.values()), ZERO),
+            "cash_flows": [{"due_month": due_month, **months[due_month]} for due_month in sorted(months)]
+        }
+    
+    def _calculate_monthly_payment(self, principal: Decimal, monthly_rate: Decimal, months: int) -> Decimal:
+        """Calculate monthly payment using loan formula"""
+        return monthly_payment(principal, monthly_rate, months)
     
     def _get_customer_account(self, customer_id: str) -> str:
         """Get customer's primary account"""
@@ -1,8 +1,12 @@
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
-from app.models.notification import Notification, NotificationTemplate, NotificationType, NotificationChannel, NotificationStatus
+from app.models.notification import Notification, NotificationTemplate, NotificationOutbox, NotificationType, NotificationChannel, NotificationStatus
+from app.models.account import Account
+from app.core.config import settings
 from app.schemas.notification import NotificationCreate
 from typing import List, Optional, Dict
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 import uuid
 
 class NotificationService:
@@ -17,25 +21,16 @@ class NotificationService:
         self.db.refresh(notification)
         return notification
     
-    def send_transaction_notification(self, customer_id: str, amount: float, transaction_type: str) -> Notification:
+    def send_transaction_notification(self, customer_id: str, amount: Decimal, transaction_type: str) -> Notification:
         """Send transaction notification"""
         template = self._get_template("TRANSACTION_ALERT")
         
-        title = template.title_template.format(type=transaction_type)
-        message = template.message_template.format(
-            amount=amount,
-            type=transaction_type,
-            time=datetime.now().strftime("%Y-%m-%d %H:%M")
-        )
-        
-        notification = Notification(
-            customer_id=customer_id,
-            notification_type=NotificationType.TRANSACTION,
-            channel=NotificationChannel.SMS,
-            title=title,
-            message=message,
-            status=NotificationStatus.SENT,
-            sent_at=datetime.utcnow()
+        notification = self._render_notification(
+            template,
+            customer_id,
+            NotificationType.TRANSACTION,
+            NotificationChannel.SMS,
+            {"amount": amount, "type": transaction_type}
         )
         
         self.db.add(notification)
@@ -63,6 +58,62 @@ class NotificationService:
         self.db.commit()
         return notification
     
+    def dispatch_outbox(self, batch_size: Optional[int] = None) -> int:
+        """Deliver one batch of due outbox events, returning how many were handled
+        
+        A failed event waits out an exponential backoff before it is tried again.
+        """
+        batch_size = batch_size or settings.notification_outbox_batch_size
+        
+        # SKIP LOCKED lets several dispatchers drain the outbox side by side
+        events = self.db.query(NotificationOutbox).filter(
+            NotificationOutbox.status == NotificationStatus.PENDING,
+            or_(NotificationOutbox.next_attempt_at.is_(None), NotificationOutbox.next_attempt_at <= func.now())
+        ).order_by(NotificationOutbox.created_at).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not events:
+            return 0
+        
+        account_ids = {event.account_id for event in events if event.account_id}
+        customers = dict(
+            self.db.query(Account.id, Account.customer_id).filter(Account.id.in_(account_ids)).all()
+        ) if account_ids else {}
+        
+        templates = {}
+        notifications = []
+        dispatched_at = datetime.utcnow()
+        for event in events:
+            try:
+                if event.template_code not in templates:
+                    templates[event.template_code] = self._get_template(event.template_code)
+                
+                customer_id = customers.get(event.account_id)
+                if not customer_id:
+                    # Nobody to notify, and retrying won't find anybody
+                    event.status = NotificationStatus.FAILED
+                    event.last_error = "Account has no customer"
+                    continue
+                notifications.append(self._render_notification(
+                    templates[event.template_code],
+                    customer_id,
+                    event.notification_type,
+                    event.channel,
+                    event.payload
+                ))
+                event.status = NotificationStatus.SENT
+                event.dispatched_at = dispatched_at
+            except Exception as e:
+                event.attempts += 1
+                event.last_error = str(e)
+                if event.attempts >= settings.notification_outbox_max_attempts:
+                    event.status = NotificationStatus.FAILED
+                else:
+                    backoff = settings.notification_outbox_retry_seconds * 2 ** (event.attempts - 1)
+                    event.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=backoff)
+        
+        self.db.add_all(notifications)
+        self.db.commit()
+        return len(events)
+    
     def get_customer_notifications(self, customer_id: str, limit: int = 50) -> List[Notification]:
         """Get notifications for a customer"""
         return self.db.query(Notification).filter(
@@ -91,6 +142,21 @@ class NotificationService:
         self.db.commit()
         return template
     
+    def _render_notification(self, template: NotificationTemplate, customer_id: str,
+                             notification_type: NotificationType, channel: NotificationChannel,
+                             fields: Dict) -> Notification:
+        """Build a sent notification from a template and its placeholder values"""
+        fields = dict(fields, time=datetime.now().strftime("%Y-%m-%d %H:%M"))
+        return Notification(
+            customer_id=customer_id,
+            notification_type=notification_type,
+            channel=channel,
+            title=template.title_template.format(**fields),
+            message=template.message_template.format(**fields),
+            status=NotificationStatus.SENT,
+            sent_at=datetime.utcnow()
+        )
+    
     def _get_template(self, template_code: str) -> NotificationTemplate:
         """Get notification template by code"""
         template = self.db.query(NotificationTemplate).filter(
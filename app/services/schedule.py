@@ -0,0 +1,94 @@
+"""
+Standing order execution dates: frequency stepping, month-end rules and business-day rolling
+"""
+
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+from app.core.config import settings
+from app.services.amortization import add_months
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+
+# Periods to step back from the estimated index so rolled dates just before `after` aren't missed
+_BACKOFF = {"DAILY": 10, "WEEKLY": 2, "MONTHLY": 1}
+
+class BusinessCalendar:
+    """Weekends plus configured holidays are not business days"""
+    
+    def __init__(self, holidays: Iterable[date] = ()):
+        self.holidays = frozenset(holidays)
+    
+    def is_business_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+    
+    def following(self, day: date) -> date:
+        """The first business day on or after day"""
+        while not self.is_business_day(day):
+            day += timedelta(days=1)
+        return day
+    
+    def roll(self, day: date) -> date:
+        """Modified following: the next business day, unless that leaves the month"""
+        rolled = self.following(day)
+        if rolled.month == day.month:
+            return rolled
+        rolled = day
+        while not self.is_business_day(rolled):
+            rolled -= timedelta(days=1)
+        return rolled
+
+def _parse_holidays(value: str) -> List[date]:
+    return [date.fromisoformat(day.strip()) for day in value.split(",") if day.strip()]
+
+bank_calendar = BusinessCalendar(_parse_holidays(settings.bank_holidays))
+
+def scheduled_day(start: date, frequency: str, index: int) -> date:
+    """Unadjusted date of occurrence index; orders starting on a month end stay on month ends"""
+    if frequency == "DAILY":
+        return start + timedelta(days=index)
+    if frequency == "WEEKLY":
+        return start + timedelta(weeks=index)
+    if frequency == "MONTHLY":
+        day = add_months(start, index)
+        if start.day == monthrange(start.year, start.month)[1]:
+            return day.replace(day=monthrange(day.year, day.month)[1])
+        return day
+    raise ValueError(f"Unsupported standing order frequency: {frequency}")
+
+def execution_dates(start: datetime, frequency: str, end: Optional[datetime] = None,
+                    after: Optional[datetime] = None,
+                    calendar: BusinessCalendar = bank_calendar) -> Iterator[datetime]:
+    """Business-day adjusted execution times after `after`, strictly increasing, never before start, up to end"""
+    index = 0
+    if after is not None and after > start:
+        elapsed = (after.date() - start.date()).days
+        estimate = {"DAILY": elapsed, "WEEKLY": elapsed // 7, "MONTHLY": elapsed * 12 // 366}.get(frequency, 0)
+        index = max(0, estimate - _BACKOFF.get(frequency, 0))
+    
+    previous = None
+    while True:
+        day = calendar.roll(scheduled_day(start.date(), frequency, index))
+        if day < start.date():
+            # A start on a weekend month end would roll back before the order exists; it runs on the next business day
+            day = calendar.following(start.date())
+        when = datetime.combine(day, start.timetz())
+        index += 1
+        if end is not None and when > end:
+            return
+        # Rolling can fold several occurrences onto one business day; it executes once
+        if (after is not None and when <= after) or (previous is not None and when <= previous):
+            continue
+        previous = when
+        yield when
+
+def next_execution_date(start: datetime, frequency: str, end: Optional[datetime] = None,
+                        after: Optional[datetime] = None) -> Optional[datetime]:
+    """First execution strictly after `after`, or None once the order has run its course"""
+    return next(execution_dates(start, frequency, end, after), None)
+
+def preview_execution_dates(start: datetime, frequency: str, end: Optional[datetime],
+                            from_date: datetime, count: int) -> List[datetime]:
+    """Up to count upcoming executions at or after from_date"""
+    return list(islice(execution_dates(start, frequency, end, from_date - timedelta(microseconds=1)), count))
\ No newline at end of file
@@ -1,9 +1,16 @@
-from celery import Celery
+from celery import Celery, group
+from celery.schedules import crontab
 from app.core.config import settings
 from app.database import SessionLocal
-from app.services.interest import InterestService
+from app.services.interest import InterestService, account_id_ranges
 from app.services.loan import LoanService
-from datetime import datetime
+from app.services.notification import NotificationService
+from app.services.account import AccountService
+from app.services.delinquency import DelinquencyService
+from app.services.standing_order import StandingOrderService
+from app.services.bulk_transfer import BulkTransferService
+from app.services.bill_payment import BillPaymentService
+from datetime import date, datetime, timedelta
 
 # Initialize Celery
 celery_app = Celery(
@@ -13,88 +20,165 @@ celery_app = Celery(
 )
 
 @celery_app.task
-def post_monthly_interest():
-    """Scheduled task to post monthly interest"""
+def process_standing_orders():
+    """Scheduled task to fan standing order execution out over parallel workers"""
+    group(execute_standing_orders.s() for _ in range(settings.standing_order_workers)).apply_async()
+    return f"Queued {settings.standing_order_workers} standing order workers"
+
+@celery_app.task
+def execute_standing_orders():
+    """Claim and execute due standing orders until none are left"""
+    db = SessionLocal()
+    try:
+        service = StandingOrderService(db)
+        counts = service.execute_due()
+        return f"Executed standing orders: {counts['completed']} completed, {counts['failed']} failed"
+    finally:
+        db.close()
+
+@celery_app.task
+def dispatch_notification_outbox():
+    """Scheduled task to deliver queued notification events in batches"""
+    db = SessionLocal()
+    try:
+        service = NotificationService(db)
+        batch_size = settings.notification_outbox_batch_size
+        dispatched = 0
+        while True:
+            handled = service.dispatch_outbox(batch_size)
+            dispatched += handled
+            if handled < batch_size:
+                break
+        return f"Dispatched {dispatched} notification events"
+    finally:
+        db.close()
+
+@celery_app.task
+def build_balance_snapshots():
+    """Scheduled task to snapshot closing balances for completed days"""
+    db = SessionLocal()
+    try:
+        service = AccountService(db)
+        count = service.build_balance_snapshots()
+        return f"Created {count} balance snapshots"
+    finally:
+        db.close()
+
+@celery_app.task
+def accrue_daily_interest(day: str = None):
+    """Scheduled task to snapshot a completed day and fan its interest accrual out by account range"""
+    day = date.fromisoformat(day) if day else datetime.utcnow().date() - timedelta(days=1)
+    db = SessionLocal()
+    try:
+        # Accruals read closing balances from the snapshots, so build them once before fanning out
+        AccountService(db).build_balance_snapshots(through=day)
+    finally:
+        db.close()
+    
+    ranges = account_id_ranges(settings.interest_accrual_shards)
+    group(
+        accrue_interest_range.s(day.isoformat(), start, end) for start, end in ranges
+    ).apply_async()
+    return f"Queued interest accrual for {day} across {len(ranges)} account ranges"
+
+@celery_app.task
+def accrue_interest_range(day: str, start_account_id: str = None, end_account_id: str = None):
+    """Accrue one day of interest for an account-id range, posting the month once it is over and complete
+
+    A backfilled day of an ended month posts that month, if it was the last day missing.
+    """
+    day = date.fromisoformat(day)
     db = SessionLocal()
     try:
         service = InterestService(db)
-        count = service.post_monthly_interest()
-        return f"Posted interest for {count} accounts"
+        accrued = service.accrue_daily_interest(day, start_account_id, end_account_id)
+        posted = 0
+        period_end = datetime(day.year + day.month // 12, day.month % 12 + 1, 1)
+        if period_end.date() <= datetime.utcnow().date():
+            missing = service.missing_accrual_days(period_end, start_account_id, end_account_id)
+            if missing:
+                gap = ", ".join(d.isoformat() for d in missing)
+                print(f"Not posting {day:%Y-%m} interest for accounts [{start_account_id}, {end_account_id}): no accruals on {gap}")
+                return f"Accrued interest for {accrued} accounts, held {day:%Y-%m} posting for {len(missing)} missing days"
+            posted = service.post_monthly_interest(
+                period_end,
+                start_account_id=start_account_id,
+                end_account_id=end_account_id
+            )
+        return f"Accrued interest for {accrued} accounts, posted {posted}"
     finally:
         db.close()
 
 @celery_app.task
-def process_standing_orders():
-    """Scheduled task to process standing orders"""
+def refresh_loan_delinquency():
+    """Scheduled task to recompute arrears and aging buckets for the active loan book"""
     db = SessionLocal()
     try:
-        from app.models.payment import StandingOrder, StandingOrderExecution, PaymentStatus
-        from app.models.transaction import Transaction, TransactionType
-        import uuid
-        
-        # Get due standing orders
-        due_orders = db.query(StandingOrder).filter(
-            StandingOrder.is_active == True,
-            StandingOrder.next_execution_date <= datetime.utcnow()
-        ).all()
-        
-        processed = 0
-        for order in due_orders:
-            try:
-                # Create transaction
-                transaction = Transaction(
-                    transaction_id=f"SO{str(uuid.uuid4().int)[:10]}",
-                    from_account_id=order.from_account_id,
-                    to_account_id=order.to_account_id,
-                    amount=order.amount,
-                    currency=order.currency,
-                    transaction_type=TransactionType.TRANSFER,
-                    description=f"Standing order: {order.description}"
-                )
-                
-                # Create execution record
-                execution = StandingOrderExecution(
-                    standing_order_id=order.id,
-                    amount=order.amount,
-                    status=PaymentStatus.COMPLETED,
-                    transaction_id=transaction.id
-                )
-                
-                # Update next execution date
-                if order.frequency == "MONTHLY":
-                    from dateutil.relativedelta import relativedelta
-                    order.next_execution_date += relativedelta(months=1)
-                elif order.frequency == "WEEKLY":
-                    from datetime import timedelta
-                    order.next_execution_date += timedelta(weeks=1)
-                elif order.frequency == "DAILY":
-                    from datetime import timedelta
-                    order.next_execution_date += timedelta(days=1)
-                
-                db.add(transaction)
-                db.add(execution)
-                processed += 1
-                
-            except Exception as e:
-                # Log error and continue
-                print(f"Error processing standing order {order.id}: {e}")
-                continue
-        
-        db.commit()
-        return f"Processed {processed} standing orders"
-        
+        service = DelinquencyService(db)
+        count = service.refresh()
+        return f"Refreshed delinquency for {count} loans"
+    finally:
+        db.close()
+
+@celery_app.task
+def process_bulk_transfer(job_id: str):
+    """Ingest and post an uploaded bulk transfer file"""
+    db = SessionLocal()
+    try:
+        job = BulkTransferService(db).process(job_id)
+        if job is None:
+            return f"Bulk transfer {job_id} was already claimed"
+        return f"Bulk transfer {job.job_reference} {job.status.value}: {job.credited_rows} of {job.total_rows} rows credited"
+    finally:
+        db.close()
+
+@celery_app.task
+def resume_stalled_bulk_transfers():
+    """Scheduled task to requeue bulk transfers whose worker stopped mid-file or whose task was never queued"""
+    db = SessionLocal()
+    try:
+        job_ids = BulkTransferService(db).resume_stalled()
+        for job_id in job_ids:
+            process_bulk_transfer.delay(job_id)
+        return f"Requeued {len(job_ids)} stalled bulk transfers"
+    finally:
+        db.close()
+
+@celery_app.task
+def sweep_biller_settlements():
+    """Scheduled task to move accumulated bill payments on to each biller in one transfer"""
+    db = SessionLocal()
+    try:
+        settled = BillPaymentService(db).sweep_settlements()
+        return f"Settled {sum(settled.values())} bill payments across {len(settled)} billers"
     finally:
         db.close()
 
 # Celery beat schedule
 celery_app.conf.beat_schedule = {
-    'post-monthly-interest': {
-        'task': 'app.services.scheduler.post_monthly_interest',
-        'schedule': 30.0 * 24 * 60 * 60,  # Every 30 days
+    'accrue-daily-interest': {
+        'task': 'app.services.scheduler.accrue_daily_interest',
+        'schedule': crontab(minute=15, hour=0),  # Daily; month-end ranges also post the month
     },
     'process-standing-orders': {
         'task': 'app.services.scheduler.process_standing_orders',
-        'schedule': 60.0 * 60,  # Every hour
+        'schedule': 60.0 * 5,  # Every 5 minutes; the partial due index keeps each scan small
+    },
+    'refresh-loan-delinquency': {
+        'task': 'app.services.scheduler.refresh_loan_delinquency',
+        'schedule': crontab(minute=0, hour=1),  # Daily, after the day's payments have settled
+    },
+    'resume-stalled-bulk-transfers': {
+        'task': 'app.services.scheduler.resume_stalled_bulk_transfers',
+        'schedule': 60.0 * 5,  # Every 5 minutes
+    },
+    'sweep-biller-settlements': {
+        'task': 'app.services.scheduler.sweep_biller_settlements',
+        'schedule': crontab(minute=30),  # Hourly
+    },
+    'dispatch-notification-outbox': {
+        'task': 'app.services.scheduler.dispatch_notification_outbox',
+        'schedule': 10.0,  # Every 10 seconds
     },
 }
 
@@ -0,0 +1,152 @@
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.payment import StandingOrder, StandingOrderExecution, PaymentStatus
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.services.schedule import FREQUENCIES, next_execution_date
+from app.services.transaction import TransactionService
+from app.core.config import settings
+from datetime import datetime, time, timezone
+from typing import Dict, List, Optional, Set
+import uuid
+
+class StandingOrderService:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def execute_due(self, as_of: Optional[datetime] = None, chunk_size: Optional[int] = None) -> Dict[str, int]:
+        """Execute every standing order due by as_of, claiming and committing one chunk at a time
+        
+        Claims use FOR UPDATE SKIP LOCKED, so any number of workers can run this
+        concurrently and each takes a disjoint set of orders.
+        """
+        as_of = as_of or datetime.now(timezone.utc)
+        chunk_size = chunk_size or settings.standing_order_chunk_size
+        
+        totals = {"completed": 0, "failed": 0, "skipped": 0}
+        poisoned: Set[uuid.UUID] = set()
+        while True:
+            orders = self._claim_due(as_of, chunk_size, poisoned)
+            if not orders:
+                break
+            order_ids = [order.id for order in orders]
+            try:
+                counts = self._execute_chunk(orders)
+                self.db.commit()
+            except Exception as e:
+                # Isolate the offending order by retrying the chunk one order at a time
+                self.db.rollback()
+                print(f"Standing order chunk failed, retrying individually: {e}")
+                counts = self._execute_individually(order_ids, as_of, poisoned)
+            for key, count in counts.items():
+                totals[key] += count
+        return totals
+    
+    def _claim_due(self, as_of: datetime, limit: int, exclude: Set[uuid.UUID]) -> List[StandingOrder]:
+        query = self.db.query(StandingOrder).filter(
+            StandingOrder.is_active == True,
+            StandingOrder.next_execution_date <= as_of
+        )
+        if exclude:
+            query = query.filter(StandingOrder.id.notin_(exclude))
+        return query.order_by(StandingOrder.next_execution_date).limit(limit).with_for_update(skip_locked=True).all()
+    
+    def _execute_individually(self, order_ids: List[uuid.UUID], as_of: datetime,
+                              poisoned: Set[uuid.UUID]) -> Dict[str, int]:
+        totals = {"completed": 0, "failed": 0, "skipped": 0}
+        for order_id in order_ids:
+            order = self.db.query(StandingOrder).filter(
+                StandingOrder.id == order_id,
+                StandingOrder.is_active == True,
+                StandingOrder.next_execution_date <= as_of
+            ).with_for_update(skip_locked=True).first()
+            if not order:
+                self.db.rollback()
+                continue
+            try:
+                counts = self._execute_chunk([order])
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                # Leave it due for the next run instead of retrying it forever in this one
+                poisoned.add(order_id)
+                print(f"Error processing standing order {order_id}: {e}")
+                continue
+            for key, count in counts.items():
+                totals[key] += count
+        return totals
+    
+    def _execute_chunk(self, orders: List[StandingOrder]) -> Dict[str, int]:
+        counts = {"completed": 0, "failed": 0, "skipped": 0}
+        due = []
+        for order in orders:
+            if order.end_date is None or order.next_execution_date <= order.end_date:
+                due.append(order)
+            else:
+                order.is_active = False
+        
+        # The (order, due date) key makes a second execution of the same occurrence a no-op
+        claimed = self.db.execute(
+            pg_insert(StandingOrderExecution).on_conflict_do_nothing().returning(
+                StandingOrderExecution.id, StandingOrderExecution.standing_order_id
+            ),
+            [{
+                "standing_order_id": order.id,
+                "scheduled_date": self._scheduled_date(order),
+                "amount": order.amount,
+                "status": PaymentStatus.PROCESSING
+            } for order in due]
+        ).all() if due else []
+        execution_ids = {row.standing_order_id: row.id for row in claimed}
+        counts["skipped"] = len(due) - len(execution_ids)
+        
+        transactions = {}
+        for order in due:
+            if order.id in execution_ids:
+                transactions[order.id] = Transaction(
+                    transaction_id=f"SO{str(uuid.uuid4().int)[:10]}",
+                    from_account_id=order.from_account_id,
+                    to_account_id=order.to_account_id,
+                    amount=order.amount,
+                    currency=order.currency,
+                    transaction_type=TransactionType.TRANSFER,
+                    description=f"Standing order: {order.description}"
+                )
+        if transactions:
+            self.db.add_all(transactions.values())
+            self.db.flush()
+            TransactionService(self.db).post_transactions(list(transactions.values()), require_funds=True)
+        
+        outcomes = []
+        for order_id, transaction in transactions.items():
+            completed = transaction.status == TransactionStatus.COMPLETED
+            counts["completed" if completed else "failed"] += 1
+            outcomes.append({
+                "id": execution_ids[order_id],
+                "status": PaymentStatus.COMPLETED if completed else PaymentStatus.FAILED,
+                "transaction_id": transaction.id,
+                "failure_reason": None if completed else "Insufficient funds"
+            })
+        if outcomes:
+            self.db.execute(update(StandingOrderExecution), outcomes)
+        
+        # A missed occurrence is recorded as failed and not retried; the order moves on either way
+        for order in due:
+            self._advance(order)
+        return counts
+    
+    def _scheduled_date(self, order: StandingOrder):
+        return order.next_execution_date.astimezone(timezone.utc).date()
+    
+    def _advance(self, order: StandingOrder):
+        if order.frequency not in FREQUENCIES:
+            # Unknown frequencies run once rather than being due forever
+            order.is_active = False
+            return
+        # Occurrences are keyed by day, so the next one starts after the whole scheduled day
+        day_end = datetime.combine(self._scheduled_date(order), time.max, tzinfo=timezone.utc)
+        following = next_execution_date(order.start_date, order.frequency, order.end_date, after=day_end)
+        if following is None:
+            order.is_active = False
+        else:
+            order.next_execution_date = following
\ No newline at end of file
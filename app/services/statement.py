@@ -0,0 +1,91 @@
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from app.models.transaction import Transaction, Entry
+from app.services.account import AccountService, signed_entry_amount
+from app.core.money import to_money
+from typing import Iterator, Dict
+from datetime import datetime, timedelta
+from decimal import Decimal
+import csv
+import io
+import json
+
+# Entries fetched per round-trip from the server-side cursor
+STATEMENT_FETCH_SIZE = 1000
+
+CSV_COLUMNS = ["date", "reference", "description", "entry_type", "amount", "running_balance"]
+
+class StatementService:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def opening_balance(self, account_id: str, start_date: datetime) -> Decimal:
+        """Balance of the account immediately before start_date"""
+        return AccountService(self.db).balance_as_of(account_id, start_date - timedelta(microseconds=1))
+    
+    def stream_statement(self, account_id: str, start_date: datetime, end_date: datetime) -> Iterator[Dict]:
+        """Yield the opening line, every entry with its running balance, then the closing line"""
+        opening = self.opening_balance(account_id, start_date)
+        yield {"type": "opening", "date": start_date.isoformat(), "balance": str(opening)}
+        
+        # Running balance is computed by the database in the same pass that reads the entries
+        running = func.sum(signed_entry_amount()).over(
+            order_by=(Entry.created_at, Entry.id),
+            rows=(None, 0)
+        )
+        query = select(
+            Entry.created_at,
+            Transaction.transaction_id,
+            Transaction.description,
+            Entry.entry_type,
+            Entry.amount,
+            running.label("movement")
+        ).join(Transaction, Transaction.id == Entry.transaction_id, isouter=True).where(
+            Entry.account_id == account_id,
+            Entry.created_at >= start_date,
+            Entry.created_at < end_date
+        ).order_by(Entry.created_at, Entry.id)
+        
+        closing = opening
+        result = self.db.execute(
+            query.execution_options(stream_results=True, yield_per=STATEMENT_FETCH_SIZE)
+        )
+        try:
+            for row in result:
+                closing = opening + to_money(row.movement)
+                yield {
+                    "type": "entry",
+                    "date": row.created_at.isoformat() if row.created_at else None,
+                    "reference": row.transaction_id,
+                    "description": row.description,
+                    "entry_type": row.entry_type.value,
+                    "amount": str(to_money(row.amount)),
+                    "running_balance": str(closing)
+                }
+        finally:
+            result.close()
+        
+        yield {"type": "closing", "date": end_date.isoformat(), "balance": str(closing)}
+    
+    def stream_jsonl(self, account_id: str, start_date: datetime, end_date: datetime) -> Iterator[str]:
+        for line in self.stream_statement(account_id, start_date, end_date):
+            yield json.dumps(line) + "\n"
+    
+    def stream_csv(self, account_id: str, start_date: datetime, end_date: datetime) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        
+        def flush() -> str:
+            value = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return value
+        
+        writer.writerow(CSV_COLUMNS)
+        for line in self.stream_statement(account_id, start_date, end_date):
+            if line["type"] == "entry":
+                writer.writerow([line[column] for column in CSV_COLUMNS])
+            else:
+                label = "Opening balance" if line["type"] == "opening" else "Closing balance"
+                writer.writerow([line["date"], "", label, "", "", line["balance"]])
+            yield flush()
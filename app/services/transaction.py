@@ -1,11 +1,51 @@
+from sqlalchemy import insert, update, select, union, tuple_, func, literal, cast, String, Select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.transaction import Transaction, Entry, TransactionStatus, EntryType
-from app.models.account import Balance, Account
+from app.models.account import Balance
+from app.models.notification import NotificationOutbox, NotificationType, NotificationChannel, NotificationStatus
 from app.schemas.transaction import TransactionCreate
-from typing import List, Optional
+from app.core.config import settings
+from app.core.money import add_money
+from app.core.pagination import encode_cursor, decode_cursor
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime
+from decimal import Decimal
 import uuid
 
+def account_history_query(account_id: str, limit: int, cursor: Optional[str] = None,
+                          start_date: Optional[datetime] = None, end_date: Optional[datetime] = None):
+    """One page plus one row of an account's history, newest first"""
+    after = decode_cursor(cursor) if cursor else None
+    
+    def side(column):
+        # One index range scan per account column instead of an OR over both
+        query = select(Transaction.id, Transaction.created_at).where(column == account_id)
+        if start_date:
+            query = query.where(Transaction.created_at >= start_date)
+        if end_date:
+            query = query.where(Transaction.created_at < end_date)
+        if after:
+            query = query.where(tuple_(Transaction.created_at, Transaction.id) < after)
+        return query.order_by(
+            Transaction.created_at.desc(), Transaction.id.desc()
+        ).limit(limit + 1).subquery()
+    
+    from_side = side(Transaction.from_account_id)
+    to_side = side(Transaction.to_account_id)
+    page_ids = union(select(from_side), select(to_side)).subquery()
+    
+    return select(Transaction).join(page_ids, Transaction.id == page_ids.c.id).order_by(
+        Transaction.created_at.desc(), Transaction.id.desc()
+    ).limit(limit + 1)
+
+def account_history_page(transactions: List[Transaction], limit: int) -> Tuple[List[Transaction], Optional[str]]:
+    next_cursor = None
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        next_cursor = encode_cursor(transactions[-1].created_at, transactions[-1].id)
+    return transactions, next_cursor
+
 class TransactionService:
     def __init__(self, db: Session):
         self.db = db
@@ -26,18 +66,25 @@ class TransactionService:
     def get_transaction(self, transaction_id: str) -> Optional[Transaction]:
         return self.db.query(Transaction).filter(Transaction.id == transaction_id).first()
     
-    def get_account_transactions(self, account_id: str, skip: int = 0, limit: int = 100) -> List[Transaction]:
-        return self.db.query(Transaction).filter(
-            (Transaction.from_account_id == account_id) | 
-            (Transaction.to_account_id == account_id)
-        ).offset(skip).limit(limit).all()
+    def get_account_transactions(self, account_id: str, limit: int = 100, cursor: Optional[str] = None,
+                                 start_date: Optional[datetime] = None,
+                                 end_date: Optional[datetime] = None) -> Tuple[List[Transaction], Optional[str]]:
+        """Page through account history newest first, returning the page and the next cursor"""
+        query = account_history_query(account_id, limit, cursor, start_date, end_date)
+        return account_history_page(self.db.execute(query).scalars().all(), limit)
     
     def process_transaction(self, transaction_id: str) -> bool:
-        transaction = self.get_transaction(transaction_id)
+        # Lock the transaction row so concurrent processors can't post it twice
+        transaction = self.db.query(Transaction).filter(
+            Transaction.id == transaction_id
+        ).with_for_update().first()
         if not transaction or transaction.status != TransactionStatus.PENDING:
+            self.db.rollback()
             return False
         
         try:
+            balances = self._lock_balances([transaction.from_account_id, transaction.to_account_id])
+            
             # Create double-entry records
             if transaction.from_account_id:
                 # Debit from source account
@@ -50,7 +97,7 @@ class TransactionService:
                 self.db.add(debit_entry)
                 
                 # Update source account balance
-                self._update_account_balance(transaction.from_account_id, -float(transaction.amount))
+                self._update_account_balance(balances.get(transaction.from_account_id), -transaction.amount)
             
             if transaction.to_account_id:
                 # Credit to destination account
@@ -63,55 +110,258 @@ class TransactionService:
                 self.db.add(credit_entry)
                 
                 # Update destination account balance
-                self._update_account_balance(transaction.to_account_id, float(transaction.amount))
+                self._update_account_balance(balances.get(transaction.to_account_id), transaction.amount)
             
             # Update transaction status
             transaction.status = TransactionStatus.COMPLETED
             transaction.processed_at = datetime.utcnow()
             
-            # Send notifications
-            self._send_transaction_notifications(transaction)
+            # Queue notifications; the outbox dispatcher delivers them after commit
+            self._queue_transaction_notifications([transaction])
             
             self.db.commit()
             return True
-            
+        
         except Exception as e:
             self.db.rollback()
             transaction.status = TransactionStatus.FAILED
             self.db.commit()
             return False
     
-    def _update_account_balance(self, account_id: str, amount: float):
-        balance = self.db.query(Balance).filter(Balance.account_id == account_id).first()
-        if balance:
-            balance.ledger_balance += amount
-            balance.available_balance += amount
+    def process_many(self, transaction_ids: List[str], chunk_size: Optional[int] = None) -> List[Dict]:
+        """Process pending transactions in bulk, committing once per chunk"""
+        chunk_size = chunk_size or settings.transaction_batch_chunk_size
+        transaction_ids = list(dict.fromkeys(str(self._parse_uuid(str(tid)) or tid) for tid in transaction_ids))
+        
+        results = []
+        for start in range(0, len(transaction_ids), chunk_size):
+            results.extend(self._process_chunk(transaction_ids[start:start + chunk_size]))
+        return results
     
-    def _send_transaction_notifications(self, transaction: Transaction):
-        """Send notifications for completed transactions"""
+    def _process_chunk(self, transaction_ids: List[str]) -> List[Dict]:
+        lookup_ids = [uid for uid in (self._parse_uuid(tid) for tid in transaction_ids) if uid]
+        transactions = {
+            str(t.id): t for t in self.db.query(Transaction).filter(
+                Transaction.id.in_(lookup_ids)
+            ).order_by(Transaction.id).with_for_update().all()
+        } if lookup_ids else {}
+        # Read before posting: a rollback expires the rows
+        statuses = {tid: t.status for tid, t in transactions.items()}
+        pending = [t for t in transactions.values() if t.status == TransactionStatus.PENDING]
+        
         try:
-            from app.services.notification import NotificationService
-            notification_service = NotificationService(self.db)
+            self.post_transactions(pending)
+            self.db.commit()
+        
+        except Exception:
+            # Isolate the offending rows by falling back to one-at-a-time processing;
+            # each one that fails again reports its own result below
+            self.db.rollback()
+            return [
+                self._chunk_result(tid, statuses.get(tid), statuses.get(tid) == TransactionStatus.PENDING
+                                   and self.process_transaction(self._parse_uuid(tid)))
+                for tid in transaction_ids
+            ]
+        
+        return [
+            self._chunk_result(tid, statuses.get(tid), statuses.get(tid) == TransactionStatus.PENDING)
+            for tid in transaction_ids
+        ]
+    
+    def _chunk_result(self, transaction_id: str, status: Optional[TransactionStatus], posted: bool) -> Dict:
+        """Result for one requested id, with the same reason whichever path processed it"""
+        if status is None:
+            return self._batch_result(transaction_id, False, "Transaction not found")
+        if status != TransactionStatus.PENDING:
+            return self._batch_result(transaction_id, False, f"Transaction is {status.value}")
+        return self._batch_result(transaction_id, posted)
+    
+    def post_transactions(self, transactions: List[Transaction], require_funds: bool = False) -> List[Transaction]:
+        """Write entries, move balances and queue notifications without committing
+        
+        The caller owns the database transaction, so postings commit atomically with
+        its own bookkeeping. With require_funds, a transaction whose source account
+        can't cover it is marked FAILED instead of posted. Returns the posted ones.
+        """
+        # Lock every affected balance row in a single query
+        balances = self._lock_balances(
+            [t.from_account_id for t in transactions] + [t.to_account_id for t in transactions]
+        )
+        
+        entries, posted = [], []
+        processed_at = datetime.utcnow()
+        for transaction in transactions:
+            source = balances.get(transaction.from_account_id)
+            if require_funds and transaction.from_account_id and (
+                source is None or source.available_balance < transaction.amount
+            ):
+                transaction.status = TransactionStatus.FAILED
+                continue
             
-            # Notify sender
             if transaction.from_account_id:
-                account = self.db.query(Account).filter(Account.id == transaction.from_account_id).first()
-                if account and account.customer_id:
-                    notification_service.send_transaction_notification(
-                        account.customer_id, 
-                        float(transaction.amount), 
-                        "debited"
-                    )
+                entries.append({
+                    "transaction_id": transaction.id,
+                    "account_id": transaction.from_account_id,
+                    "entry_type": EntryType.DEBIT,
+                    "amount": transaction.amount
+                })
+                self._update_account_balance(source, -transaction.amount)
             
-            # Notify receiver
             if transaction.to_account_id:
-                account = self.db.query(Account).filter(Account.id == transaction.to_account_id).first()
-                if account and account.customer_id:
-                    notification_service.send_transaction_notification(
-                        account.customer_id, 
-                        float(transaction.amount), 
-                        "credited"
-                    )
-        except Exception as e:
-            # Don't fail transaction if notification fails
-            print(f"Notification failed: {e}")
\ No newline at end of file
+                entries.append({
+                    "transaction_id": transaction.id,
+                    "account_id": transaction.to_account_id,
+                    "entry_type": EntryType.CREDIT,
+                    "amount": transaction.amount
+                })
+                self._update_account_balance(balances.get(transaction.to_account_id), transaction.amount)
+            
+            transaction.status = TransactionStatus.COMPLETED
+            transaction.processed_at = processed_at
+            posted.append(transaction)
+        
+        if entries:
+            self.db.execute(insert(Entry), entries)
+        self._queue_transaction_notifications(posted)
+        return posted
+    
+    def post_credits(self, transaction: Transaction, credits: Select):
+        """Credit many accounts under one transaction without committing
+        
+        credits selects (account_id, amount) rows. They are posted with a fixed
+        number of set-based statements and never loaded into Python, so the
+        cost per row is the database's, not the ORM's.
+        """
+        credits = credits.subquery()
+        
+        # Same lock order as _lock_balances
+        self.db.execute(
+            select(Balance.account_id).where(
+                Balance.account_id.in_(select(credits.c.account_id))
+            ).order_by(Balance.account_id).with_for_update()
+        )
+        
+        self.db.execute(insert(Entry).from_select(
+            ["id", "transaction_id", "account_id", "entry_type", "amount"],
+            select(
+                func.gen_random_uuid(),
+                literal(transaction.id, Entry.transaction_id.type),
+                credits.c.account_id,
+                literal(EntryType.CREDIT, Entry.entry_type.type),
+                credits.c.amount
+            )
+        ))
+        
+        totals = select(
+            credits.c.account_id, func.sum(credits.c.amount).label("amount")
+        ).group_by(credits.c.account_id).subquery()
+        self.db.execute(
+            update(Balance).where(Balance.account_id == totals.c.account_id).values(
+                ledger_balance=Balance.ledger_balance + totals.c.amount,
+                available_balance=Balance.available_balance + totals.c.amount
+            ).execution_options(synchronize_session=False)
+        )
+        
+        self.db.execute(insert(NotificationOutbox).from_select(
+            ["id", "template_code", "notification_type", "channel", "account_id", "payload", "status", "attempts"],
+            select(
+                func.gen_random_uuid(),
+                literal("TRANSACTION_ALERT"),
+                literal(NotificationType.TRANSACTION, NotificationOutbox.notification_type.type),
+                literal(NotificationChannel.SMS, NotificationOutbox.channel.type),
+                credits.c.account_id,
+                func.json_build_object("amount", cast(credits.c.amount, String), "type", "credited"),
+                literal(NotificationStatus.PENDING, NotificationOutbox.status.type),
+                literal(0)
+            )
+        ))
+    
+    def _batch_result(self, transaction_id: str, success: bool, error: Optional[str] = None) -> Dict:
+        return {
+            "transaction_id": transaction_id,
+            "status": TransactionStatus.COMPLETED if success else TransactionStatus.FAILED,
+            "error": None if success else (error or "Transaction processing failed")
+        }
+    
+    def _parse_uuid(self, value: str) -> Optional[uuid.UUID]:
+        try:
+            return uuid.UUID(value)
+        except ValueError:
+            return None
+    
+    def _lock_balances(self, account_ids: List) -> Dict:
+        """Lock balance rows with SELECT ... FOR UPDATE in account_id order.
+        
+        Every posting path takes its locks through here, so two transfers
+        touching the same accounts always queue in the same order instead
+        of deadlocking.
+        """
+        account_ids = {account_id for account_id in account_ids if account_id}
+        if not account_ids:
+            return {}
+        
+        balances = self.db.query(Balance).filter(
+            Balance.account_id.in_(account_ids)
+        ).order_by(Balance.account_id).with_for_update().all()
+        return {balance.account_id: balance for balance in balances}
+    
+    def _update_account_balance(self, balance: Optional[Balance], amount: Decimal):
+        if balance:
+            balance.ledger_balance = add_money(balance.ledger_balance, amount)
+            balance.available_balance = add_money(balance.available_balance, amount)
+    
+    def _queue_transaction_notifications(self, transactions: List[Transaction]):
+        """Write notification events to the outbox inside the current ledger transaction"""
+        events = []
+        for transaction in transactions:
+            for account_id, direction in ((transaction.from_account_id, "debited"), (transaction.to_account_id, "credited")):
+                if account_id:
+                    events.append({
+                        "template_code": "TRANSACTION_ALERT",
+                        "notification_type": NotificationType.TRANSACTION,
+                        "channel": NotificationChannel.SMS,
+                        "account_id": account_id,
+                        "payload": {"amount": str(transaction.amount), "type": direction},
+                        "status": NotificationStatus.PENDING,
+                        "attempts": 0
+                    })
+        if events:
+            self.db.execute(insert(NotificationOutbox), events)
+
+class AsyncTransactionService:
+    """TransactionService for async routes
+    
+    Reads are native async queries. Posting runs the synchronous service through
+    run_sync, which drives it on this session's async connection, so the locking
+    and double-entry logic exists exactly once.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_transaction(self, transaction_data: TransactionCreate) -> Transaction:
+        transaction = Transaction(
+            transaction_id=f"TXN{str(uuid.uuid4().int)[:12]}",
+            **transaction_data.dict()
+        )
+        self.db.add(transaction)
+        await self.db.commit()
+        await self.db.refresh(transaction)
+        return transaction
+    
+    async def get_transaction(self, transaction_id: str) -> Optional[Transaction]:
+        return await self.db.scalar(select(Transaction).where(Transaction.id == transaction_id))
+    
+    async def get_account_transactions(self, account_id: str, limit: int = 100, cursor: Optional[str] = None,
+                                       start_date: Optional[datetime] = None,
+                                       end_date: Optional[datetime] = None) -> Tuple[List[Transaction], Optional[str]]:
+        query = account_history_query(account_id, limit, cursor, start_date, end_date)
+        return account_history_page((await self.db.scalars(query)).all(), limit)
+    
+    async def process_transaction(self, transaction_id: str) -> bool:
+        return await self.db.run_sync(lambda session: TransactionService(session).process_transaction(transaction_id))
+    
+    async def process_many(self, transaction_ids: List[str], chunk_size: Optional[int] = None) -> List[Dict]:
+        return await self.db.run_sync(
+            lambda session: TransactionService(session).process_many(transaction_ids, chunk_size=chunk_size)
+        )
\ No newline at end of file
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Read endpoint latency under concurrency: sync Session vs AsyncSession
+
+Serves an account's balance and first history page three ways from one app:
+the blocking Session inside an async route (what the routes used to do), the blocking
+Session in a plain route (FastAPI's threadpool), and the AsyncSession the routes use now.
+
+The app runs under uvicorn in a subprocess so time spent queued behind a blocked event
+loop shows up in the client's latencies.
+
+Usage: DATABASE_URL=postgresql://... python scripts/benchmark_async_db.py [requests] [concurrency]
+"""
+
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SessionLocal, get_async_db, engine, async_engine
+from app.models.account import Account
+from app.services.account import AccountService, AsyncAccountService
+from app.services.transaction import TransactionService, AsyncTransactionService
+
+app = FastAPI()
+
+def read_sync(account_id: str):
+    # The session is closed in the route, not by a get_db teardown: with the event loop
+    # blocked, teardowns can't run and requests past the pool size would wait out pool_timeout
+    with SessionLocal() as db:
+        AccountService(db).get_balance(account_id)
+        TransactionService(db).get_account_transactions(account_id, limit=50)
+
+@app.get("/blocking/{account_id}")
+async def blocking(account_id: str):
+    read_sync(account_id)
+
+@app.get("/threadpool/{account_id}")
+def threadpool(account_id: str):
+    read_sync(account_id)
+
+@app.get("/async/{account_id}")
+async def native(account_id: str, db: AsyncSession = Depends(get_async_db)):
+    await AsyncAccountService(db).get_balance(account_id)
+    await AsyncTransactionService(db).get_account_transactions(account_id, limit=50)
+
+def percentile(latencies, pct):
+    return statistics.quantiles(latencies, n=100)[pct - 1] * 1000
+
+async def run(client, label, account_ids, requests, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def call(i):
+        async with gate:
+            start = time.perf_counter()
+            response = await client.get(f"/{label}/{account_ids[i % len(account_ids)]}")
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+    
+    # Warm both pools so connection setup isn't in the numbers
+    await asyncio.gather(*(call(i) for i in range(concurrency)))
+    latencies.clear()
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<11} {requests / elapsed:>9,.0f} req/s   p50 {percentile(latencies, 50):>8.1f} ms   "
+          f"p99 {percentile(latencies, 99):>8.1f} ms")
+
+async def benchmark(base_url, account_ids, requests, concurrency):
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        for _ in range(100):
+            try:
+                await client.get("/docs")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+        for label in ("blocking", "threadpool", "async"):
+            await run(client, label, account_ids, requests, concurrency)
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    
+    with SessionLocal() as db:
+        account_ids = [str(account_id) for (account_id,) in db.query(Account.id).limit(100)]
+    if not account_ids:
+        sys.exit("No accounts to read; seed the database first")
+    
+    print(f"🏦 {requests:,} requests, {concurrency} concurrent, {len(account_ids)} accounts "
+          f"(pool {engine.pool.size()} sync / {async_engine.pool.size()} async)")
+    port = os.getenv("BENCHMARK_PORT", "8765")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--app-dir", os.path.join(ROOT, "scripts"),
+         "benchmark_async_db:app", "--port", port, "--log-level", "warning"],
+        env={**os.environ, "PYTHONPATH": ROOT}
+    )
+    try:
+        asyncio.run(benchmark(f"http://127.0.0.1:{port}", account_ids, requests, concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
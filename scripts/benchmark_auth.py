@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Per-request authentication overhead: token decode alone, users table lookup, principal cache
+
+Creates a throwaway user, then resolves the same bearer token repeatedly through
+get_current_user with the principal cache off and on.
+
+Usage: DATABASE_URL=postgresql://... python scripts/benchmark_auth.py [requests]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jose import jwt
+
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.principal_cache import PrincipalCache
+from app.database import SessionLocal
+from app.models.user import User, UserRole, UserStatus
+from app.services.auth import create_access_token
+import app.core.auth as auth
+
+def report(label, samples):
+    micros = sorted(sample * 1_000_000 for sample in samples)
+    p99 = statistics.quantiles(micros, n=100)[98]
+    print(f"{label:<16} p50 {statistics.median(micros):>9.1f} µs   p99 {p99:>9.1f} µs")
+
+def time_calls(call, requests):
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    db = SessionLocal()
+    user = User(username=f"bench{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex[:8]}@bench.local",
+                password_hash="x", role=UserRole.TELLER, status=UserStatus.ACTIVE)
+    db.add(user)
+    db.commit()
+    token = create_access_token({"sub": user.username}, expires_delta=timedelta(minutes=10))
+    loop = asyncio.new_event_loop()
+    
+    def authenticate():
+        loop.run_until_complete(get_current_user(token, db))
+        # A request ends its transaction, so each lookup starts a new one like it would in a route
+        db.rollback()
+    
+    print(f"🔐 {requests:,} authentications of one token")
+    try:
+        report("decode only", time_calls(
+            lambda: jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm]), requests
+        ))
+        auth.principal_cache = PrincipalCache(ttl_seconds=0, max_size=0)
+        report("database", time_calls(authenticate, requests))
+        auth.principal_cache = PrincipalCache(ttl_seconds=60, max_size=10000)
+        report("cached", time_calls(authenticate, requests))
+    finally:
+        db.delete(user)
+        db.commit()
+        db.close()
+        loop.close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
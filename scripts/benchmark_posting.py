@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Posting throughput micro-benchmark: legacy float round-trips vs shared Decimal money helpers
+
+Usage: python scripts/benchmark_posting.py [postings]
+"""
+
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.money import add_money, ZERO
+
+def legacy_posting(amounts):
+    """What the services used to do: float(amount) into a balance, Decimal(str()) back out"""
+    balance = 0.0
+    for amount in amounts:
+        balance += float(amount)
+        Decimal(str(balance)).quantize(Decimal('0.01'))
+    # Exact binary value of the running float, i.e. before any display rounding
+    return Decimal(balance)
+
+def decimal_posting(amounts):
+    """Current path: every posting stays in Decimal cents"""
+    balance = ZERO
+    for amount in amounts:
+        balance = add_money(balance, amount)
+    return balance
+
+def run(label, func, amounts, expected):
+    start = time.perf_counter()
+    result = func(amounts)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {len(amounts) / elapsed:>14,.0f} postings/s   drift: {result - expected}")
+
+def main():
+    postings = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(42)
+    cents = [rng.randint(-500_000, 500_000) for _ in range(postings)]
+    amounts = [Decimal(c).scaleb(-2) for c in cents]
+    expected = Decimal(sum(cents)).scaleb(-2)
+
+    print(f"🏦 Posting {postings:,} amounts")
+    run("float", legacy_posting, amounts, expected)
+    run("decimal", decimal_posting, amounts, expected)
+
+if __name__ == "__main__":
+    main()
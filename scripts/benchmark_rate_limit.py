@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Rate limiter cost per request and memory per caller: sorted-set window vs Lua GCRA
+
+Replays the same traffic through the four-command ZREMRANGEBYSCORE/ZCARD/ZADD/EXPIRE
+pipeline the middleware used to run and through the GCRA script it runs now, then
+reports throughput, latency and MEMORY USAGE of one caller's key after a full window.
+
+Usage: REDIS_HOST=... python scripts/benchmark_rate_limit.py [requests] [concurrency] [callers]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redis
+
+from app.core.redis_client import get_async_redis, get_redis
+from app.middleware.rate_limit import GCRA_SCRIPT, GCRA_SHA
+
+LIMIT = 1000
+PERIOD_SECONDS = 60
+
+async def sorted_set_window(client, key):
+    now = time.time()
+    async with client.pipeline() as pipe:
+        pipe.zremrangebyscore(key, 0, now - PERIOD_SECONDS)
+        pipe.zcard(key)
+        pipe.zadd(key, {str(now): now})
+        pipe.expire(key, PERIOD_SECONDS)
+        results = await pipe.execute()
+    return results[1] < LIMIT
+
+async def gcra(client, key):
+    period = PERIOD_SECONDS * 1000
+    result = await client.evalsha(GCRA_SHA, 1, key, period // LIMIT, period)
+    return bool(result[0])
+
+def percentile(latencies, pct):
+    return statistics.quantiles(latencies, n=100)[pct - 1] * 1000
+
+async def run(label, limiter, requests, concurrency, callers):
+    client = get_async_redis()
+    prefix = f"rate_limit:benchmark:{label}:{uuid.uuid4().hex[:8]}"
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def call(i):
+        async with gate:
+            start = time.perf_counter()
+            await limiter(client, f"{prefix}:{i % callers}")
+            latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    
+    # One caller sending a full window's worth, the worst case for the sorted set
+    key = f"{prefix}:full"
+    for _ in range(LIMIT):
+        await limiter(client, key)
+    memory = await client.memory_usage(key)
+    
+    keys = [key async for key in client.scan_iter(match=f"{prefix}:*", count=1000)]
+    if keys:
+        await client.delete(*keys)
+    print(f"{label:<11} {requests / elapsed:>9,.0f} req/s   p50 {percentile(latencies, 50):>6.2f} ms   "
+          f"p99 {percentile(latencies, 99):>6.2f} ms   {memory:>7,} bytes/caller at {LIMIT} requests")
+
+async def benchmark(requests, concurrency, callers):
+    await get_async_redis().script_load(GCRA_SCRIPT)
+    for label, limiter in (("sorted-set", sorted_set_window), ("gcra", gcra)):
+        await run(label, limiter, requests, concurrency, callers)
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    callers = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    try:
+        get_redis().ping()
+    except redis.RedisError as e:
+        sys.exit(f"Redis is not reachable: {e}")
+    
+    print(f"🚦 {requests:,} requests, {concurrency} concurrent, {callers} callers, limit {LIMIT}/{PERIOD_SECONDS}s")
+    asyncio.run(benchmark(requests, concurrency, callers))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,30 @@
+from datetime import date
+from decimal import Decimal
+from app.services.amortization import LoanTerms, amortization_schedule, amortization_schedules, monthly_payment, monthly_rate
+from app.services.loan import LoanService
+
+def test_monthly_payment_matches_standard_annuity():
+    assert monthly_payment(Decimal("100000"), monthly_rate(Decimal("12")), 360) == Decimal("1028.61")
+    assert monthly_payment(Decimal("1200"), monthly_rate(Decimal("0")), 12) == Decimal("100.00")
+    assert LoanService(None)._calculate_monthly_payment(Decimal("5000"), Decimal("0.12") / 12, 24) == Decimal("235.37")
+
+def test_schedule_closes_at_exactly_zero():
+    terms = LoanTerms(Decimal("25000.00"), Decimal("7.5"), 60, date(2026, 1, 31))
+    schedule = amortization_schedule(terms)
+    
+    assert len(schedule) == 60
+    assert schedule[-1].remaining_balance == Decimal("0.00")
+    assert sum(installment.principal for installment in schedule) == terms.principal
+    assert all(installment.payment == installment.principal + installment.interest for installment in schedule)
+    # Level payments except for the final rounding adjustment
+    assert len({installment.payment for installment in schedule[:-1]}) == 1
+    assert [installment.due_date for installment in schedule[:2]] == [date(2026, 2, 28), date(2026, 3, 31)]
+
+def test_batch_matches_single_loan_schedules():
+    portfolio = [
+        LoanTerms(Decimal("1000.00"), Decimal("12"), 12, date(2026, 1, 1)),
+        LoanTerms(Decimal("98765.43"), Decimal("4.25"), 360, date(2026, 3, 15)),
+        LoanTerms(Decimal("1000.00"), Decimal("12"), 12, date(2026, 2, 1)),
+        LoanTerms(Decimal("500.00"), Decimal("0"), 7, date(2026, 1, 1)),
+    ]
+    assert amortization_schedules(portfolio) == [amortization_schedule(terms) for terms in portfolio]
\ No newline at end of file
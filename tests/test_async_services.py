@@ -0,0 +1,87 @@
+import pytest
+import pytest_asyncio
+import os
+import uuid
+from decimal import Decimal
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.core.config import settings
+from app.database import Base, async_database_url
+from app.models.account import AccountType
+from app.models.transaction import TransactionType, TransactionStatus
+from app.schemas.account import AccountCreate
+from app.schemas.customer import CustomerCreate, CustomerResponse
+from app.schemas.transaction import TransactionCreate
+from app.services.account import AsyncAccountService
+from app.services.customer import AsyncCustomerService
+from app.services.transaction import AsyncTransactionService
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+@pytest.fixture(scope="module", autouse=True)
+def schema():
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("Async service tests require PostgreSQL")
+    engine = create_engine(TEST_DATABASE_URL)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+@pytest_asyncio.fixture
+async def db():
+    # asyncpg connections belong to one event loop, so each test gets its own engine
+    engine = create_async_engine(async_database_url(TEST_DATABASE_URL), poolclass=NullPool)
+    session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+    yield session
+    await session.close()
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_customer_and_accounts_round_trip(db):
+    suffix = uuid.uuid4().hex[:8]
+    customer = await AsyncCustomerService(db).create_customer(CustomerCreate(
+        first_name="Async", last_name="Reader", email=f"async{suffix}@example.com"
+    ))
+    # kyc_documents is loaded eagerly, so serializing doesn't trigger a lazy load
+    assert CustomerResponse.model_validate(customer).kyc_documents == []
+    
+    service = AsyncAccountService(db)
+    account = await service.create_account(AccountCreate(customer_id=str(customer.id), account_type=AccountType.SAVINGS))
+    assert (await service.get_balance(str(account.id))).ledger_balance == Decimal("0.00")
+    assert [a.id for a in await service.get_customer_accounts(str(customer.id))] == [account.id]
+    assert (await service.get_account_by_number(account.account_number)).id == account.id
+
+@pytest.mark.asyncio
+async def test_process_and_page_history(db):
+    suffix = uuid.uuid4().hex[:8]
+    customer = await AsyncCustomerService(db).create_customer(CustomerCreate(
+        first_name="Async", last_name="Poster", email=f"poster{suffix}@example.com"
+    ))
+    account = await AsyncAccountService(db).create_account(
+        AccountCreate(customer_id=str(customer.id), account_type=AccountType.CURRENT)
+    )
+    
+    service = AsyncTransactionService(db)
+    created = []
+    for amount in ("10.00", "20.00", "30.00"):
+        transaction = await service.create_transaction(TransactionCreate(
+            to_account_id=str(account.id), amount=Decimal(amount), currency="USD", transaction_type=TransactionType.DEPOSIT
+        ))
+        assert await service.process_transaction(str(transaction.id))
+        created.append(transaction)
+    
+    assert (await service.get_transaction(str(created[0].id))).status == TransactionStatus.COMPLETED
+    balance = await AsyncAccountService(db).get_balance(str(account.id))
+    await db.refresh(balance)
+    assert balance.ledger_balance == Decimal("60.00")
+    
+    first, cursor = await service.get_account_transactions(str(account.id), limit=2)
+    rest, end = await service.get_account_transactions(str(account.id), limit=2, cursor=cursor)
+    assert [t.id for t in first + rest] == [t.id for t in reversed(created)]
+    assert end is None
\ No newline at end of file
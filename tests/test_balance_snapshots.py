@@ -0,0 +1,104 @@
+import pytest
+import os
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.database import Base
+from app.models.account import Account, Balance, BalanceSnapshot, AccountType
+from app.models.transaction import Transaction, TransactionType, TransactionStatus, Entry, EntryType
+from app.services.account import AccountService
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+MONDAY, TUESDAY, WEDNESDAY = date(2025, 3, 3), date(2025, 3, 4), date(2025, 3, 5)
+
+@pytest.fixture
+def db():
+    """A schema of its own: snapshot runs pick up from the newest snapshot of any account"""
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("Balance snapshots are built with PostgreSQL date functions")
+    schema = f"snapshots_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(TEST_DATABASE_URL)
+    try:
+        with admin.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-csearch_path={schema}"})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+    admin.dispose()
+
+def _at(day, hour, minute=0, second=0):
+    return datetime(day.year, day.month, day.day, hour, minute, second, tzinfo=timezone.utc)
+
+def _account(db):
+    account = Account(account_number=f"BS{str(uuid.uuid4().int)[:10]}", account_type=AccountType.CURRENT)
+    db.add(account)
+    db.flush()
+    db.add(Balance(account_id=account.id, ledger_balance=0, available_balance=0))
+    return account
+
+def _post(db, account, entry_type, amount, created_at):
+    transaction = Transaction(
+        transaction_id=f"BS{uuid.uuid4().hex[:16]}", to_account_id=account.id, amount=amount, currency="USD",
+        transaction_type=TransactionType.DEPOSIT, status=TransactionStatus.COMPLETED, created_at=created_at
+    )
+    db.add(transaction)
+    db.flush()
+    db.add(Entry(transaction_id=transaction.id, account_id=account.id, entry_type=entry_type,
+                 amount=amount, created_at=created_at))
+    db.commit()
+
+def _snapshots(db, account):
+    rows = db.query(BalanceSnapshot).filter(BalanceSnapshot.account_id == account.id)
+    return {row.snapshot_date: row.closing_balance for row in rows}
+
+def test_snapshots_and_balance_as_of_agree_with_the_entries(db):
+    account = _account(db)
+    _post(db, account, EntryType.CREDIT, Decimal("100.00"), _at(MONDAY, 10))
+    _post(db, account, EntryType.DEBIT, Decimal("30.00"), _at(TUESDAY, 12))
+    _post(db, account, EntryType.CREDIT, Decimal("5.00"), _at(WEDNESDAY, 8))
+    
+    service = AccountService(db)
+    assert service.build_balance_snapshots(through=TUESDAY) == 2
+    assert _snapshots(db, account) == {MONDAY: Decimal("100.00"), TUESDAY: Decimal("70.00")}
+    
+    assert service.balance_as_of(account.id, _at(MONDAY, 9)) == Decimal("0.00")
+    assert service.balance_as_of(account.id, _at(TUESDAY, 11, 59)) == Decimal("100.00")
+    assert service.balance_as_of(account.id, _at(TUESDAY, 12)) == Decimal("70.00")
+    # Past the last snapshot only the entries since it are summed
+    assert service.balance_as_of(account.id, _at(WEDNESDAY, 23)) == Decimal("75.00")
+    assert service.balance_as_of(account.id, datetime(2025, 3, 10)) == Decimal("75.00")
+
+def test_posting_that_commits_after_the_run_is_picked_up_by_the_next(db):
+    account = _account(db)
+    _post(db, account, EntryType.CREDIT, Decimal("100.00"), _at(MONDAY, 10))
+    service = AccountService(db)
+    service.build_balance_snapshots(through=MONDAY)
+    
+    # Began just before midnight, committed after Monday was snapshotted
+    _post(db, account, EntryType.CREDIT, Decimal("10.00"), _at(MONDAY, 23, 59, 59))
+    _post(db, account, EntryType.DEBIT, Decimal("20.00"), _at(TUESDAY, 9))
+    service.build_balance_snapshots(through=TUESDAY)
+    assert _snapshots(db, account) == {MONDAY: Decimal("110.00"), TUESDAY: Decimal("90.00")}
+    assert service.balance_as_of(account.id, _at(WEDNESDAY, 0)) == Decimal("90.00")
+
+def test_days_inside_the_settle_lag_are_left_for_later(db):
+    account = _account(db)
+    now = datetime.now(timezone.utc)
+    _post(db, account, EntryType.CREDIT, Decimal("40.00"), now - timedelta(days=2))
+    _post(db, account, EntryType.CREDIT, Decimal("2.00"), now)
+    
+    AccountService(db).build_balance_snapshots(through=now.date())
+    assert now.date() not in _snapshots(db, account)
+    assert AccountService(db).balance_as_of(account.id, now) == Decimal("42.00")
\ No newline at end of file
@@ -0,0 +1,80 @@
+import pytest
+import os
+import uuid
+from decimal import Decimal
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.database import Base
+from app.models.account import Account, Balance, AccountType
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.services.transaction import TransactionService
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+# Crediting this much to it overflows the balance column, failing the whole chunk's commit
+NEARLY_FULL = Decimal("9999999999999.00")
+
+@pytest.fixture
+def db():
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("Batch processing is exercised against PostgreSQL")
+    engine = create_engine(TEST_DATABASE_URL)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def _account(db, balance=Decimal("0.00")):
+    account = Account(account_number=f"BP{str(uuid.uuid4().int)[:10]}", account_type=AccountType.CURRENT)
+    db.add(account)
+    db.flush()
+    db.add(Balance(account_id=account.id, ledger_balance=balance, available_balance=balance))
+    return account
+
+def _deposit(db, account, amount, status=TransactionStatus.PENDING):
+    transaction = Transaction(
+        transaction_id=f"BP{uuid.uuid4().hex[:16]}", to_account_id=account.id, amount=amount,
+        currency="USD", transaction_type=TransactionType.DEPOSIT, status=status
+    )
+    db.add(transaction)
+    return transaction
+
+def _mixed_chunk(db, failing):
+    account = _account(db)
+    good = _deposit(db, account, Decimal("10.00"))
+    done = _deposit(db, account, Decimal("5.00"), TransactionStatus.COMPLETED)
+    transactions = [good, done]
+    if failing:
+        transactions.append(_deposit(db, _account(db, NEARLY_FULL), Decimal("100.00")))
+    db.commit()
+    ids = [str(t.id) for t in transactions] + [str(uuid.uuid4()), "not-a-uuid"]
+    return account, ids
+
+def _reasons(results):
+    return [(r["status"], r["error"]) for r in results]
+
+@pytest.mark.parametrize("failing", [False, True], ids=["in-bulk", "one-at-a-time"])
+def test_mixed_chunk_reports_the_same_reason_on_either_path(db, failing):
+    account, ids = _mixed_chunk(db, failing)
+    results = TransactionService(db).process_many(ids)
+    
+    assert [r["transaction_id"] for r in results] == ids
+    expected = [
+        (TransactionStatus.COMPLETED, None),
+        (TransactionStatus.FAILED, "Transaction is COMPLETED")
+    ]
+    if failing:
+        expected.append((TransactionStatus.FAILED, "Transaction processing failed"))
+    expected += [(TransactionStatus.FAILED, "Transaction not found")] * 2
+    assert _reasons(results) == expected
+    
+    db.expire_all()
+    assert db.query(Balance.ledger_balance).filter(Balance.account_id == account.id).scalar() == Decimal("10.00")
\ No newline at end of file
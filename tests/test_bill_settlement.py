@@ -0,0 +1,89 @@
+import pytest
+import os
+import uuid
+from decimal import Decimal
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.database import Base
+from app.models.customer import Customer
+from app.models.account import Account, AccountType, Balance
+from app.models.payment import BillPayment, BillerSettlement, PaymentStatus
+from app.models.transaction import Entry
+from app.services.bill_payment import BillPaymentService
+
+# Row locks and partial indexes are exercised against PostgreSQL
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+engine = create_engine(TEST_DATABASE_URL)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module")
+def db():
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("Settlement tests require PostgreSQL")
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+
+@pytest.fixture
+def accounts(db):
+    suffix = str(uuid.uuid4().int)[:8]
+    customer = Customer(customer_number=f"BS{suffix}", first_name="Bill", last_name="Payer")
+    db.add(customer)
+    db.flush()
+    accounts = []
+    for name in ("P", "S", "O"):
+        account = Account(account_number=f"BS{name}{suffix}", customer_id=customer.id, account_type=AccountType.CURRENT)
+        db.add(account)
+        db.flush()
+        db.add(Balance(account_id=account.id, ledger_balance=Decimal("100.00"), available_balance=Decimal("100.00")))
+        accounts.append(account)
+    db.commit()
+    return accounts
+
+def _balance(db, account):
+    db.expire_all()
+    return db.get(Balance, account.id).ledger_balance
+
+def test_bills_accumulate_and_settle_in_one_transfer(db, accounts):
+    payer, settlement, payout = accounts
+    service = BillPaymentService(db)
+    biller = service.create_biller(f"B{payer.account_number}", "Water", str(settlement.id), str(payout.id))
+    
+    for number in range(5):
+        payment = service.pay_bill(str(payer.id), biller.biller_code, f"M{number}", Decimal("7.50"))
+        assert payment.status == PaymentStatus.COMPLETED
+    assert _balance(db, payer) == Decimal("62.50")
+    assert _balance(db, settlement) == Decimal("137.50")
+    
+    assert service.sweep_settlements()[biller.biller_code] == 5
+    assert _balance(db, settlement) == Decimal("100.00")
+    assert _balance(db, payout) == Decimal("137.50")
+    
+    settlement_row = db.query(BillerSettlement).filter(BillerSettlement.biller_id == biller.id).one()
+    assert settlement_row.amount == Decimal("37.50") and settlement_row.payment_count == 5
+    # One debit and one credit for the whole batch
+    assert db.query(Entry).filter(Entry.transaction_id == settlement_row.transaction_id).count() == 2
+    
+    assert biller.biller_code not in service.sweep_settlements()
+
+def test_insufficient_funds_records_a_failed_payment(db, accounts):
+    payer, settlement, payout = accounts
+    service = BillPaymentService(db)
+    biller = service.create_biller(f"B{payer.account_number}", "Power", str(settlement.id), str(payout.id))
+    
+    with pytest.raises(ValueError, match="Insufficient funds"):
+        service.pay_bill(str(payer.id), biller.biller_code, "M1", Decimal("250.00"))
+    failed = db.query(BillPayment).filter(BillPayment.biller_code == biller.biller_code).one()
+    assert failed.status == PaymentStatus.FAILED
+    assert _balance(db, payer) == Decimal("100.00")
+    assert biller.biller_code not in service.sweep_settlements()
\ No newline at end of file
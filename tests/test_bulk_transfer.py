@@ -0,0 +1,152 @@
+import io
+import os
+import pytest
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from sqlalchemy import create_engine, func, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.database import Base
+from app.models.account import Account, Balance, AccountType
+from app.models.payment import BulkTransferJob, PaymentStatus
+from app.models.transaction import Entry, Transaction
+from app.services.bulk_transfer import BulkTransferService, batched, read_rows, validate_rows
+from app.services.transaction import TransactionService
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+def _validated(text, file_format):
+    return list(validate_rows(read_rows(io.StringIO(text), file_format)))
+
+def test_csv_rows_are_validated_one_by_one():
+    rows = _validated(
+        "Account_Number, Amount ,reference\n"
+        "1001,2500.00,October\n"
+        ",10.00,\n"
+        "1002,abc,\n"
+        "1003,-5,\n"
+        "1004,1.005,\n",
+        "CSV"
+    )
+    assert [row.row_number for row in rows] == [1, 2, 3, 4, 5]
+    assert rows[0].account_number == "1001" and rows[0].amount == Decimal("2500.00") and rows[0].error is None
+    assert [row.error for row in rows[1:]] == [
+        "Missing account number", "Invalid amount", "Amount must be positive",
+        "Amount has more than two decimal places"
+    ]
+
+def test_csv_without_required_columns_is_rejected():
+    with pytest.raises(ValueError, match="Missing columns: amount"):
+        _validated("account_number,value\n1001,5\n", "CSV")
+
+def test_jsonl_keeps_decimal_amounts_and_flags_malformed_lines():
+    rows = _validated('{"account_number": "1001", "amount": 0.1, "currency": "usd"}\n\nnot json\n[1]\n', "JSONL")
+    assert [row.row_number for row in rows] == [1, 2, 3]
+    assert rows[0].amount == Decimal("0.10") and rows[0].currency == "USD"
+    assert rows[1].error == rows[2].error == "Malformed row"
+
+def test_batched_streams_fixed_size_batches():
+    batches = batched(iter(range(7)), 3)
+    assert next(batches) == [0, 1, 2]
+    assert list(batches) == [[3, 4, 5], [6]]
+
+@pytest.fixture
+def db():
+    """A session on a schema of its own: resume_stalled scans every job"""
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("Bulk transfers are staged and claimed on PostgreSQL")
+    schema = f"bulk_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(TEST_DATABASE_URL)
+    try:
+        with admin.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-csearch_path={schema}"})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+    admin.dispose()
+
+def _account(db, balance=Decimal("0.00")):
+    account = Account(account_number=f"BT{str(uuid.uuid4().int)[:10]}", account_type=AccountType.CURRENT)
+    db.add(account)
+    db.flush()
+    db.add(Balance(account_id=account.id, ledger_balance=balance, available_balance=balance))
+    return account
+
+def _balance(db, account):
+    return db.query(Balance.ledger_balance).filter(Balance.account_id == account.id).scalar()
+
+def _fail_once(monkeypatch, owner, name, on_call):
+    """Make owner.name raise on its on_call-th call, as a worker dying mid-file would"""
+    original, calls = getattr(owner, name), []
+    def wrapper(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == on_call:
+            raise RuntimeError("worker lost")
+        return original(*args, **kwargs)
+    monkeypatch.setattr(owner, name, wrapper)
+
+def _payroll(db, path, amounts):
+    """A job paying each amount to a fresh account out of a source holding 1000.00"""
+    source = _account(db, Decimal("1000.00"))
+    payees = [_account(db) for _ in amounts]
+    db.commit()
+    path.write_text("account_number,amount\n" + "".join(
+        f"{payee.account_number},{amount}\n" for payee, amount in zip(payees, amounts)
+    ))
+    job = BulkTransferService(db).create_job(str(source.id), path.name, "CSV", str(path))
+    return job, source, payees
+
+@pytest.mark.parametrize("step", ["_stage", "post_credits"])
+def test_stalled_job_resumes_without_posting_twice(db, tmp_path, monkeypatch, step):
+    amounts = [Decimal(f"{10 * (i + 1)}.50") for i in range(5)]
+    path = tmp_path / "payroll.csv"
+    job, source, payees = _payroll(db, path, amounts)
+    service = BulkTransferService(db)
+    
+    owner = BulkTransferService if step == "_stage" else TransactionService
+    _fail_once(monkeypatch, owner, step, on_call=2)
+    with pytest.raises(RuntimeError):
+        service.process(str(job.id), batch_size=2)
+    db.rollback()
+    assert service.get_job(str(job.id)).status == PaymentStatus.PROCESSING
+    
+    # A worker that is still beating keeps its job
+    assert service.resume_stalled() == []
+    db.execute(update(BulkTransferJob).values(heartbeat_at=func.now() - timedelta(hours=1)))
+    db.commit()
+    assert service.resume_stalled() == [str(job.id)]
+    
+    job = service.process(str(job.id), batch_size=2)
+    assert job.status == PaymentStatus.COMPLETED
+    assert service.process(str(job.id), batch_size=2) is None
+    
+    db.expire_all()
+    assert (job.total_rows, job.valid_rows, job.credited_rows) == (5, 5, 5)
+    assert job.total_amount == job.credited_amount == sum(amounts)
+    assert [_balance(db, payee) for payee in payees] == amounts
+    assert _balance(db, source) == Decimal("1000.00") - sum(amounts)
+    assert db.query(Transaction).filter(Transaction.from_account_id == source.id).count() == 1
+    assert db.query(Entry).filter(Entry.account_id.in_([payee.id for payee in payees])).count() == 5
+    # Staged rows are all a resume needs, so the upload is gone
+    assert not path.exists()
+
+def test_pending_job_whose_task_was_lost_is_queued_again(db, tmp_path):
+    job, _, payees = _payroll(db, tmp_path / "payroll.csv", [Decimal("12.00")])
+    service = BulkTransferService(db)
+    assert service.resume_stalled() == []
+    
+    db.execute(update(BulkTransferJob).values(created_at=func.now() - timedelta(hours=1)))
+    db.commit()
+    assert service.resume_stalled() == [str(job.id)]
+    assert service.process(str(job.id)).status == PaymentStatus.COMPLETED
+    assert service.resume_stalled() == []
+    assert _balance(db, payees[0]) == Decimal("12.00")
\ No newline at end of file
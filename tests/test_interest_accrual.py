@@ -0,0 +1,161 @@
+import pytest
+import os
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.core.money import to_money
+from app.database import Base
+from app.models.account import Account, Balance, BalanceSnapshot, AccountType
+from app.models.interest import InterestAccrual, InterestAccrualRun, InterestPosting, InterestRate, InterestType
+from app.services import scheduler
+from app.services.interest import InterestService, account_id_ranges, rate_tier_cache
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+def test_account_id_ranges_cover_keyspace_without_overlap():
+    """Worker ranges are contiguous, open at both ends and split the keyspace evenly"""
+    ranges = account_id_ranges(4)
+    assert len(ranges) == 4
+    assert ranges[0][0] is None and ranges[-1][1] is None
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+    assert [start for start, _ in ranges[1:]] == [
+        "40000000-0000-0000-0000-000000000000",
+        "80000000-0000-0000-0000-000000000000",
+        "c0000000-0000-0000-0000-000000000000",
+    ]
+
+def test_every_account_id_falls_in_exactly_one_range():
+    ranges = account_id_ranges(8)
+    for _ in range(1000):
+        account_id = str(uuid.uuid4())
+        matches = [
+            (start, end) for start, end in ranges
+            if (start is None or account_id >= start) and (end is None or account_id < end)
+        ]
+        assert len(matches) == 1
+
+@pytest.fixture
+def db():
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("Set-based interest jobs need PostgreSQL")
+    engine = create_engine(TEST_DATABASE_URL)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def _savings_account(db, balance):
+    account = Account(account_number=f"IA{str(uuid.uuid4().int)[:10]}", account_type=AccountType.SAVINGS)
+    db.add(account)
+    db.flush()
+    db.add(Balance(account_id=account.id, ledger_balance=balance, available_balance=balance))
+    rate = InterestRate(rate_code=f"T{uuid.uuid4().hex[:12]}", interest_type=InterestType.SAVINGS,
+                        base_rate=Decimal("0.0365"), min_balance=0,
+                        effective_date=datetime(2020, 1, 1, tzinfo=timezone.utc))
+    db.add(rate)
+    db.commit()
+    return account, rate
+
+def _only(account):
+    """Job bounds that select just this account, so other tests' rows don't interfere"""
+    return {"start_account_id": str(account.id), "end_account_id": str(uuid.UUID(int=account.id.int + 1))}
+
+def test_post_monthly_interest_posts_accruals_once(db):
+    account, rate = _savings_account(db, Decimal("1000.00"))
+    # February 2025: 20 days at 1000.00 and 8 at 2000.00
+    for day in range(1, 29):
+        balance = Decimal("1000.00") if day <= 20 else Decimal("2000.00")
+        db.add(InterestAccrual(
+            account_id=account.id, accrual_date=date(2025, 2, day), rate_id=rate.id,
+            closing_balance=balance, interest_rate=rate.base_rate,
+            accrued_amount=balance * rate.base_rate / 365
+        ))
+    db.commit()
+    
+    period_end = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    service = InterestService(db)
+    assert service.post_monthly_interest(period_end, **_only(account)) == 1
+    
+    posting = db.query(InterestPosting).filter(InterestPosting.account_id == account.id).one()
+    # 20 x 0.10 + 8 x 0.20
+    assert posting.interest_amount == Decimal("3.60")
+    assert posting.average_balance == to_money((20 * Decimal("1000") + 8 * Decimal("2000")) / 28)
+    balance = db.query(Balance).filter(Balance.account_id == account.id).one()
+    db.refresh(balance)
+    assert balance.ledger_balance == balance.available_balance == Decimal("1003.60")
+    
+    # A rerun of the same period finds everything posted
+    assert service.post_monthly_interest(period_end, **_only(account)) == 0
+    db.refresh(balance)
+    assert balance.ledger_balance == Decimal("1003.60")
+
+def test_accrue_daily_interest_reads_snapshots_once(db):
+    account, rate = _savings_account(db, Decimal("0.00"))
+    empty, _ = _savings_account(db, Decimal("0.00"))
+    db.add(BalanceSnapshot(account_id=account.id, snapshot_date=date(2025, 1, 30), closing_balance=Decimal("730.00")))
+    db.commit()
+    rate_tier_cache.invalidate()
+    
+    service = InterestService(db)
+    # The latest snapshot at or before the day is its closing balance
+    assert service.accrue_daily_interest(date(2025, 2, 3), **_only(account)) == 1
+    accrual = db.query(InterestAccrual).filter(InterestAccrual.account_id == account.id).one()
+    assert accrual.closing_balance == Decimal("730.00")
+    assert accrual.accrued_amount == Decimal("0.07300000")
+    # No balance, no accrual; a rerun of the day adds nothing
+    assert service.accrue_daily_interest(date(2025, 2, 3), **_only(empty)) == 0
+    assert service.accrue_daily_interest(date(2025, 2, 3), **_only(account)) == 0
+
+def test_month_with_a_missing_day_posts_once_backfilled(db, monkeypatch):
+    account, rate = _savings_account(db, Decimal("1000.00"))
+    db.add(BalanceSnapshot(account_id=account.id, snapshot_date=date(2025, 1, 31), closing_balance=Decimal("1000.00")))
+    for day in range(1, 28):
+        if day != 10:
+            db.add(InterestAccrual(
+                account_id=account.id, accrual_date=date(2025, 2, day), rate_id=rate.id,
+                closing_balance=Decimal("1000.00"), interest_rate=rate.base_rate,
+                accrued_amount=Decimal("0.10")
+            ))
+            db.add(InterestAccrualRun(range_start=str(account.id), range_end=_only(account)["end_account_id"],
+                                      accrual_date=date(2025, 2, day)))
+    db.commit()
+    rate_tier_cache.invalidate()
+    monkeypatch.setattr(scheduler, "SessionLocal", sessionmaker(autoflush=False, bind=db.get_bind()))
+    period_end = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    assert InterestService(db).missing_accrual_days(period_end, **_only(account)) == [date(2025, 2, 10), date(2025, 2, 28)]
+    
+    # The last day accrues but the 10th never did: posting would lock the gap out for good
+    assert scheduler.accrue_interest_range("2025-02-28", **_only(account)).endswith("for 1 missing days")
+    assert db.query(InterestPosting).filter(InterestPosting.account_id == account.id).count() == 0
+    
+    assert scheduler.accrue_interest_range("2025-02-10", **_only(account)).endswith("posted 1")
+    posting = db.query(InterestPosting).filter(InterestPosting.account_id == account.id).one()
+    assert posting.interest_amount == Decimal("2.80")
+    assert posting.average_balance == Decimal("1000.00")
+
+def test_month_posts_when_the_range_opened_mid_month(db, monkeypatch):
+    """Days before the account existed accrue nothing, but they ran and must not hold the month"""
+    account, rate = _savings_account(db, Decimal("1000.00"))
+    db.add(BalanceSnapshot(account_id=account.id, snapshot_date=date(2025, 2, 15), closing_balance=Decimal("1000.00")))
+    db.commit()
+    rate_tier_cache.invalidate()
+    monkeypatch.setattr(scheduler, "SessionLocal", sessionmaker(autoflush=False, bind=db.get_bind()))
+    
+    for day in range(1, 28):
+        assert scheduler.accrue_interest_range(f"2025-02-{day:02d}", **_only(account)).endswith("missing days")
+    assert scheduler.accrue_interest_range("2025-02-28", **_only(account)).endswith("posted 1")
+    
+    assert db.query(InterestAccrual).filter(InterestAccrual.account_id == account.id).count() == 14
+    posting = db.query(InterestPosting).filter(InterestPosting.account_id == account.id).one()
+    assert posting.interest_amount == Decimal("1.40")
\ No newline at end of file
@@ -0,0 +1,47 @@
+import pytest
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from jose import jwt
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.services.auth import create_access_token
+from app.services.jwt_blacklist import BloomFilter, ExpiringSet, JWTBlacklist, jwt_blacklist
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    members = [uuid.uuid4().hex for _ in range(1000)]
+    for member in members:
+        bloom.add(member)
+    assert all(member in bloom for member in members)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+    assert false_positives < 300
+
+def test_expiring_set_drops_expired_and_soonest_expiring_members():
+    members = ExpiringSet(max_size=2)
+    now = time.time()
+    members.add("expired", now - 1)
+    members.add("late", now + 60)
+    members.add("soon", now + 30)
+    members.add("latest", now + 90)
+    assert "expired" not in members and "soon" not in members
+    assert "late" in members and "latest" in members
+    assert len(members) == 2 and members.evicted_until == now + 30
+
+def test_revocation_is_answered_locally():
+    blacklist = JWTBlacklist(max_size=100, error_rate=0.01, use_redis=False)
+    expires_at = datetime.utcnow() + timedelta(minutes=5)
+    asyncio.run(blacklist.blacklist_token("revoked", expires_at))
+    asyncio.run(blacklist.blacklist_token("already-expired", datetime.utcnow() - timedelta(seconds=5)))
+    assert asyncio.run(blacklist.revoked(["revoked", "live", "already-expired"])) == {"revoked"}
+
+def test_revoked_token_is_rejected_before_any_lookup():
+    token = create_access_token({"sub": "teller1", "ver": 0}, expires_delta=timedelta(minutes=5))
+    payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+    asyncio.run(jwt_blacklist.blacklist_token(payload["jti"], datetime.utcfromtimestamp(payload["exp"])))
+    # No database session: a revoked token never gets as far as the token_version check
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(get_current_user(token, None))
+    assert exc.value.status_code == 401
\ No newline at end of file
@@ -0,0 +1,214 @@
+import pytest
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.database import Base
+from app.models.customer import Customer
+from app.models.account import Account, AccountType
+from app.models.loan import Loan, LoanPayment, LoanStatus, LoanType, LoanDelinquency, AgingBucket
+from app.schemas.loan import LoanPaymentCreate, LoanPaymentResponse, LoanResponse
+from app.services.delinquency import DelinquencyService
+from app.services.loan import LoanService
+
+# Row locks and keyset comparisons are exercised against PostgreSQL
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+PAYMENTS = 12
+
+engine = create_engine(TEST_DATABASE_URL)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@contextmanager
+def count_queries():
+    """Collect every statement sent to the database inside the block"""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+@pytest.fixture(scope="module")
+def db():
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("Query count tests require PostgreSQL")
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+
+@pytest.fixture(scope="module")
+def customer(db):
+    suffix = str(uuid.uuid4().int)[:10]
+    customer = Customer(customer_number=f"LQ{suffix}", first_name="Query", last_name="Count")
+    db.add(customer)
+    db.flush()
+    db.add(Account(account_number=f"LQ{suffix}", customer_id=customer.id, account_type=AccountType.CURRENT))
+    db.commit()
+    return customer
+
+def _active_loan(db, customer) -> Loan:
+    loan = Loan(
+        loan_number=f"LQ{str(uuid.uuid4().int)[:10]}",
+        customer_id=customer.id,
+        account_id=customer.accounts[0].id,
+        loan_type=LoanType.PERSONAL,
+        principal_amount=Decimal("12000.00"),
+        interest_rate=Decimal("6.0000"),
+        term_months="12",
+        monthly_payment=Decimal("1032.80"),
+        outstanding_balance=Decimal("12000.00"),
+        status=LoanStatus.ACTIVE,
+        disbursement_date=datetime.utcnow()
+    )
+    db.add(loan)
+    db.commit()
+    return loan
+
+def test_payment_numbering_does_not_grow_with_history(db, customer):
+    loan = _active_loan(db, customer)
+    service = LoanService(db)
+    
+    counts = []
+    for number in range(1, PAYMENTS + 1):
+        with count_queries() as statements:
+            payment = service.make_payment(LoanPaymentCreate(loan_id=str(loan.id), amount_paid=Decimal("500.00")))
+        assert payment.payment_number == f"PMT{number:03d}"
+        assert not any("FROM loan_payments" in s and "WHERE loan_payments.loan_id" in s for s in statements)
+        counts.append(len(statements))
+    
+    assert len(set(counts)) == 1
+    db.refresh(loan)
+    assert loan.payment_count == PAYMENTS
+
+def test_payment_history_pages_with_one_query_each(db, customer):
+    loan = _active_loan(db, customer)
+    service = LoanService(db)
+    loan_id = str(loan.id)
+    for _ in range(PAYMENTS):
+        service.make_payment(LoanPaymentCreate(loan_id=loan_id, amount_paid=Decimal("100.00")))
+    
+    seen, cursor = [], None
+    while True:
+        with count_queries() as statements:
+            payments, cursor = service.get_loan_payments(loan_id, limit=5, cursor=cursor)
+            for payment in payments:
+                LoanPaymentResponse.model_validate(payment, from_attributes=True)
+        assert len(statements) == 1
+        seen.extend(payment.payment_number for payment in payments)
+        if cursor is None:
+            break
+    
+    assert seen == [f"PMT{number:03d}" for number in range(PAYMENTS, 0, -1)]
+
+def test_loan_listing_serializes_without_lazy_loads(db, customer):
+    for _ in range(5):
+        _active_loan(db, customer)
+    service = LoanService(db)
+    customer_id = str(customer.id)
+    db.expire_all()
+    
+    with count_queries() as statements:
+        loans = service.get_customer_loans(customer_id)
+        for loan in loans:
+            LoanResponse.model_validate(loan, from_attributes=True).model_dump()
+    assert len(loans) >= 5
+    assert len(statements) == 1
+    
+    with count_queries() as statements:
+        loans = service.list_loans(LoanStatus.ACTIVE, limit=50)
+        for loan in loans:
+            LoanResponse.model_validate(loan, from_attributes=True).model_dump()
+    assert len(statements) == 1
+
+def _explain(db, query) -> str:
+    """Plan for query with sequential scans and sorts priced out, so tiny test tables still show the index"""
+    try:
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        db.execute(text("SET LOCAL enable_sort = off"))
+        compiled = query.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+        return "\n".join(row[0] for row in db.execute(text(f"EXPLAIN {compiled}")))
+    finally:
+        db.rollback()
+
+def test_history_and_bucket_listings_are_served_by_their_indexes(db, customer):
+    loan = _active_loan(db, customer)
+    history = select(LoanPayment).where(LoanPayment.loan_id == loan.id).order_by(
+        LoanPayment.payment_date.desc(), LoanPayment.id.desc()
+    ).limit(5)
+    # Newest first straight off the index, no sort step
+    plan = _explain(db, history)
+    assert "idx_loan_payments_loan_date" in plan and "Sort" not in plan
+    
+    in_bucket = select(LoanDelinquency.loan_id).where(LoanDelinquency.aging_bucket == AgingBucket.DPD_90_PLUS)
+    assert "idx_loan_delinquency_bucket" in _explain(db, in_bucket)
+
+def _aged_loan(db, customer, paid) -> Loan:
+    """Twelve 100.00 installments from 15 January 2025, with paid taken so far"""
+    loan = _active_loan(db, customer)
+    loan.monthly_payment = Decimal("100.00")
+    loan.disbursement_date = datetime(2025, 1, 15, 10, 0, tzinfo=timezone.utc)
+    if paid:
+        db.add(LoanPayment(loan_id=loan.id, payment_number="PMT001", amount_paid=paid, principal_paid=paid,
+                           interest_paid=Decimal("0.00"), balance_after_payment=Decimal("0.00")))
+    db.commit()
+    return loan
+
+def test_aging_buckets_and_summary(db, customer):
+    as_of = date(2025, 7, 15)
+    # Six installments are due by then, the sixth on the day itself
+    paid_up = _aged_loan(db, customer, Decimal("600.00"))
+    one_behind = _aged_loan(db, customer, Decimal("450.00"))
+    far_behind = _aged_loan(db, customer, Decimal("250.00"))
+    
+    assert DelinquencyService(db).refresh(as_of) >= 3
+    rows = {row.loan_id: row for row in db.query(LoanDelinquency).filter(
+        LoanDelinquency.loan_id.in_([paid_up.id, one_behind.id, far_behind.id])
+    )}
+    positions = [(rows[l.id].aging_bucket, rows[l.id].days_past_due, rows[l.id].arrears_amount)
+                 for l in (paid_up, one_behind, far_behind)]
+    assert positions == [
+        (AgingBucket.CURRENT, 0, Decimal("0.00")),
+        # Oldest unpaid is the 15 June installment
+        (AgingBucket.DPD_1_30, 30, Decimal("150.00")),
+        # and here the 15 April one
+        (AgingBucket.DPD_90_PLUS, 91, Decimal("350.00"))
+    ]
+    assert all(row.installments_due == 6 and row.as_of_date == as_of for row in rows.values())
+    
+    # The summary is the bucket listing totalled
+    summary = DelinquencyService(db).get_aging_summary(as_of)
+    listed = {bucket: db.query(LoanDelinquency).filter(
+        LoanDelinquency.aging_bucket == bucket, LoanDelinquency.as_of_date == as_of
+    ).count() for bucket in AgingBucket}
+    assert {row.aging_bucket: row.loan_count for row in summary} == {b: n for b, n in listed.items() if n}
+    assert listed[AgingBucket.DPD_90_PLUS] >= 1
+
+def test_portfolio_projection_streams_in_chunks_to_the_same_totals(db, customer):
+    for _ in range(3):
+        _active_loan(db, customer)
+    service = LoanService(db)
+    whole = service.portfolio_cash_flows(LoanStatus.ACTIVE, Decimal("1.5"), chunk_size=100000)
+    assert whole["loan_count"] == db.query(Loan).filter(Loan.status == LoanStatus.ACTIVE).count()
+    
+    with count_queries() as statements:
+        chunked = service.portfolio_cash_flows(LoanStatus.ACTIVE, Decimal("1.5"), chunk_size=2)
+    assert chunked == whole
+    # One streamed query, however many chunks it arrives in
+    assert len([s for s in statements if "FROM loans" in s]) == 1
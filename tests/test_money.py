@@ -0,0 +1,36 @@
+import pytest
+import random
+from decimal import Decimal
+from app.core.money import to_money, add_money, ZERO
+
+POSTINGS = 1_000_000
+
+def test_to_money_quantizes_to_cents():
+    """Amounts are quantized to cents with banker's rounding"""
+    assert to_money(Decimal("10.005")) == Decimal("10.00")
+    assert to_money(Decimal("10.015")) == Decimal("10.02")
+    assert to_money("7") == Decimal("7.00")
+    assert to_money(None) == ZERO
+
+def test_to_money_float_input_is_not_binary_noise():
+    """Legacy float callers get the decimal they wrote, not its binary expansion"""
+    assert to_money(0.1) == Decimal("0.10")
+    assert to_money(2.675) == Decimal("2.68")
+
+def test_add_money_is_exact():
+    """0.10 + 0.20 is exactly 0.30"""
+    assert add_money(Decimal("0.10"), Decimal("0.20")) == Decimal("0.30")
+    assert add_money() == ZERO
+
+def test_zero_drift_over_a_million_postings():
+    """A running balance posted through add_money matches the integer-cent sum exactly"""
+    rng = random.Random(20240101)
+    balance = ZERO
+    cents_total = 0
+    for _ in range(POSTINGS):
+        cents = rng.randint(-500_000, 500_000)
+        cents_total += cents
+        balance = add_money(balance, Decimal(cents).scaleb(-2))
+
+    assert balance == Decimal(cents_total).scaleb(-2)
+    assert balance.as_tuple().exponent == -2
@@ -0,0 +1,156 @@
+import pytest
+import os
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from sqlalchemy import create_engine, func, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.database import Base
+from app.models.account import Account, Balance, AccountType
+from app.models.customer import Customer
+from app.models.notification import Notification, NotificationOutbox, NotificationChannel, NotificationStatus, NotificationType
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.services.notification import NotificationService
+from app.services.transaction import TransactionService
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+@pytest.fixture
+def sessions():
+    """Sessions on a schema of their own: the dispatcher claims the oldest pending events of anyone"""
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("The outbox is claimed with SKIP LOCKED, which needs PostgreSQL")
+    schema = f"outbox_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(TEST_DATABASE_URL)
+    try:
+        with admin.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-csearch_path={schema}"})
+    Base.metadata.create_all(bind=engine)
+    opened = []
+    def session():
+        opened.append(sessionmaker(autoflush=False, bind=engine)())
+        return opened[-1]
+    yield session
+    for s in opened:
+        s.close()
+    engine.dispose()
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+    admin.dispose()
+
+def _transfer(db, amount=Decimal("25.00")):
+    customer = Customer(customer_number=f"C{uuid.uuid4().hex[:10]}", first_name="Ada", last_name="Obi")
+    db.add(customer)
+    db.flush()
+    accounts = []
+    for balance in (Decimal("100.00"), Decimal("0.00")):
+        account = Account(account_number=f"OB{str(uuid.uuid4().int)[:10]}", customer_id=customer.id,
+                          account_type=AccountType.CURRENT)
+        db.add(account)
+        db.flush()
+        db.add(Balance(account_id=account.id, ledger_balance=balance, available_balance=balance))
+        accounts.append(account)
+    transaction = Transaction(
+        transaction_id=f"OB{uuid.uuid4().hex[:16]}", from_account_id=accounts[0].id, to_account_id=accounts[1].id,
+        amount=amount, currency="USD", transaction_type=TransactionType.TRANSFER
+    )
+    db.add(transaction)
+    db.commit()
+    return customer, transaction
+
+def _outbox(db):
+    return db.query(NotificationOutbox).order_by(NotificationOutbox.created_at).all()
+
+def test_outbox_rows_commit_with_the_posting(sessions):
+    db, observer = sessions(), sessions()
+    _, transaction = _transfer(db)
+    
+    TransactionService(db).post_transactions([transaction])
+    db.flush()
+    assert _outbox(observer) == []
+    db.commit()
+    
+    events = _outbox(observer)
+    assert sorted(event.payload["type"] for event in events) == ["credited", "debited"]
+    assert all(event.status == NotificationStatus.PENDING for event in events)
+
+def test_rolled_back_posting_leaves_no_outbox_row(sessions):
+    db = sessions()
+    _, transaction = _transfer(db)
+    
+    TransactionService(db).post_transactions([transaction])
+    db.flush()
+    db.rollback()
+    assert _outbox(db) == []
+    assert db.query(Transaction.status).filter(Transaction.id == transaction.id).scalar() == TransactionStatus.PENDING
+
+def test_batch_is_claimed_once_and_marked_dispatched(sessions):
+    db, other = sessions(), sessions()
+    NotificationService(db)._setup_default_templates()
+    customer, transaction = _transfer(db)
+    assert TransactionService(db).process_transaction(transaction.id)
+    
+    # Another dispatcher holding the batch: this one skips it instead of sending it again
+    held = other.query(NotificationOutbox).with_for_update().all()
+    assert len(held) == 2
+    assert NotificationService(db).dispatch_outbox(batch_size=10) == 0
+    other.rollback()
+    
+    assert NotificationService(db).dispatch_outbox(batch_size=1) == 1
+    assert NotificationService(db).dispatch_outbox(batch_size=10) == 1
+    assert NotificationService(db).dispatch_outbox(batch_size=10) == 0
+    
+    db.expire_all()
+    events = _outbox(db)
+    assert all(event.status == NotificationStatus.SENT and event.dispatched_at for event in events)
+    sent = db.query(Notification).filter(Notification.customer_id == customer.id).all()
+    assert sorted(notification.title for notification in sent) == [
+        "credited Transaction Alert", "debited Transaction Alert"
+    ]
+
+def _event(db, account, payload):
+    event = NotificationOutbox(template_code="TRANSACTION_ALERT", notification_type=NotificationType.TRANSACTION,
+                               channel=NotificationChannel.SMS, account_id=account, payload=payload)
+    db.add(event)
+    db.commit()
+    return event
+
+def test_failed_event_backs_off_instead_of_retrying_at_once(sessions):
+    db = sessions()
+    NotificationService(db)._setup_default_templates()
+    _transfer(db)
+    account = db.query(Account).filter(Account.customer_id.isnot(None)).first()
+    # The template needs an amount this payload lacks, so rendering raises
+    event = _event(db, account.id, {"type": "credited"})
+    
+    assert NotificationService(db).dispatch_outbox(batch_size=10) == 1
+    db.refresh(event)
+    assert (event.status, event.attempts) == (NotificationStatus.PENDING, 1)
+    first_wait = event.next_attempt_at - db.scalar(func.now())
+    assert timedelta(seconds=settings.notification_outbox_retry_seconds - 5) < first_wait <= timedelta(seconds=settings.notification_outbox_retry_seconds)
+    # Not due yet, so the dispatcher's next pass leaves it alone
+    assert NotificationService(db).dispatch_outbox(batch_size=10) == 0
+    
+    db.execute(update(NotificationOutbox).values(next_attempt_at=func.now() - timedelta(seconds=1)))
+    db.commit()
+    assert NotificationService(db).dispatch_outbox(batch_size=10) == 1
+    db.refresh(event)
+    assert event.attempts == 2
+    assert event.next_attempt_at - db.scalar(func.now()) > timedelta(seconds=2 * settings.notification_outbox_retry_seconds - 5)
+    assert "amount" in event.last_error
+
+def test_event_for_an_account_without_customer_fails(sessions):
+    db = sessions()
+    account = Account(account_number=f"OB{str(uuid.uuid4().int)[:10]}", account_type=AccountType.CURRENT)
+    db.add(account)
+    db.commit()
+    event = _event(db, account.id, {"amount": "1.00", "type": "credited"})
+    
+    assert NotificationService(db).dispatch_outbox(batch_size=10) == 1
+    db.refresh(event)
+    assert (event.status, event.last_error, event.dispatched_at) == (NotificationStatus.FAILED, "Account has no customer", None)
\ No newline at end of file
@@ -3,7 +3,7 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from app.main import app
-from app.database import get_db, Base
+from app.database import get_db, get_read_db, Base
 from app.models.notification import Notification, NotificationTemplate, NotificationType, NotificationChannel, NotificationStatus
 from app.models.customer import Customer, KYCStatus
 from app.models.user import User, UserRole
@@ -27,6 +27,7 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
 client = TestClient(app)
 
 @pytest.fixture
@@ -0,0 +1,52 @@
+import pytest
+import uuid
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.core.pool_metrics import PoolMetrics, TimedQueuePool, pool_status
+
+def _engine(name):
+    return create_engine(
+        "sqlite://", poolclass=TimedQueuePool, pool_size=1, max_overflow=0,
+        pool_timeout=0.05, pool_logging_name=name
+    )
+
+def test_histogram_is_cumulative():
+    """Each bucket counts every checkout at or below its bound"""
+    metrics = PoolMetrics()
+    for seconds in (0.0005, 0.003, 0.003, 0.2, 45):
+        metrics.observe(seconds)
+    histogram = metrics.histogram()
+    assert histogram["0.001"] == 1
+    assert histogram["0.005"] == 3
+    assert histogram["0.25"] == 4
+    assert histogram["30.0"] == 4
+    assert histogram["+Inf"] == 5
+
+def test_checkouts_and_timeouts_are_counted():
+    """A checkout that waits out pool_timeout is recorded as a timeout, not a checkout"""
+    name = f"test-{uuid.uuid4().hex[:8]}"
+    engine = _engine(name)
+    with engine.connect() as held:
+        held.execute(text("SELECT 1"))
+        status = pool_status(name, engine.pool)
+        assert status["checked_out"] == 1
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    
+    status = pool_status(name, engine.pool)
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == 1
+    assert status["timeouts"] == 1
+    assert status["wait_seconds"]["count"] == 2
+    assert status["wait_seconds"]["max"] >= 0.05
+
+def test_metrics_survive_pool_recreation():
+    """engine.dispose() builds a new pool of the same class under the same name"""
+    name = f"test-{uuid.uuid4().hex[:8]}"
+    engine = _engine(name)
+    engine.connect().close()
+    engine.dispose()
+    engine.connect().close()
+    
+    assert isinstance(engine.pool, TimedQueuePool)
+    assert pool_status(name, engine.pool)["checkouts"] == 2
\ No newline at end of file
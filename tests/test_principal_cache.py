@@ -0,0 +1,140 @@
+import pytest
+import asyncio
+import redis
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.principal_cache import PRINCIPAL_KEY, PrincipalCache, principal_cache
+from app.core.redis_client import get_redis, redis_breaker
+from app.database import Base
+from app.models.user import User, UserRole, UserStatus
+from app.services.auth import create_access_token, set_user_status
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+def _user(username="teller1", role=UserRole.TELLER):
+    return User(id=uuid.uuid4(), username=username, email=f"{username}@example.com",
+                role=role, status=UserStatus.ACTIVE)
+
+def test_hit_returns_a_fresh_copy():
+    """Each hit is its own transient User, so one request can't change another's principal"""
+    cache = PrincipalCache(ttl_seconds=60, max_size=10)
+    user = _user()
+    cache.put(user, "t1", time.monotonic())
+    first, second = cache.get("teller1", "t1"), cache.get("teller1", "t1")
+    assert first is not second
+    assert (first.id, first.role, first.status) == (user.id, UserRole.TELLER, UserStatus.ACTIVE)
+    assert cache.get("teller1", "t2") is None
+
+def test_entries_expire_and_least_recent_is_evicted():
+    cache = PrincipalCache(ttl_seconds=1, max_size=2)
+    for name in ("a", "b"):
+        cache.put(_user(name), "t", time.monotonic())
+    cache.get("a", "t")
+    cache.put(_user("c"), "t", time.monotonic())
+    assert cache.get("b", "t") is None
+    assert cache.get("a", "t") is not None
+    time.sleep(1.1)
+    assert cache.get("a", "t") is None
+
+def test_invalidate_drops_every_token_and_blocks_stale_puts():
+    """A principal read before the invalidation is not cached afterwards"""
+    cache = PrincipalCache(ttl_seconds=60, max_size=10)
+    user = _user()
+    loaded_at = time.monotonic()
+    cache.put(user, "t1", loaded_at)
+    cache.put(user, "t2", loaded_at)
+    cache.invalidate("teller1")
+    assert cache.get("teller1", "t1") is None and cache.get("teller1", "t2") is None
+    cache.put(user, "t1", loaded_at)
+    assert cache.get("teller1", "t1") is None
+    cache.put(user, "t1", time.monotonic())
+    assert cache.get("teller1", "t1") is not None
+
+def test_dead_listener_is_restarted_once_redis_is_back(monkeypatch):
+    """Invalidations from other workers must not stop for good when the subscriber connection drops"""
+    monkeypatch.setattr(redis_breaker, "_prober", threading.current_thread())
+    monkeypatch.setattr(redis_breaker, "_open", False)
+    cache = PrincipalCache(ttl_seconds=60, max_size=10, use_redis=True)
+    starts = []
+    monkeypatch.setattr(cache, "_listen", lambda: starts.append(1))
+    
+    cache._start_listener()
+    cache._listener.join()
+    monkeypatch.setattr(redis_breaker, "_open", True)
+    cache._start_listener()
+    assert len(starts) == 1
+    monkeypatch.setattr(redis_breaker, "_open", False)
+    cache._start_listener()
+    cache._listener.join()
+    assert len(starts) == 2
+
+def test_lookup_that_raced_another_workers_invalidation_is_not_shared(monkeypatch):
+    try:
+        get_redis().ping()
+    except redis.RedisError:
+        pytest.skip("Redis is not reachable")
+    monkeypatch.setattr(redis_breaker, "_prober", threading.current_thread())
+    monkeypatch.setattr(redis_breaker, "_open", False)
+    # Two workers sharing one Redis; listeners stay off so only the shared tier is exercised
+    first, second = (PrincipalCache(ttl_seconds=60, max_size=10, use_redis=True) for _ in range(2))
+    for cache in (first, second):
+        monkeypatch.setattr(cache, "_start_listener", lambda: None)
+    user = _user(f"pc{uuid.uuid4().hex[:8]}")
+    
+    loaded_at, generation = time.monotonic(), first.generation(user.username)
+    second.invalidate(user.username)
+    first.put(user, "t1", loaded_at, generation)
+    assert get_redis().get(PRINCIPAL_KEY.format(user.username)) is None
+    
+    first.put(user, "t1", time.monotonic(), first.generation(user.username))
+    assert second.get(user.username, "t2") is not None
+    second.invalidate(user.username)
+
+@pytest.fixture
+def db():
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("Principal lookups are exercised against PostgreSQL")
+    engine = create_engine(TEST_DATABASE_URL)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def test_get_current_user_hits_the_database_once_per_token(db):
+    if not principal_cache.enabled:
+        pytest.skip("Principal cache is disabled")
+    user = User(username=f"pc{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex[:8]}@example.com",
+                password_hash="x", role=UserRole.TELLER, status=UserStatus.ACTIVE)
+    db.add(user)
+    db.commit()
+    token = create_access_token({"sub": user.username}, expires_delta=timedelta(minutes=5))
+    
+    lookups = []
+    def count(conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            lookups.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", count)
+    try:
+        for _ in range(3):
+            principal = asyncio.run(get_current_user(token, db))
+            assert principal.status == UserStatus.ACTIVE
+        assert len(lookups) == 1
+        
+        set_user_status(db, user.username, UserStatus.SUSPENDED)
+        assert asyncio.run(get_current_user(token, db)).status == UserStatus.SUSPENDED
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", count)
\ No newline at end of file
@@ -0,0 +1,75 @@
+import pytest
+import threading
+import time
+import uuid
+from datetime import timedelta
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import redis
+from app.core.rate_limit_config import RateLimit
+from app.core.redis_client import get_redis, redis_breaker
+from app.middleware.rate_limit import GCRA_SCRIPT, RateLimitMiddleware
+from app.models.user import UserRole
+from app.services.auth import create_access_token
+
+def _client(**limits):
+    app = FastAPI()
+    
+    @app.get("/ping")
+    @app.post("/login")
+    def ping():
+        return {"ok": True}
+    
+    app.add_middleware(RateLimitMiddleware, **limits)
+    return TestClient(app)
+
+@pytest.fixture
+def local_only(monkeypatch):
+    """Breaker held open so the in-process fallback answers"""
+    monkeypatch.setattr(redis_breaker, "_prober", threading.current_thread())
+    monkeypatch.setattr(redis_breaker, "_open", True)
+
+def test_burst_then_retry_after_and_refusals_are_not_counted(local_only):
+    client = _client(route_limits={("GET", "/ping"): RateLimit(3, 1)}, role_limits={})
+    remaining = [client.get("/ping").headers["X-RateLimit-Remaining"] for _ in range(3)]
+    assert remaining == ["2", "1", "0"]
+    
+    refused = client.get("/ping")
+    assert refused.status_code == 429
+    assert refused.headers["Retry-After"] == "1" and refused.headers["X-RateLimit-Limit"] == "3"
+    assert client.get("/ping").status_code == 429
+    
+    # One emission interval later exactly one more request fits, however many were refused
+    time.sleep(0.34)
+    assert client.get("/ping").status_code == 200
+    assert client.get("/ping").status_code == 429
+
+def test_route_limit_beats_role_limit_beats_default(local_only):
+    client = _client(
+        requests_per_minute=2,
+        route_limits={("POST", "/login"): RateLimit(1, 60)},
+        role_limits={UserRole.ADMIN: RateLimit(5, 60)}
+    )
+    token = create_access_token({"sub": "admin1", "role": "ADMIN"}, expires_delta=timedelta(minutes=5))
+    admin = {"Authorization": f"Bearer {token}"}
+    assert client.post("/login", headers=admin).headers["X-RateLimit-Limit"] == "1"
+    assert client.get("/ping", headers=admin).headers["X-RateLimit-Limit"] == "5"
+    assert client.get("/ping").headers["X-RateLimit-Limit"] == "2"
+    # Separate buckets: the login limit being spent leaves the admin's role budget alone
+    assert client.post("/login", headers=admin).status_code == 429
+    assert client.get("/ping", headers=admin).headers["X-RateLimit-Remaining"] == "3"
+
+def test_lua_script_allows_a_burst_in_one_round_trip_each():
+    client = get_redis()
+    try:
+        client.ping()
+    except redis.RedisError:
+        pytest.skip("Redis is not reachable")
+    key = f"rate_limit:test:{uuid.uuid4().hex}"
+    results = [client.eval(GCRA_SCRIPT, 1, key, 1000, 3000) for _ in range(4)]
+    assert [allowed for allowed, *_ in results] == [1, 1, 1, 0]
+    assert [remaining for _, remaining, *_ in results[:3]] == [2, 1, 0]
+    assert 0 < results[3][2] <= 1000
+    # O(1) per caller: one string key holding the next arrival time
+    assert client.type(key) == "string" and 0 < client.pttl(key) <= 3000
+    client.delete(key)
\ No newline at end of file
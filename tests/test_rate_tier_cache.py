@@ -0,0 +1,110 @@
+import redis
+import threading
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from app.core.redis_client import redis_breaker
+from app.models.interest import InterestType
+from app.services import interest
+from app.services.interest import RateTierCache
+
+def _rate(base_rate, min_balance, effective_date, end_date=None, interest_type=InterestType.SAVINGS):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        interest_type=interest_type,
+        base_rate=Decimal(base_rate),
+        min_balance=Decimal(min_balance),
+        effective_date=effective_date,
+        end_date=end_date
+    )
+
+class FakeSession:
+    """Counts how often the cache goes back to the database"""
+    
+    def __init__(self, rates):
+        self.rates = rates
+        self.loads = 0
+    
+    def query(self, model):
+        self.loads += 1
+        return self
+    
+    def filter(self, *criteria):
+        return list(self.rates)
+
+JAN = datetime(2026, 1, 1, tzinfo=timezone.utc)
+JUL = datetime(2026, 7, 1, tzinfo=timezone.utc)
+
+def test_lookup_picks_highest_floor_at_or_below_balance():
+    db = FakeSession([
+        _rate("0.0100", "0", JAN),
+        _rate("0.0200", "1000", JAN),
+        _rate("0.0300", "10000", JAN),
+        _rate("0.0900", "0", JAN, interest_type=InterestType.LOAN),
+    ])
+    cache = RateTierCache(max_age_seconds=300)
+    at = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    
+    assert cache.lookup(db, InterestType.SAVINGS, Decimal("999.99"), at).base_rate == Decimal("0.0100")
+    assert cache.lookup(db, InterestType.SAVINGS, Decimal("1000.00"), at).base_rate == Decimal("0.0200")
+    assert cache.lookup(db, InterestType.SAVINGS, Decimal("50000"), at).base_rate == Decimal("0.0300")
+    assert cache.lookup(db, InterestType.LOAN, Decimal("5"), at).base_rate == Decimal("0.0900")
+    assert db.loads == 1
+
+def test_lookup_follows_effective_and_end_date_boundaries():
+    db = FakeSession([
+        _rate("0.0100", "0", JAN, end_date=JUL),
+        _rate("0.0150", "0", JUL),
+        _rate("0.0500", "100", JUL),
+    ])
+    cache = RateTierCache(max_age_seconds=300)
+    
+    assert cache.lookup(db, InterestType.SAVINGS, Decimal("500"), datetime(2026, 6, 30, tzinfo=timezone.utc)).base_rate == Decimal("0.0100")
+    assert cache.lookup(db, InterestType.SAVINGS, Decimal("500"), JUL).base_rate == Decimal("0.0500")
+    assert cache.lookup(db, InterestType.SAVINGS, Decimal("50"), JUL).base_rate == Decimal("0.0150")
+    assert cache.lookup(db, InterestType.SAVINGS, Decimal("500"), datetime(2025, 12, 31, tzinfo=timezone.utc)) is None
+    # Crossing a boundary rebuilds the tiers from memory, not from the database
+    assert db.loads == 1
+
+def test_invalidate_reloads_from_database():
+    db = FakeSession([_rate("0.0100", "0", JAN)])
+    cache = RateTierCache(max_age_seconds=300)
+    at = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    assert cache.lookup(db, InterestType.SAVINGS, Decimal("10"), at).base_rate == Decimal("0.0100")
+    
+    db.rates.append(_rate("0.0200", "5", JAN))
+    assert cache.lookup(db, InterestType.SAVINGS, Decimal("10"), at).base_rate == Decimal("0.0100")
+    cache.invalidate()
+    assert cache.lookup(db, InterestType.SAVINGS, Decimal("10"), at).base_rate == Decimal("0.0200")
+    assert db.loads == 2
+
+def test_dead_listener_is_restarted_once_redis_is_back(monkeypatch):
+    """Rate invalidations from other workers must not stop for good when the subscriber connection drops"""
+    monkeypatch.setattr(redis_breaker, "_prober", threading.current_thread())
+    monkeypatch.setattr(redis_breaker, "_open", False)
+    cache = RateTierCache(max_age_seconds=3600, listen=True)
+    starts = []
+    monkeypatch.setattr(cache, "_listen", lambda: starts.append(1))
+    db = FakeSession([_rate("0.0100", "0", JAN)])
+    
+    cache.lookup(db, InterestType.SAVINGS, Decimal("5"), JUL)
+    cache._listener.join()
+    monkeypatch.setattr(redis_breaker, "_open", True)
+    cache.lookup(db, InterestType.SAVINGS, Decimal("5"), JUL)
+    assert len(starts) == 1
+    monkeypatch.setattr(redis_breaker, "_open", False)
+    cache.lookup(db, InterestType.SAVINGS, Decimal("5"), JUL)
+    cache._listener.join()
+    assert len(starts) == 2
+    assert db.loads == 1
+
+def test_listener_losing_redis_trips_the_breaker(monkeypatch):
+    def unreachable():
+        raise redis.ConnectionError("connection refused")
+    failures = []
+    monkeypatch.setattr(interest, "get_subscriber_redis", unreachable)
+    monkeypatch.setattr(redis_breaker, "failed", failures.append)
+    
+    RateTierCache(max_age_seconds=3600, listen=True)._listen()
+    assert [str(e) for e in failures] == ["connection refused"]
\ No newline at end of file
@@ -0,0 +1,70 @@
+import pytest
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from starlette.requests import Request
+from app.core import read_routing
+from app.core.read_routing import RecentWrites, request_principal
+from app.core.redis_client import redis_breaker
+from app.services.auth import create_access_token
+
+def _request(headers=None, client=("10.1.2.3", 5000)):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": client
+    })
+
+def test_principal_prefers_token_subject():
+    """Authenticated callers are tracked by user, so stickiness follows them across addresses"""
+    token = create_access_token({"sub": "teller1"}, expires_delta=timedelta(minutes=5))
+    assert request_principal(_request({"Authorization": f"Bearer {token}"})) == "user:teller1"
+
+def test_principal_falls_back_to_client_address():
+    """Anonymous or invalid tokens fall back to the forwarded or socket address"""
+    assert request_principal(_request({"Authorization": "Bearer not-a-token"})) == "ip:10.1.2.3"
+    assert request_principal(_request({"X-Forwarded-For": "203.0.113.9, 10.0.0.1"})) == "ip:203.0.113.9"
+
+def test_recent_writes_expire_after_window():
+    """A write pins reads to the primary only for the configured window"""
+    writes = RecentWrites(window_seconds=1)
+    writes.record("user:writer")
+    assert writes.is_recent("user:writer")
+    assert not writes.is_recent("user:someone-else")
+    time.sleep(1.1)
+    assert not writes.is_recent("user:writer")
+
+class _AsyncRedis:
+    """Stands in for the asyncio client, remembering keys it was given"""
+    def __init__(self):
+        self.keys = set()
+    
+    async def set(self, key, value, ex=None):
+        self.keys.add(key)
+    
+    async def exists(self, key):
+        return int(key in self.keys)
+
+class _BlockingRedis:
+    def __getattr__(self, name):
+        raise AssertionError(f"blocking Redis call {name} on the event loop")
+
+def test_async_paths_await_redis_instead_of_blocking(monkeypatch):
+    monkeypatch.setattr(redis_breaker, "_prober", threading.current_thread())
+    monkeypatch.setattr(redis_breaker, "_open", False)
+    shared = _AsyncRedis()
+    monkeypatch.setattr(read_routing, "get_async_redis", lambda: shared)
+    writer, reader = RecentWrites(window_seconds=60), RecentWrites(window_seconds=60)
+    writer._redis = reader._redis = _BlockingRedis()
+    
+    asyncio.run(writer.record_async("user:writer"))
+    # Another worker only learns of the write through Redis
+    assert asyncio.run(reader.is_recent_async("user:writer"))
+    assert not asyncio.run(reader.is_recent_async("user:someone-else"))
+    
+    monkeypatch.setattr(redis_breaker, "_open", True)
+    assert not asyncio.run(reader.is_recent_async("user:writer"))
+    assert asyncio.run(writer.is_recent_async("user:writer"))
\ No newline at end of file
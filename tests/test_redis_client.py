@@ -0,0 +1,39 @@
+import pytest
+import asyncio
+import threading
+import redis
+from app.core.redis_client import RedisCircuitBreaker, redis_breaker
+from app.services import jwt_blacklist as jwt_blacklist_module
+from app.services.jwt_blacklist import JWTBlacklist
+
+@pytest.fixture
+def breaker():
+    breaker = RedisCircuitBreaker(failure_threshold=3, probe_interval=60)
+    # Marked as started so no background pings interfere
+    breaker._prober = threading.current_thread()
+    return breaker
+
+def test_opens_after_consecutive_failures_and_closes_on_a_good_probe(breaker):
+    error = redis.ConnectionError("Connection refused")
+    breaker.failed(error)
+    breaker.succeeded()
+    breaker.failed(error)
+    breaker.failed(error)
+    assert breaker.available
+    breaker.failed(error)
+    assert not breaker.available
+    assert breaker.status()["state"] == "open"
+    breaker._close()
+    assert breaker.available and breaker.status()["consecutive_failures"] == 0
+
+def test_open_breaker_answers_from_the_local_fallback(monkeypatch):
+    """No request waits on Redis while the breaker is open"""
+    monkeypatch.setattr(redis_breaker, "_prober", threading.current_thread())
+    monkeypatch.setattr(redis_breaker, "_open", True)
+    def no_redis():
+        raise AssertionError("Redis was called with the breaker open")
+    monkeypatch.setattr(jwt_blacklist_module, "get_async_redis", no_redis)
+    
+    blacklist = JWTBlacklist(max_size=100, error_rate=0.01, use_redis=True)
+    # Not synced with the other workers, so without the breaker this would ask Redis
+    assert asyncio.run(blacklist.revoked(["unknown"])) == set()
\ No newline at end of file
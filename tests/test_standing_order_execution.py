@@ -0,0 +1,152 @@
+import pytest
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.database import Base
+from app.models.account import Account, Balance, AccountType
+from app.models.payment import StandingOrder, StandingOrderExecution, PaymentStatus
+from app.models.transaction import Entry
+from app.services.standing_order import StandingOrderService
+
+# SKIP LOCKED and ON CONFLICT only mean something on PostgreSQL, so this suite needs a real server
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+# Orders fall due long before anything else in the test database, so each run only sees its own
+DUE = datetime(1999, 3, 1, 9, 0, tzinfo=timezone.utc)
+AS_OF = datetime(1999, 3, 1, 12, 0, tzinfo=timezone.utc)
+NEXT_MONTH = datetime(1999, 4, 1, 9, 0, tzinfo=timezone.utc)
+
+engine = create_engine(TEST_DATABASE_URL, pool_size=4, max_overflow=0)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def db():
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("Standing order execution tests require PostgreSQL")
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+
+def _account(db, balance):
+    account = Account(account_number=f"SO{str(uuid.uuid4().int)[:10]}", account_type=AccountType.CURRENT)
+    db.add(account)
+    db.flush()
+    db.add(Balance(account_id=account.id, ledger_balance=balance, available_balance=balance))
+    return account
+
+def _order(db, from_account, to_account, amount):
+    order = StandingOrder(
+        order_reference=f"SO{str(uuid.uuid4().int)[:10]}",
+        from_account_id=from_account.id,
+        to_account_id=to_account.id,
+        amount=amount,
+        frequency="MONTHLY",
+        start_date=DUE,
+        next_execution_date=DUE,
+        description="Rent"
+    )
+    db.add(order)
+    return order
+
+def _balance(db, account):
+    return db.query(Balance.ledger_balance).filter(Balance.account_id == account.id).scalar()
+
+def _executions(db, order):
+    return db.query(StandingOrderExecution).filter(StandingOrderExecution.standing_order_id == order.id).all()
+
+def test_due_orders_post_once_or_fail_and_advance(db):
+    payer, empty, payee = _account(db, Decimal("500.00")), _account(db, Decimal("0.00")), _account(db, Decimal("0.00"))
+    paid = _order(db, payer, payee, Decimal("120.00"))
+    unfunded = _order(db, empty, payee, Decimal("50.00"))
+    db.commit()
+    
+    totals = StandingOrderService(db).execute_due(as_of=AS_OF)
+    assert totals["completed"] >= 1 and totals["failed"] >= 1
+    db.expire_all()
+    
+    assert (_balance(db, payer), _balance(db, empty), _balance(db, payee)) == (
+        Decimal("380.00"), Decimal("0.00"), Decimal("120.00")
+    )
+    [execution] = _executions(db, paid)
+    assert execution.status == PaymentStatus.COMPLETED and execution.scheduled_date == DUE.date()
+    assert db.query(Entry).filter(Entry.transaction_id == execution.transaction_id).count() == 2
+    [failure] = _executions(db, unfunded)
+    assert failure.status == PaymentStatus.FAILED and failure.failure_reason == "Insufficient funds"
+    # Both move on to the next occurrence; the missed payment is not retried
+    assert paid.next_execution_date == unfunded.next_execution_date == NEXT_MONTH
+    
+    # A rerun finds nothing due
+    assert StandingOrderService(db).execute_due(as_of=AS_OF) == {"completed": 0, "failed": 0, "skipped": 0}
+
+def test_retried_occurrence_posts_nothing(db):
+    """A worker that dies after committing and leaves the order due again must not pay twice"""
+    payer, payee = _account(db, Decimal("500.00")), _account(db, Decimal("0.00"))
+    order = _order(db, payer, payee, Decimal("75.00"))
+    db.commit()
+    StandingOrderService(db).execute_due(as_of=AS_OF)
+    
+    order.next_execution_date = DUE
+    db.commit()
+    totals = StandingOrderService(db).execute_due(as_of=AS_OF)
+    assert totals["skipped"] >= 1
+    db.expire_all()
+    assert len(_executions(db, order)) == 1
+    assert _balance(db, payee) == Decimal("75.00")
+    assert order.next_execution_date == NEXT_MONTH
+
+def test_claims_skip_orders_locked_by_another_worker(db):
+    payer, payee = _account(db, Decimal("1000.00")), _account(db, Decimal("0.00"))
+    orders = [_order(db, payer, payee, Decimal("1.00")) for _ in range(4)]
+    db.commit()
+    ids = {order.id for order in orders}
+    
+    first, second = TestingSessionLocal(), TestingSessionLocal()
+    try:
+        claimed_first = {o.id for o in StandingOrderService(first)._claim_due(AS_OF, 2, set())} & ids
+        claimed_second = {o.id for o in StandingOrderService(second)._claim_due(AS_OF, 100, set())} & ids
+        assert claimed_first and not claimed_first & claimed_second
+        assert claimed_first | claimed_second == ids
+    finally:
+        first.rollback()
+        second.rollback()
+        first.close()
+        second.close()
+
+def test_concurrent_workers_never_post_the_same_occurrence(db):
+    payer, payee = _account(db, Decimal("1000.00")), _account(db, Decimal("0.00"))
+    orders = [_order(db, payer, payee, Decimal("10.00")) for _ in range(20)]
+    db.commit()
+    
+    errors = []
+    def worker():
+        session = TestingSessionLocal()
+        try:
+            StandingOrderService(session).execute_due(as_of=AS_OF, chunk_size=3)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+    
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    
+    db.expire_all()
+    assert all(len(_executions(db, order)) == 1 for order in orders)
+    assert _balance(db, payer) == Decimal("800.00")
+    assert _balance(db, payee) == Decimal("200.00")
\ No newline at end of file
@@ -0,0 +1,54 @@
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
+from app.services.schedule import BusinessCalendar, execution_dates, next_execution_date, scheduled_day
+
+UTC = timezone.utc
+
+def _days(dates):
+    return [when.date() for when in dates]
+
+def test_month_end_orders_stay_on_month_end():
+    start = date(2026, 1, 31)
+    assert [scheduled_day(start, "MONTHLY", n) for n in range(4)] == [
+        date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30)
+    ]
+    # Mid-month days clamp in short months without drifting afterwards
+    assert [scheduled_day(date(2026, 1, 30), "MONTHLY", n) for n in range(3)] == [
+        date(2026, 1, 30), date(2026, 2, 28), date(2026, 3, 30)
+    ]
+
+def test_modified_following_rolls_within_the_month():
+    calendar = BusinessCalendar(holidays=[date(2026, 12, 25)])
+    assert calendar.roll(date(2026, 12, 25)) == date(2026, 12, 28)  # Friday holiday -> Monday
+    assert calendar.roll(date(2026, 10, 31)) == date(2026, 10, 30)  # Saturday month end -> Friday
+    assert calendar.roll(date(2026, 10, 28)) == date(2026, 10, 28)
+
+def test_execution_dates_respect_calendar_and_end_date():
+    start = datetime(2026, 1, 31, 9, 0, tzinfo=UTC)
+    end = datetime(2026, 6, 1, tzinfo=UTC)
+    dates = list(execution_dates(start, "MONTHLY", end, calendar=BusinessCalendar()))
+    assert _days(dates) == [
+        date(2026, 2, 2), date(2026, 2, 27), date(2026, 3, 31), date(2026, 4, 30), date(2026, 5, 29)
+    ]
+    assert all(when.hour == 9 for when in dates)
+
+def test_daily_orders_execute_once_per_business_day():
+    start = datetime(2026, 10, 16, tzinfo=UTC)  # Friday
+    dates = islice(execution_dates(start, "DAILY", calendar=BusinessCalendar()), 4)
+    assert _days(dates) == [date(2026, 10, 16), date(2026, 10, 19), date(2026, 10, 20), date(2026, 10, 21)]
+
+def test_next_execution_after_long_gap_matches_full_walk():
+    start = datetime(2020, 3, 31, tzinfo=UTC)
+    after = datetime(2026, 2, 27, tzinfo=UTC)
+    walked = next(when for when in execution_dates(start, "MONTHLY") if when > after)
+    assert next_execution_date(start, "MONTHLY", after=after) == walked == datetime(2026, 3, 31, tzinfo=UTC)
+    assert next_execution_date(start, "WEEKLY", end=datetime(2020, 4, 1, tzinfo=UTC), after=start) is None
+
+def test_weekend_month_end_start_keeps_its_first_payment():
+    """A Saturday 31st start is paid the next Monday, not on the Friday before the order existed"""
+    start = datetime(2026, 1, 31, 9, 0, tzinfo=UTC)
+    first = next_execution_date(start, "MONTHLY", after=start - timedelta(microseconds=1))
+    assert first == datetime(2026, 2, 2, 9, 0, tzinfo=UTC)
+    dates = list(islice(execution_dates(start, "MONTHLY"), 3))
+    assert _days(dates) == [date(2026, 2, 2), date(2026, 2, 27), date(2026, 3, 31)]
+    assert all(when >= start for when in dates)
\ No newline at end of file
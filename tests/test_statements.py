@@ -0,0 +1,123 @@
+import pytest
+import csv
+import io
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.database import Base
+from app.main import app
+from app.models.account import Account, Balance, AccountType
+from app.models.transaction import Transaction, TransactionType, TransactionStatus, Entry, EntryType
+from app.services.statement import CSV_COLUMNS, StatementService
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+START, END = datetime(2025, 4, 1, tzinfo=timezone.utc), datetime(2025, 5, 1, tzinfo=timezone.utc)
+
+client = TestClient(app)
+
+@pytest.fixture
+def db():
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("Statements stream from a PostgreSQL server-side cursor")
+    engine = create_engine(TEST_DATABASE_URL)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def _post(db, account, entry_type, amount, created_at, description):
+    transaction = Transaction(
+        transaction_id=f"ST{uuid.uuid4().hex[:16]}", to_account_id=account.id, amount=amount, currency="USD",
+        transaction_type=TransactionType.DEPOSIT, status=TransactionStatus.COMPLETED,
+        description=description, created_at=created_at
+    )
+    db.add(transaction)
+    db.flush()
+    db.add(Entry(transaction_id=transaction.id, account_id=account.id, entry_type=entry_type,
+                 amount=amount, created_at=created_at))
+    return transaction
+
+@pytest.fixture
+def account(db):
+    account = Account(account_number=f"ST{str(uuid.uuid4().int)[:10]}", account_type=AccountType.CURRENT)
+    db.add(account)
+    db.flush()
+    db.add(Balance(account_id=account.id, ledger_balance=0, available_balance=0))
+    _post(db, account, EntryType.CREDIT, Decimal("500.00"), datetime(2025, 3, 20, tzinfo=timezone.utc), "Before")
+    _post(db, account, EntryType.DEBIT, Decimal("120.50"), START, "Rent")
+    # Two entries at the same instant still get distinct running balances
+    _post(db, account, EntryType.CREDIT, Decimal("40.00"), datetime(2025, 4, 15, tzinfo=timezone.utc), "Refund")
+    _post(db, account, EntryType.DEBIT, Decimal("9.99"), datetime(2025, 4, 15, tzinfo=timezone.utc), "Fee")
+    _post(db, account, EntryType.CREDIT, Decimal("1000.00"), END, "After")
+    db.commit()
+    return account
+
+def test_statement_carries_opening_running_and_closing_balances(db, account):
+    lines = list(StatementService(db).stream_statement(account.id, START, END))
+    assert lines[0] == {"type": "opening", "date": START.isoformat(), "balance": "500.00"}
+    assert lines[-1] == {"type": "closing", "date": END.isoformat(), "balance": "409.51"}
+    
+    entries = lines[1:-1]
+    assert [(e["description"], e["entry_type"], e["amount"]) for e in entries[:1]] == [("Rent", "DEBIT", "120.50")]
+    assert sorted(e["description"] for e in entries[1:]) == ["Fee", "Refund"]
+    # Each line moves the balance by exactly its own amount, ties included
+    balance = Decimal(lines[0]["balance"])
+    for entry in entries:
+        balance += Decimal(entry["amount"]) if entry["entry_type"] == "CREDIT" else -Decimal(entry["amount"])
+        assert Decimal(entry["running_balance"]) == balance
+
+def test_empty_period_opens_and_closes_on_the_same_balance(db, account):
+    lines = list(StatementService(db).stream_statement(account.id, END.replace(day=2), END.replace(day=3)))
+    assert [line["type"] for line in lines] == ["opening", "closing"]
+    assert lines[0]["balance"] == lines[1]["balance"] == "1409.51"
+
+def test_jsonl_and_csv_renderings(db, account):
+    service = StatementService(db)
+    jsonl = [json.loads(line) for line in "".join(service.stream_jsonl(account.id, START, END)).splitlines()]
+    assert jsonl == list(service.stream_statement(account.id, START, END))
+    
+    rows = list(csv.reader(io.StringIO("".join(service.stream_csv(account.id, START, END)))))
+    assert rows[0] == CSV_COLUMNS
+    assert rows[1] == [START.isoformat(), "", "Opening balance", "", "", "500.00"]
+    assert rows[2][1:] == [jsonl[1]["reference"], "Rent", "DEBIT", "120.50", "379.50"]
+    assert rows[-1] == [END.isoformat(), "", "Closing balance", "", "", "409.51"]
+    assert len(rows) == 1 + len(jsonl)
+
+def test_statement_route_streams_either_format(account):
+    params = {"start_date": START.isoformat(), "end_date": END.isoformat()}
+    response = client.get(f"/accounts/{account.id}/statement", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert json.loads(response.text.splitlines()[-1])["balance"] == "409.51"
+    
+    response = client.get(f"/accounts/{account.id}/statement", params=dict(params, format="csv"))
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.splitlines()[-1].endswith("Closing balance,,,409.51")
+    
+    assert client.get(f"/accounts/{account.id}/statement", params={"start_date": END.isoformat(), "end_date": START.isoformat()}).status_code == 400
+
+def test_statement_route_accepts_one_sided_and_naive_bounds(account):
+    # An aware start against the default end used to raise TypeError and return a 500
+    response = client.get(f"/accounts/{account.id}/statement", params={"start_date": "2025-04-01T00:00:00Z"})
+    assert response.status_code == 200
+    assert json.loads(response.text.splitlines()[0]) == {"type": "opening", "date": START.isoformat(), "balance": "500.00"}
+    
+    response = client.get(f"/accounts/{account.id}/statement", params={"start_date": "2025-04-01T00:00:00", "end_date": "2025-05-01T00:00:00Z"})
+    assert response.status_code == 200
+    assert json.loads(response.text.splitlines()[-1])["balance"] == "409.51"
+    
+    assert client.get(f"/accounts/{account.id}/statement", params={"end_date": "2025-05-01T00:00:00"}).status_code == 200
\ No newline at end of file
@@ -0,0 +1,108 @@
+import pytest
+import asyncio
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.redis_client import redis_breaker
+from app.core.token_versions import TokenVersionMap
+from app.database import Base
+from app.models.user import User, UserRole, UserStatus
+from app.services.auth import (
+    create_access_token, principal_claims, change_password, set_user_status, get_password_hash
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+def test_version_read_before_a_bump_is_not_remembered():
+    """A lookup racing a bump must not put the old version back"""
+    versions = TokenVersionMap(ttl_seconds=60)
+    loaded_at = time.monotonic()
+    versions.bumped("teller1", 4)
+    versions._remember("teller1", 3, loaded_at=loaded_at)
+    assert versions.current(None, "teller1") == 4
+
+def test_dead_listener_is_restarted_once_redis_is_back(monkeypatch):
+    monkeypatch.setattr(redis_breaker, "_prober", threading.current_thread())
+    monkeypatch.setattr(redis_breaker, "_open", False)
+    versions = TokenVersionMap(ttl_seconds=60, use_redis=True)
+    starts = []
+    monkeypatch.setattr(versions, "_listen", lambda: starts.append(1))
+    
+    versions._start_listener()
+    versions._listener.join()
+    monkeypatch.setattr(redis_breaker, "_open", True)
+    versions._start_listener()
+    assert len(starts) == 1
+    monkeypatch.setattr(redis_breaker, "_open", False)
+    versions._start_listener()
+    versions._listener.join()
+    assert len(starts) == 2
+
+@pytest.fixture
+def db():
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("Token versions are exercised against PostgreSQL")
+    engine = create_engine(TEST_DATABASE_URL)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+@pytest.fixture
+def user(db):
+    user = User(username=f"tv{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex[:8]}@example.com",
+                password_hash=get_password_hash("Secret123!"), role=UserRole.TELLER, status=UserStatus.ACTIVE)
+    db.add(user)
+    db.commit()
+    return user
+
+def _token(user):
+    return create_access_token(principal_claims(user), expires_delta=timedelta(minutes=5))
+
+def test_claims_are_trusted_without_loading_the_user(db, user):
+    token = _token(user)
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        for _ in range(3):
+            principal = asyncio.run(get_current_user(token, db))
+            assert (principal.id, principal.role, principal.status) == (user.id, UserRole.TELLER, UserStatus.ACTIVE)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+    # One version lookup, then the cached map; never the full row
+    assert len(statements) <= 1
+    assert all("users.password_hash" not in statement for statement in statements)
+
+def test_deactivation_and_password_change_revoke_outstanding_tokens(db, user):
+    token = _token(user)
+    asyncio.run(get_current_user(token, db))
+    
+    set_user_status(db, user.username, UserStatus.SUSPENDED)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(get_current_user(token, db))
+    assert exc.value.status_code == 401
+    
+    set_user_status(db, user.username, UserStatus.ACTIVE)
+    db.refresh(user)
+    token = _token(user)
+    assert asyncio.run(get_current_user(token, db)).status == UserStatus.ACTIVE
+    
+    assert change_password(db, user.username, "Secret123!", "Changed123!")
+    with pytest.raises(HTTPException):
+        asyncio.run(get_current_user(token, db))
\ No newline at end of file
@@ -0,0 +1,94 @@
+import pytest
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.core.pagination import encode_cursor
+from app.database import Base
+from app.main import app
+from app.models.account import Account, Balance, AccountType
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.services.transaction import TransactionService
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+client = TestClient(app)
+
+@pytest.fixture
+def db():
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("History paging is exercised against PostgreSQL")
+    engine = create_engine(TEST_DATABASE_URL)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def _account(db):
+    account = Account(account_number=f"TH{str(uuid.uuid4().int)[:10]}", account_type=AccountType.CURRENT)
+    db.add(account)
+    db.flush()
+    db.add(Balance(account_id=account.id, ledger_balance=0, available_balance=0))
+    return account
+
+def _history(db, at):
+    """Transfers in, out and to itself, with most of them sharing a created_at"""
+    account, other = _account(db), _account(db)
+    sides = [(other.id, account.id), (account.id, other.id), (account.id, account.id)]
+    for i in range(30):
+        from_id, to_id = sides[i % 3]
+        db.add(Transaction(
+            transaction_id=f"TH{uuid.uuid4().hex[:16]}", from_account_id=from_id, to_account_id=to_id,
+            amount=Decimal("1.00"), currency="USD", transaction_type=TransactionType.TRANSFER,
+            status=TransactionStatus.COMPLETED, created_at=at - timedelta(seconds=i // 10)
+        ))
+    # Not this account's
+    db.add(Transaction(
+        transaction_id=f"TH{uuid.uuid4().hex[:16]}", to_account_id=other.id, amount=Decimal("1.00"),
+        currency="USD", transaction_type=TransactionType.DEPOSIT, created_at=at
+    ))
+    db.commit()
+    return account
+
+def _all_pages(service, account_id, limit, **filters):
+    seen, cursor = [], None
+    while True:
+        page, cursor = service.get_account_transactions(account_id, limit=limit, cursor=cursor, **filters)
+        assert len(page) <= limit
+        seen.extend(page)
+        if cursor is None:
+            return seen
+
+def test_pages_have_no_duplicates_or_gaps_across_equal_timestamps(db):
+    at = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+    account = _history(db, at)
+    service = TransactionService(db)
+    
+    expected = db.query(Transaction).filter(
+        (Transaction.from_account_id == account.id) | (Transaction.to_account_id == account.id)
+    ).order_by(Transaction.created_at.desc(), Transaction.id.desc()).all()
+    assert len(expected) == 30
+    for limit in (1, 4, 7, 10, 30, 100):
+        assert [t.id for t in _all_pages(service, account.id, limit)] == [t.id for t in expected]
+    
+    # Date bounds are [start_date, end_date) and combine with the cursor
+    window = _all_pages(service, account.id, 4, start_date=at - timedelta(seconds=1), end_date=at)
+    assert [t.id for t in window] == [t.id for t in expected if t.created_at == at - timedelta(seconds=1)]
+
+def test_bad_cursor_is_a_400():
+    account_id = str(uuid.uuid4())
+    for cursor in ("not-a-cursor", "bm90IGpzb24=", encode_cursor(datetime(2025, 1, 1), "x")[:-4]):
+        response = client.get(f"/transactions/account/{account_id}", params={"cursor": cursor})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid pagination cursor"
\ No newline at end of file
@@ -0,0 +1,114 @@
+import pytest
+import os
+import random
+import threading
+import uuid
+from decimal import Decimal
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.database import Base
+from app.models.account import Account, Balance, AccountType
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.services.transaction import TransactionService
+
+# Row locks only mean something on PostgreSQL, so this suite needs a real server
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", settings.database_url)
+
+THREADS = 16
+TRANSFERS_PER_THREAD = 25
+ACCOUNTS = 4
+OPENING_BALANCE = Decimal("10000.00")
+
+engine = create_engine(TEST_DATABASE_URL, pool_size=THREADS, max_overflow=0)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module")
+def accounts():
+    """Create accounts shared by every worker thread"""
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("Locking stress test requires PostgreSQL")
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    account_ids = []
+    for _ in range(ACCOUNTS):
+        account = Account(
+            account_number=f"LK{str(uuid.uuid4().int)[:10]}",
+            account_type=AccountType.CURRENT
+        )
+        db.add(account)
+        db.flush()
+        db.add(Balance(
+            account_id=account.id,
+            ledger_balance=OPENING_BALANCE,
+            available_balance=OPENING_BALANCE
+        ))
+        account_ids.append(account.id)
+    db.commit()
+    db.close()
+    return account_ids
+
+def _worker(account_ids, seed, results):
+    rng = random.Random(seed)
+    db = TestingSessionLocal()
+    try:
+        service = TransactionService(db)
+        for _ in range(TRANSFERS_PER_THREAD):
+            # Random direction on a small account set maximises lock contention
+            from_id, to_id = rng.sample(account_ids, 2)
+            transaction = Transaction(
+                transaction_id=f"LK{str(uuid.uuid4().int)[:12]}",
+                from_account_id=from_id,
+                to_account_id=to_id,
+                amount=Decimal(rng.randint(1, 10000)) / 100,
+                currency="USD",
+                transaction_type=TransactionType.TRANSFER
+            )
+            db.add(transaction)
+            db.commit()
+            results.append(service.process_transaction(transaction.id))
+    finally:
+        db.close()
+
+def test_concurrent_transfers_lose_no_updates(accounts):
+    """Concurrent transfers must neither deadlock nor lose balance updates"""
+    results = []
+    threads = [
+        threading.Thread(target=_worker, args=(accounts, seed, results))
+        for seed in range(THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=120)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(results) == THREADS * TRANSFERS_PER_THREAD
+    # A deadlock victim is rolled back and reported as a failed transaction
+    assert all(results)
+
+    db = TestingSessionLocal()
+    try:
+        for account_id in accounts:
+            balance = db.query(Balance).filter(Balance.account_id == account_id).one()
+            completed = db.query(Transaction).filter(
+                Transaction.status == TransactionStatus.COMPLETED
+            )
+            credits = sum(t.amount for t in completed.filter(Transaction.to_account_id == account_id))
+            debits = sum(t.amount for t in completed.filter(Transaction.from_account_id == account_id))
+            assert balance.ledger_balance == OPENING_BALANCE + credits - debits
+            assert balance.available_balance == balance.ledger_balance
+
+        total = sum(
+            b.ledger_balance for b in db.query(Balance).filter(Balance.account_id.in_(accounts))
+        )
+        assert total == OPENING_BALANCE * ACCOUNTS
+    finally:
+        db.close()